@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db.models import Count, Q
 from django.utils.html import format_html
-from .models import Perfil, SolicitudVacaciones, Departamento
+from .busqueda import buscar
+from .models import Perfil, SolicitudVacaciones, Departamento, MovimientoVacaciones, DiaFestivo, Notificacion
 
 
 class PerfilInline(admin.StackedInline):
@@ -10,12 +13,15 @@ class PerfilInline(admin.StackedInline):
     can_delete = False
     verbose_name_plural = 'Perfil'
     fields = ('tipo_perfil', 'departamento', 'numero_empleado', 'puesto', 'fecha_contratacion', 'salario', 'supervisor', 'activo')
+    # Opciones bajo demanda en lugar de un <select> con todos los perfiles
+    autocomplete_fields = ('departamento', 'supervisor')
 
 
 class CustomUserAdmin(UserAdmin):
     inlines = (PerfilInline,)
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'get_tipo_perfil', 'get_departamento')
     list_filter = ('is_staff', 'is_superuser', 'is_active', 'perfil__tipo_perfil', 'perfil__departamento')
+    list_select_related = ('perfil__departamento',)
     
     def get_tipo_perfil(self, obj):
         try:
@@ -36,8 +42,11 @@ class CustomUserAdmin(UserAdmin):
 class PerfilAdmin(admin.ModelAdmin):
     list_display = ('numero_empleado', 'usuario', 'get_nombre_completo', 'tipo_perfil', 'departamento', 'puesto', 'activo')
     list_filter = ('tipo_perfil', 'departamento', 'activo', 'fecha_contratacion')
-    search_fields = ('numero_empleado', 'usuario__username', 'usuario__first_name', 'usuario__last_name', 'puesto')
-    readonly_fields = ('fecha_creacion', 'fecha_actualizacion')
+    list_select_related = ('usuario', 'departamento')
+    search_fields = ('numero_empleado', 'usuario__username', 'usuario__first_name', 'usuario__last_name')
+    autocomplete_fields = ('usuario', 'departamento', 'supervisor')
+    # dias_vacaciones_usados se mantiene desde el libro de movimientos
+    readonly_fields = ('fecha_creacion', 'fecha_actualizacion', 'dias_vacaciones_usados')
     
     fieldsets = (
         ('Información Personal', {
@@ -50,7 +59,7 @@ class PerfilAdmin(admin.ModelAdmin):
             'fields': ('dias_vacaciones_anuales', 'dias_vacaciones_usados')
         }),
         ('Estado', {
-            'fields': ('activo',)
+            'fields': ('activo', 'resumen_diario')
         }),
         ('Auditoría', {
             'fields': ('fecha_creacion', 'fecha_actualizacion'),
@@ -61,6 +70,15 @@ class PerfilAdmin(admin.ModelAdmin):
     def get_nombre_completo(self, obj):
         return obj.nombre_completo
     get_nombre_completo.short_description = 'Nombre Completo'
+    
+    def get_queryset(self, request):
+        # __str__ usa el nombre del usuario (también en el autocompletado); el
+        # listado ignora list_select_related si el queryset ya trae uno
+        return super().get_queryset(request).select_related(*self.list_select_related)
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Usuario, nombre y número de empleado por el índice de empleados.busqueda
+        return buscar(queryset, search_term), False
 
 
 @admin.register(SolicitudVacaciones)
@@ -68,7 +86,10 @@ class SolicitudVacacionesAdmin(admin.ModelAdmin):
     list_display = ('empleado', 'fecha_inicio', 'fecha_fin', 'dias_solicitados', 'tipo', 'estado', 'fecha_solicitud')
     list_filter = ('estado', 'tipo', 'fecha_solicitud', 'empleado__departamento')
     search_fields = ('empleado__usuario__username', 'empleado__usuario__first_name', 'empleado__usuario__last_name')
-    readonly_fields = ('fecha_solicitud', 'dias_solicitados')
+    list_select_related = ('empleado__usuario',)
+    autocomplete_fields = ('empleado', 'aprobado_por_jefe', 'aprobado_por_rh')
+    # El estado cambia solo por las aprobaciones, que registran el movimiento de saldo
+    readonly_fields = ('fecha_solicitud', 'dias_solicitados', 'estado')
     date_hierarchy = 'fecha_solicitud'
     
     fieldsets = (
@@ -95,14 +116,72 @@ class SolicitudVacacionesAdmin(admin.ModelAdmin):
 
 @admin.register(Departamento)
 class DepartamentoAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'jefe', 'get_empleados_count', 'activo')
+    list_display = ('nombre', 'jefe', 'get_empleados_count', 'dias_laborables', 'activo')
     list_filter = ('activo',)
     search_fields = ('nombre', 'descripcion')
+    list_select_related = ('jefe__usuario',)
+    autocomplete_fields = ('jefe',)
+    # Meta.ordering no se aplica a consultas con GROUP BY (el annotate)
+    ordering = ('nombre',)
+    
+    def get_queryset(self, request):
+        # Conteo de empleados en la misma consulta del listado
+        return super().get_queryset(request).annotate(
+            num_empleados_activos=Count('perfil', filter=Q(perfil__activo=True))
+        )
     
     def get_empleados_count(self, obj):
-        count = obj.perfil_set.filter(activo=True).count()
-        return format_html('<span style="color: #0066cc; font-weight: bold;">{}</span>', count)
+        return format_html('<span style="color: #0066cc; font-weight: bold;">{}</span>', obj.num_empleados_activos)
     get_empleados_count.short_description = 'Empleados Activos'
+    get_empleados_count.admin_order_field = 'num_empleados_activos'
+
+
+@admin.register(MovimientoVacaciones)
+class MovimientoVacacionesAdmin(admin.ModelAdmin):
+    """Libro de movimientos: solo lectura, los ajustes se registran con Perfil.ajustar_saldo"""
+    list_display = ('fecha', 'perfil', 'tipo', 'dias', 'solicitud', 'registrado_por')
+    list_filter = ('tipo', 'fecha')
+    search_fields = ('perfil__numero_empleado', 'perfil__usuario__username', 'comentario')
+    list_select_related = ('perfil__usuario', 'solicitud__empleado__usuario', 'registrado_por__usuario')
+    date_hierarchy = 'fecha'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DiaFestivo)
+class DiaFestivoAdmin(admin.ModelAdmin):
+    """Festivos de la empresa; los oficiales se calculan en empleados.calendario"""
+    list_display = ('fecha', 'nombre')
+    search_fields = ('nombre',)
+    date_hierarchy = 'fecha'
+
+
+@admin.register(Notificacion)
+class NotificacionAdmin(admin.ModelAdmin):
+    """Bandeja de salida; las filas las crea el flujo de aprobación y las envía el worker"""
+    list_display = ('fecha_creacion', 'destinatario', 'evento', 'resumen', 'estado', 'intentos', 'disponible_en')
+    list_filter = ('estado', 'evento', 'resumen')
+    search_fields = ('destinatario__numero_empleado', 'destinatario__usuario__email', 'ultimo_error')
+    list_select_related = ('destinatario__usuario',)
+    readonly_fields = [campo.name for campo in Notificacion._meta.fields]
+    actions = ['reintentar']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Reintentar ahora')
+    def reintentar(self, request, queryset):
+        actualizadas = queryset.exclude(estado='ENVIADA').update(
+            estado='PENDIENTE', intentos=0, disponible_en=timezone.now(), reserva=''
+        )
+        self.message_user(request, f'{actualizadas} notificaciones reprogramadas')
 
 
 # Reemplazar el UserAdmin por defecto
@@ -0,0 +1,123 @@
+"""
+Aprobación y rechazo de solicitudes en lote.
+
+Aplica la misma semántica que ``SolicitudVacaciones.aprobar_por_jefe`` /
+``aprobar_por_rh`` (y sus rechazos) a N solicitudes dentro de una sola
+transacción: una lectura con bloqueo, un UPDATE por acción y, para las
+aprobaciones de RH, un ``bulk_create`` de movimientos más un único UPDATE
+agregado del saldo por empleado. Las notificaciones se encolan en la misma
+transacción con un solo ``bulk_create``.
+"""
+
+from django.db import transaction
+from django.db.models import Case, When, Value
+from django.utils import timezone
+
+from .models import SolicitudVacaciones, MovimientoVacaciones, invalidar_estadisticas
+from .notificaciones import encolar
+
+
+MAX_SOLICITUDES_LOTE = 1000
+
+APROBADA = 'aprobada'
+RECHAZADA = 'rechazada'
+NO_ENCONTRADA = 'no_encontrada'
+ESTADO_INVALIDO = 'estado_invalido'
+SIN_PERMISO = 'sin_permiso'
+
+
+def _bloquear(ids, estado_requerido, jefe=None):
+    """
+    Bloquear las solicitudes del lote y clasificarlas; con ``jefe`` solo son
+    válidas las de empleados a su cargo. Devuelve ``(resultados, validas)``
+    donde ``validas`` son tuplas ``(id, empleado_id, dias_solicitados, tipo)``.
+    """
+    filas = (
+        SolicitudVacaciones.objects.select_for_update(of=('self',))
+        .filter(pk__in=ids)
+        .order_by('pk')
+        .values_list(
+            'id', 'estado', 'empleado_id', 'empleado__departamento_id', 'empleado__ruta_jerarquia',
+            'dias_solicitados', 'tipo',
+        )
+    )
+    resultados = {pk: NO_ENCONTRADA for pk in ids}
+    validas = []
+    for pk, estado, empleado_id, departamento_id, ruta, dias, tipo in filas:
+        if jefe is not None and not jefe.tiene_a_cargo(departamento_id, ruta):
+            resultados[pk] = SIN_PERMISO
+        elif estado != estado_requerido:
+            resultados[pk] = ESTADO_INVALIDO
+        else:
+            validas.append((pk, empleado_id, dias, tipo))
+    return resultados, validas
+
+
+def _estado_jefe(accion, tipo):
+    if accion != 'aprobar':
+        return 'RECHAZADO_JEFE'
+    return 'PENDIENTE_RH' if tipo == 'NORMAL' else 'APROBADO_JEFE'
+
+
+def procesar_lote_jefe(jefe, ids, accion, comentario=""):
+    """Aprobar o rechazar como jefe de área; solo solicitudes de su personal a cargo"""
+    ahora = timezone.now()
+    with transaction.atomic():
+        resultados, validas = _bloquear(ids, 'PENDIENTE_JEFE', jefe=jefe)
+        ids_validos = [pk for pk, _, _, _ in validas]
+        if ids_validos:
+            if accion == 'aprobar':
+                # Igual que aprobar_por_jefe: las normales pasan directo a RH
+                estado = Case(
+                    When(tipo='NORMAL', then=Value('PENDIENTE_RH')),
+                    default=Value('APROBADO_JEFE'),
+                )
+            else:
+                estado = Value('RECHAZADO_JEFE')
+            SolicitudVacaciones.objects.filter(pk__in=ids_validos, estado='PENDIENTE_JEFE').update(
+                estado=estado,
+                aprobado_por_jefe=jefe,
+                comentarios_jefe=comentario,
+                fecha_aprobacion_jefe=ahora,
+            )
+            encolar([
+                (pk, empleado_id, _estado_jefe(accion, tipo))
+                for pk, empleado_id, _, tipo in validas
+            ])
+            transaction.on_commit(invalidar_estadisticas)
+    resultado = APROBADA if accion == 'aprobar' else RECHAZADA
+    resultados.update({pk: resultado for pk in ids_validos})
+    return resultados
+
+
+def procesar_lote_rh(rh, ids, accion, comentario=""):
+    """Aprobar o rechazar como RH; las aprobaciones descuentan días del saldo"""
+    ahora = timezone.now()
+    with transaction.atomic():
+        resultados, validas = _bloquear(ids, 'PENDIENTE_RH')
+        ids_validos = [pk for pk, _, _, _ in validas]
+        if ids_validos:
+            SolicitudVacaciones.objects.filter(pk__in=ids_validos, estado='PENDIENTE_RH').update(
+                estado='APROBADO_RH' if accion == 'aprobar' else 'RECHAZADO_RH',
+                aprobado_por_rh=rh,
+                comentarios_rh=comentario,
+                fecha_aprobacion_rh=ahora,
+            )
+            nuevo_estado = 'APROBADO_RH' if accion == 'aprobar' else 'RECHAZADO_RH'
+            encolar([(pk, empleado_id, nuevo_estado) for pk, empleado_id, _, _ in validas])
+            transaction.on_commit(invalidar_estadisticas)
+            if accion == 'aprobar':
+                MovimientoVacaciones.registrar_varios([
+                    MovimientoVacaciones(
+                        perfil_id=empleado_id,
+                        solicitud_id=pk,
+                        tipo='APROBACION',
+                        dias=dias,
+                        registrado_por=rh,
+                        comentario=comentario,
+                    )
+                    for pk, empleado_id, dias, _ in validas
+                ])
+    resultado = APROBADA if accion == 'aprobar' else RECHAZADA
+    resultados.update({pk: resultado for pk in ids_validos})
+    return resultados
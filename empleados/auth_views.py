@@ -4,13 +4,13 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.urls import reverse
 from django.http import HttpResponseRedirect
-from .models import Perfil
+from .middleware import cargar_perfil
 
 
 def login_view(request):
     """Vista de login personalizada"""
     if request.user.is_authenticated:
-        return redirect('index')
+        return redirect('empleados:dashboard')
     
     if request.method == 'POST':
         username = request.POST.get('username')
@@ -27,19 +27,18 @@ def login_view(request):
                     next_url = request.GET.get('next', 'empleados:dashboard')
                     if next_url == 'empleados:dashboard':
                         # Verificar si tiene perfil
-                        try:
-                            perfil = Perfil.objects.get(usuario=user)
-                            if perfil.es_admin():
-                                next_url = 'empleados:admin_dashboard'
-                            elif perfil.es_rh():
-                                next_url = 'empleados:rh_dashboard'
-                            elif perfil.es_jefe_area():
-                                next_url = 'empleados:jefe_dashboard'
-                            else:
-                                next_url = 'empleados:empleado_dashboard'
-                        except Perfil.DoesNotExist:
+                        perfil = cargar_perfil(user)
+                        if perfil is None:
                             # No tiene perfil
                             next_url = 'empleados:dashboard'
+                        elif perfil.es_admin():
+                            next_url = 'empleados:admin_dashboard'
+                        elif perfil.es_rh():
+                            next_url = 'empleados:rh_dashboard'
+                        elif perfil.es_jefe_area():
+                            next_url = 'empleados:jefe_dashboard'
+                        else:
+                            next_url = 'empleados:empleado_dashboard'
                     
                     return redirect(next_url)
                 else:
@@ -57,7 +56,7 @@ def logout_view(request):
     """Vista de logout personalizada"""
     logout(request)
     messages.info(request, 'Has cerrado sesión exitosamente.')
-    return redirect('login')
+    return redirect('empleados:login')
 
 
 @login_required
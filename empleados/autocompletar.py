@@ -0,0 +1,122 @@
+"""
+Autocompletado para los campos que eligen un perfil o un departamento.
+
+Los ``<select>`` de supervisor, jefe y departamento dibujaban todas las
+opciones (y cada etiqueta de ``Perfil`` consultaba su ``usuario``). Con
+``AutocompletarSelect`` el formulario solo dibuja la opción elegida y el
+navegador pide las demás a ``api/autocompletar/<fuente>/?q=...`` en
+páginas de ``TAMANO_PAGINA`` con cursor (ver empleados.paginacion). Las
+respuestas se guardan en cache bajo la versión de perfiles o de
+departamentos, que cambia con cada modificación.
+"""
+
+import hashlib
+import json
+
+from django import forms
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from . import metricas
+from .busqueda import buscar, normalizar, palabras
+from .models import Perfil, Departamento, ORGANIGRAMA_VERSION_KEY, DEPARTAMENTOS_VERSION_KEY
+from .paginacion import paginar, ORDEN_PERFILES
+
+
+TAMANO_PAGINA = 20
+TIPOS_SUPERVISOR = ['JEFE_AREA', 'ADMIN']
+
+
+def supervisores():
+    """Perfiles que pueden ser supervisor o jefe de departamento"""
+    return Perfil.objects.filter(activo=True, tipo_perfil__in=TIPOS_SUPERVISOR).select_related('usuario')
+
+
+def departamentos():
+    return Departamento.objects.filter(activo=True)
+
+
+def _buscar_departamentos(queryset, termino):
+    """
+    ``termino`` llega normalizado (sin acentos) y ``nombre`` no, así que la
+    comparación se hace en Python sobre los nombres normalizados: los
+    departamentos activos son pocos y la respuesta queda en cache.
+    """
+    consulta = termino.split()
+    if not consulta:
+        return queryset
+    ids = [
+        pk for pk, nombre in queryset.values_list('pk', 'nombre')
+        if all(palabra in normalizar(nombre) for palabra in consulta)
+    ]
+    return queryset.filter(pk__in=ids)
+
+
+# fuente: (queryset, búsqueda, orden, clave de versión)
+FUENTES = {
+    'supervisores': (supervisores, buscar, ORDEN_PERFILES, ORGANIGRAMA_VERSION_KEY),
+    'departamentos': (departamentos, _buscar_departamentos, ('nombre', 'id'), DEPARTAMENTOS_VERSION_KEY),
+}
+
+
+def opciones(request, fuente):
+    """
+    JSON (str) ``{"resultados": [{"id", "texto"}], "siguiente": cursor}``
+    para ``?q=`` y ``?cursor=``. ``fuente`` debe existir en ``FUENTES``.
+    """
+    queryset, filtrar, orden, clave_version = FUENTES[fuente]
+    termino = ' '.join(palabras(request.GET.get('q', '')))
+    cursor = request.GET.get('cursor', '')
+
+    segundos = settings.RH_CONFIG.get('AUTOCOMPLETAR_CACHE_SEGUNDOS', 60)
+    version = cache.get_or_set(clave_version, 1, None)
+    resumen = hashlib.md5(f'{termino}\n{cursor}'.encode()).hexdigest()
+    clave = f'autocompletar:{fuente}:{version}:{resumen}'
+    if segundos:
+        contenido = cache.get(clave)
+        metricas.registrar_cache('autocompletar', contenido is not None)
+        if contenido is not None:
+            return contenido
+
+    pagina = paginar(request, filtrar(queryset(), termino), orden, TAMANO_PAGINA)
+    contenido = json.dumps({
+        'resultados': [{'id': objeto.pk, 'texto': str(objeto)} for objeto in pagina],
+        'siguiente': pagina.cursor_siguiente,
+    }, ensure_ascii=False, separators=(',', ':'))
+    if segundos:
+        cache.set(clave, contenido, segundos)
+    return contenido
+
+
+class AutocompletarSelect(forms.Select):
+    """
+    ``<select>`` que solo contiene la opción elegida; static/js/autocompletar.js
+    le agrega un campo de búsqueda que consulta la fuente ``fuente``.
+    """
+
+    class Media:
+        js = ('js/autocompletar.js',)
+
+    def __init__(self, fuente, attrs=None):
+        super().__init__(attrs)
+        self.fuente = fuente
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs'].update({
+            'data-autocompletar': reverse('empleados:autocompletar', args=[self.fuente]),
+            'data-placeholder': 'Escriba para buscar...',
+        })
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        seleccionados = {str(v) for v in value if str(v).isdigit()}
+        grupo = [self.create_option(name, '', '---------', not seleccionados, 0)]
+        if seleccionados:
+            campo = self.choices.field
+            for indice, objeto in enumerate(self.choices.queryset.filter(pk__in=seleccionados), 1):
+                grupo.append(self.create_option(
+                    name, campo.prepare_value(objeto), campo.label_from_instance(objeto), True, indice
+                ))
+        return [(None, grupo, 0)]
@@ -0,0 +1,84 @@
+"""
+Ajustes de las conexiones a la base de datos.
+
+Con el perfil de producción de SQLite (``RH_SQLITE_PRODUCCION=1``, ver los
+settings) cada conexión nueva recibe ``RH_CONFIG['SQLITE_PRAGMAS']``:
+
+- ``journal_mode = WAL``: las lecturas no esperan a la escritura en curso ni
+  la bloquean; solo los escritores se turnan entre sí;
+- ``synchronous = NORMAL``: en WAL no se pierde consistencia, solo las
+  últimas transacciones si se corta la luz;
+- ``busy_timeout``: quien encuentra la base bloqueada espera en lugar de
+  fallar al momento;
+- ``mmap_size``, ``cache_size`` y ``temp_store``: menos lecturas al disco.
+
+Los settings además abren las transacciones con ``BEGIN IMMEDIATE``: toman
+el candado de escritura al empezar. Con ``BEGIN`` (diferido), dos
+transacciones que leen y luego escriben se bloquean entre sí y SQLite
+responde "database is locked" sin esperar el ``busy_timeout``. Si aun así
+el candado no llega a tiempo, ``reintentar_bloqueo`` repite la escritura.
+"""
+
+from functools import wraps
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from .replicas import PRIMARIO
+
+
+logger = logging.getLogger(__name__)
+
+# Solo para la base que escribe: la réplica es de solo lectura
+PRAGMAS_ESCRITURA = ('journal_mode', 'synchronous')
+
+
+def configurar_sqlite(sender, connection, **kwargs):
+    """Receptor de ``connection_created``: aplicar ``RH_CONFIG['SQLITE_PRAGMAS']``"""
+    pragmas = settings.RH_CONFIG.get('SQLITE_PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas.items():
+            if nombre in PRAGMAS_ESCRITURA and connection.alias != PRIMARIO:
+                continue
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+
+def base_bloqueada(error):
+    """``error`` es el "database is locked" / "database table is locked" de SQLite"""
+    return connection.vendor == 'sqlite' and 'is locked' in str(error)
+
+
+def reintentar_bloqueo(vista):
+    """
+    Decorador de vistas que escriben: cada POST corre en una transacción y,
+    si SQLite sigue bloqueada pasado el ``busy_timeout``, se repite completo
+    hasta ``RH_CONFIG['SQLITE_REINTENTOS']`` veces, con espera exponencial
+    con jitter. La transacción fallida se revierte entera (y con ella sus
+    ``on_commit``), así que repetir la vista no duplica nada. Los GET, las
+    demás bases y ``SQLITE_REINTENTOS = 0`` pasan sin cambios.
+    """
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        reintentos = settings.RH_CONFIG.get('SQLITE_REINTENTOS', 0)
+        if (not reintentos or request.method != 'POST' or connection.vendor != 'sqlite'
+                or connection.in_atomic_block):
+            return vista(request, *args, **kwargs)
+        for intento in range(reintentos + 1):
+            try:
+                with transaction.atomic():
+                    return vista(request, *args, **kwargs)
+            except OperationalError as error:
+                if intento == reintentos or not base_bloqueada(error):
+                    raise
+                espera = 0.05 * 2 ** intento * random.uniform(0.5, 1.5)
+                logger.warning(
+                    'Base bloqueada en %s; reintento %d de %d en %.0f ms',
+                    request.path, intento + 1, reintentos, espera * 1000,
+                )
+                time.sleep(espera)
+    return envoltura
@@ -0,0 +1,268 @@
+"""
+Registro (logging) en JSON por líneas sin escribir a disco durante la petición.
+
+``configuracion_logging()`` arma el diccionario ``LOGGING`` de los settings:
+los registros pasan por ``ManejadorCola``, que solo los pone en una cola, y
+un hilo aparte (``QueueListener``) los escribe con ``ArchivoRotativo``. Cada
+línea es un objeto JSON con el id de la petición y el id del usuario, que
+``FiltroPeticion`` toma de la petición en curso (ver
+``empleados.middleware.ContextoPeticionMiddleware``).
+
+Este módulo se importa desde los settings: no debe importar modelos ni nada
+que necesite la configuración de Django.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.functional import SimpleLazyObject, empty
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos al rotar
+    fcntl = None
+
+
+_peticion_actual = contextvars.ContextVar('peticion', default=None)
+_formato_excepciones = logging.Formatter()
+
+
+def _usuario_id(request):
+    usuario = getattr(request, 'user', None)
+    if isinstance(usuario, SimpleLazyObject):
+        # No se evalúa: cargar la sesión desde un log haría consultas (y más logs)
+        usuario = usuario._wrapped
+        if usuario is empty:
+            return None
+    return getattr(usuario, 'pk', None)
+
+
+class FiltroPeticion(logging.Filter):
+    """Agrega ``request_id`` y ``usuario_id`` de la petición en curso al registro"""
+
+    def filter(self, record):
+        request = _peticion_actual.get()
+        if not hasattr(record, 'request_id'):
+            record.request_id = getattr(request, 'request_id', None)
+        if not hasattr(record, 'usuario_id'):
+            record.usuario_id = _usuario_id(request) if request is not None else None
+        return True
+
+
+class FormatoJSON(logging.Formatter):
+    """Un objeto JSON por registro"""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'usuario_id': getattr(record, 'usuario_id', None),
+            'proceso': record.process,
+            'modulo': record.module,
+            'linea': record.lineno,
+        }
+        # Extras conocidos: django.request y empleados.medicion
+        if hasattr(record, 'status_code'):
+            datos['estado'] = record.status_code
+        if hasattr(record, 'medicion'):
+            datos['medicion'] = record.medicion
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            datos['excepcion'] = record.exc_text
+        if record.stack_info:
+            datos['pila'] = self.formatStack(record.stack_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+class ArchivoRotativo(logging.Handler):
+    """
+    Archivo compartido por todos los workers, rotado por tamaño.
+
+    Cada registro se escribe con un solo ``os.write`` sobre un descriptor
+    ``O_APPEND``, así las líneas de distintos procesos no se mezclan. La
+    rotación se hace bajo un ``flock`` sobre ``<archivo>.lock``: el primer
+    proceso que llega al límite renombra los archivos y los demás, al ver que
+    el archivo ya no es el que tienen abierto, solo lo vuelven a abrir.
+    Con ``respaldos = 0`` el archivo no se rota.
+    """
+
+    def __init__(self, archivo, max_bytes=10 * 1024 * 1024, respaldos=5):
+        super().__init__()
+        self.archivo = os.fspath(archivo)
+        self.max_bytes = max_bytes
+        self.respaldos = respaldos
+        self._fd = None
+        self._inodo = None
+
+    def _abrir(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.archivo, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._inodo = os.fstat(self._fd).st_ino
+
+    def _rotar(self, tamano):
+        with open(f'{self.archivo}.lock', 'a') as candado:
+            if fcntl is not None:
+                fcntl.flock(candado, fcntl.LOCK_EX)
+            try:
+                actual = os.stat(self.archivo)
+            except FileNotFoundError:
+                actual = None
+            # Otro proceso pudo haber rotado ya: solo se rota si el registro
+            # de ``tamano`` bytes todavía no cabe en el archivo abierto
+            if (actual is not None and actual.st_ino == self._inodo and actual.st_size
+                    and actual.st_size + tamano > self.max_bytes):
+                for indice in range(self.respaldos - 1, 0, -1):
+                    origen = f'{self.archivo}.{indice}'
+                    if os.path.exists(origen):
+                        os.replace(origen, f'{self.archivo}.{indice + 1}')
+                os.replace(self.archivo, f'{self.archivo}.1')
+            self._abrir()
+            # El candado se libera al cerrar el archivo
+
+    def emit(self, record):
+        try:
+            datos = (self.format(record) + '\n').encode('utf-8')
+            if self._fd is None:
+                self._abrir()
+            if (self.max_bytes and self.respaldos
+                    and os.fstat(self._fd).st_size + len(datos) > self.max_bytes):
+                self._rotar(len(datos))
+            os.write(self._fd, datos)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self.release()
+        super().close()
+
+
+class ManejadorCola(QueueHandler):
+    """
+    Pone los registros en una cola en memoria; un hilo ``QueueListener`` los
+    formatea y escribe con ``ArchivoRotativo``. En la petición solo queda el
+    costo de armar el mensaje y encolarlo.
+
+    El formatter configurado se aplica en el hilo escritor. Si el proceso se
+    bifurca (workers de gunicorn con ``--preload``) el hilo no sobrevive al
+    fork: se vuelve a iniciar en el primer registro del proceso hijo. Al
+    salir, ``logging.shutdown`` cierra el manejador y se escribe lo pendiente.
+    """
+
+    def __init__(self, archivo, max_bytes=10 * 1024 * 1024, respaldos=5):
+        super().__init__(queue.SimpleQueue())
+        self.destino = ArchivoRotativo(archivo, max_bytes, respaldos)
+        self.listener = None
+        self._pid = None
+        self._iniciar()
+
+    def _iniciar(self):
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.destino, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        self.destino.setFormatter(fmt)
+
+    def prepare(self, record):
+        # El mensaje y el traceback se formatean aquí porque los argumentos
+        # podrían cambiar antes de que escriba el hilo. Se modifica el registro
+        # sin copiarlo: los demás manejadores (consola) obtienen el mismo texto
+        # de msg y exc_text, y exc_info se conserva para los que lo necesiten.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _formato_excepciones.formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record):
+        # Handler.handle ya tiene tomado self.lock
+        if self._pid != os.getpid():
+            self._iniciar()
+        self.queue.put_nowait(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self.listener is not None and self._pid == os.getpid():
+                self.listener.stop()
+            self.listener = None
+        finally:
+            self.release()
+        self.destino.close()
+        super().close()
+
+
+def configuracion_logging(directorio, archivo='rh_system.log', consola=True,
+                          nivel_empleados='DEBUG', max_bytes=10 * 1024 * 1024, respaldos=5):
+    """
+    ``LOGGING`` para los settings: raíz, ``django`` y ``empleados`` escriben
+    JSON por líneas en ``<directorio>/<archivo>`` a través de la cola, y en
+    la consola en texto si ``consola`` es verdadero.
+    """
+    manejadores = ['archivo', 'consola'] if consola else ['archivo']
+    configuracion = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'peticion': {'()': FiltroPeticion},
+        },
+        'formatters': {
+            'json': {'()': FormatoJSON},
+            'simple': {
+                'format': '{levelname} {message}',
+                'style': '{',
+            },
+        },
+        'handlers': {
+            'archivo': {
+                'level': 'INFO',
+                'class': 'empleados.bitacora.ManejadorCola',
+                'archivo': os.path.join(directorio, archivo),
+                'max_bytes': max_bytes,
+                'respaldos': respaldos,
+                'formatter': 'json',
+                'filters': ['peticion'],
+            },
+        },
+        'root': {
+            'handlers': manejadores,
+            'level': 'INFO',
+        },
+        'loggers': {
+            'django': {
+                'handlers': manejadores,
+                'level': 'INFO',
+                'propagate': False,
+            },
+            # Incluye empleados.medicion (peticiones lentas)
+            'empleados': {
+                'handlers': manejadores,
+                'level': nivel_empleados,
+                'propagate': False,
+            },
+        },
+    }
+    if consola:
+        configuracion['handlers']['consola'] = {
+            'level': 'DEBUG',
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        }
+    return configuracion
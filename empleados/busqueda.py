@@ -0,0 +1,118 @@
+"""
+Búsqueda de empleados por nombre, usuario o número de empleado.
+
+Cada ``Perfil`` guarda en ``texto_busqueda`` esos campos normalizados
+(minúsculas y sin acentos, "José Núñez" → "jose nunez"); el campo se
+mantiene en ``Perfil.save()`` y cuando cambia el ``User``. Sobre él:
+
+- SQLite: tabla virtual FTS5 con tokenizador ``trigram`` y contenido
+  externo, sincronizada por triggers.
+- PostgreSQL: índice GIN con ``gin_trgm_ops`` (pg_trgm), que atiende los
+  ``LIKE '%texto%'``.
+- Otros backends: los mismos ``LIKE`` sin índice, pero sobre una sola
+  columna y sin el join con ``auth_user``.
+
+En los dos casos cada palabra se busca como subcadena (igual que el
+``icontains`` anterior: "123" encuentra "B000123") y las palabras se
+combinan con AND, así que "lop ana" encuentra a "Ana López". Los trigramas
+no sirven para palabras de menos de tres letras; esas se filtran con
+``LIKE`` sobre las filas que ya devolvió el índice.
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TABLA_FTS = 'empleados_perfil_fts'
+PALABRA = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas sin diacríticos: 'Núñez' → 'nunez'"""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def texto_busqueda(usuario, numero_empleado):
+    """Contenido de ``Perfil.texto_busqueda`` para un usuario y número de empleado"""
+    partes = [usuario.username, usuario.first_name, usuario.last_name, numero_empleado]
+    return normalizar(' '.join(parte for parte in partes if parte))
+
+
+def palabras(termino):
+    return PALABRA.findall(normalizar(termino))
+
+
+def buscar(queryset, termino):
+    """Filtrar un queryset de ``Perfil`` por ``termino``"""
+    consulta = palabras(termino)
+    if not consulta:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    filtro = Q()
+    if vendor == 'sqlite':
+        largas = [palabra for palabra in consulta if len(palabra) >= 3]
+        if largas:
+            # Comillas para que ninguna palabra se interprete como operador FTS5
+            expresion = ' '.join(f'"{palabra}"' for palabra in largas)
+            filtro &= Q(pk__in=RawSQL(
+                f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s', (expresion,)
+            ))
+        consulta = [palabra for palabra in consulta if len(palabra) < 3]
+
+    for palabra in consulta:
+        filtro &= Q(texto_busqueda__contains=palabra)
+    return queryset.filter(filtro)
+
+
+# --- Índice FTS5 (SQLite) ---
+
+SQL_FTS_SQLITE = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5(
+        texto_busqueda, content='empleados_perfil', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON empleados_perfil BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, texto_busqueda) VALUES (new.id, new.texto_busqueda);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON empleados_perfil BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, texto_busqueda)
+        VALUES ('delete', old.id, old.texto_busqueda);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF texto_busqueda ON empleados_perfil BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, texto_busqueda)
+        VALUES ('delete', old.id, old.texto_busqueda);
+        INSERT INTO {TABLA_FTS}(rowid, texto_busqueda) VALUES (new.id, new.texto_busqueda);
+    END""",
+]
+
+TRIGGERS_FTS = {f'{TABLA_FTS}_ai', f'{TABLA_FTS}_ad', f'{TABLA_FTS}_au'}
+
+
+def asegurar_indice_sqlite(connection):
+    """
+    Crear la tabla FTS5 y sus triggers si faltan y reconstruir el índice en
+    ese caso. Las migraciones que alteran ``Perfil`` en SQLite recrean la
+    tabla y se llevan los triggers, por eso se revisa después de migrar.
+    Devuelve ``True`` si hubo que reconstruir.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        columnas = {c.name for c in connection.introspection.get_table_description(cursor, 'empleados_perfil')}
+        if 'texto_busqueda' not in columnas:
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'empleados_perfil'"
+        )
+        existentes = {fila[0] for fila in cursor.fetchall()}
+        if TRIGGERS_FTS <= existentes:
+            return False
+        for sql in SQL_FTS_SQLITE:
+            cursor.execute(sql)
+        cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+    return True
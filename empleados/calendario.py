@@ -0,0 +1,152 @@
+"""
+Calendario laboral: días hábiles entre dos fechas.
+
+Los días festivos de cada año (obligatorios según el artículo 74 de la Ley
+Federal del Trabajo más los registrados en ``DiaFestivo``) se guardan en el
+cache de Django, compartido entre procesos, bajo una clave que incluye
+``FESTIVOS_VERSION_KEY``: guardar o borrar un ``DiaFestivo`` cambia la
+versión en todos los workers. ``RH_CONFIG['FESTIVOS_CACHE_SEGUNDOS']`` acota
+lo que dura un año calculado si los festivos cambian sin pasar por las
+señales (``update()``, SQL directo). Cada departamento define su semana laboral con una
+máscara de siete caracteres de lunes a domingo (``'1111100'``).
+
+Si NumPy está instalado el conteo por lotes usa ``numpy.busday_count``; si
+no, se usa una versión en Python de costo O(1) por rango más una búsqueda
+binaria sobre los festivos.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import numpy
+except ImportError:  # NumPy es opcional
+    numpy = None
+
+
+MASCARA_DEFAULT = '1111100'
+
+# date.toordinal() de 1970-01-01, origen de datetime64
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+
+
+def _lunes(anio, mes, numero):
+    """El ``numero``-ésimo lunes de ``mes``"""
+    primero = date(anio, mes, 1)
+    return primero + timedelta(days=(7 - primero.weekday()) % 7 + 7 * (numero - 1))
+
+
+def festivos_oficiales(anio):
+    """Descanso obligatorio (LFT art. 74) del año"""
+    festivos = {
+        date(anio, 1, 1),
+        _lunes(anio, 2, 1),    # Día de la Constitución
+        _lunes(anio, 3, 3),    # Natalicio de Benito Juárez
+        date(anio, 5, 1),
+        date(anio, 9, 16),
+        _lunes(anio, 11, 3),   # Día de la Revolución
+        date(anio, 12, 25),
+    }
+    # Transmisión del Poder Ejecutivo Federal, cada seis años desde 2024
+    if anio >= 2024 and (anio - 2024) % 6 == 0:
+        festivos.add(date(anio, 10, 1))
+    return festivos
+
+
+def _festivos_por_anio(anios):
+    """``{anio: festivos ordenados}``; los años que no están en cache se calculan y se guardan"""
+    from .models import DiaFestivo, FESTIVOS_VERSION_KEY
+
+    version = cache.get_or_set(FESTIVOS_VERSION_KEY, 1, None)
+    claves = {anio: f'festivos:{version}:{anio}' for anio in anios}
+    en_cache = cache.get_many(claves.values())
+    resultado, nuevos = {}, {}
+    for anio, clave in claves.items():
+        if clave in en_cache:
+            resultado[anio] = en_cache[clave]
+            continue
+        festivos = festivos_oficiales(anio)
+        festivos.update(DiaFestivo.objects.filter(fecha__year=anio).values_list('fecha', flat=True))
+        resultado[anio] = nuevos[clave] = tuple(sorted(festivos))
+    if nuevos:
+        cache.set_many(nuevos, settings.RH_CONFIG.get('FESTIVOS_CACHE_SEGUNDOS', 24 * 3600))
+    return resultado
+
+
+def festivos_del_anio(anio):
+    """Festivos oficiales y de la empresa del año, ordenados"""
+    return _festivos_por_anio([anio])[anio]
+
+
+def festivos_entre(inicio, fin):
+    por_anio = _festivos_por_anio(range(inicio.year, fin.year + 1))
+    return [festivo for anio in sorted(por_anio) for festivo in por_anio[anio]]
+
+
+def validar_mascara(mascara):
+    return isinstance(mascara, str) and len(mascara) == 7 and set(mascara) <= {'0', '1'} and '1' in mascara
+
+
+def dias_habiles(inicio, fin, mascara=MASCARA_DEFAULT, festivos=None):
+    """
+    Días hábiles en ``[inicio, fin]`` (ambos inclusive). ``festivos`` (lista
+    ordenada que cubra el rango) evita consultar el cache en cada llamada.
+    """
+    if fin < inicio:
+        return 0
+    mascara = mascara or MASCARA_DEFAULT
+    total = (fin - inicio).days + 1
+    semanas, resto = divmod(total, 7)
+    conteo = semanas * mascara.count('1')
+    dia_semana = inicio.weekday()
+    for desplazamiento in range(resto):
+        conteo += mascara[(dia_semana + desplazamiento) % 7] == '1'
+
+    if festivos is None:
+        festivos = festivos_entre(inicio, fin)
+    for festivo in festivos[bisect_left(festivos, inicio):bisect_right(festivos, fin)]:
+        conteo -= mascara[festivo.weekday()] == '1'
+    return conteo
+
+
+def _a_datetime64(fechas):
+    # Convertir por ordinal es mucho más rápido que dejar que NumPy
+    # interprete cada objeto date
+    ordinales = numpy.fromiter((fecha.toordinal() for fecha in fechas), dtype='int64')
+    return (ordinales - _ORDINAL_EPOCA).astype('datetime64[D]')
+
+
+def dias_habiles_lote(rangos):
+    """
+    Días hábiles para muchos rangos ``(inicio, fin, mascara)`` en una pasada.
+    Con NumPy se agrupan por máscara y se cuentan vectorizados.
+    """
+    rangos = list(rangos)
+    if not rangos:
+        return []
+    minimo = min(inicio for inicio, _, _ in rangos)
+    maximo = max(fin for _, fin, _ in rangos)
+    festivos = festivos_entre(minimo, maximo)
+    if numpy is None:
+        return [dias_habiles(inicio, fin, mascara, festivos) for inicio, fin, mascara in rangos]
+
+    festivos = _a_datetime64(festivos)
+
+    resultado = [0] * len(rangos)
+    por_mascara = {}
+    for posicion, (_, _, mascara) in enumerate(rangos):
+        por_mascara.setdefault(mascara or MASCARA_DEFAULT, []).append(posicion)
+
+    for mascara, posiciones in por_mascara.items():
+        inicios = _a_datetime64(rangos[p][0] for p in posiciones)
+        fines = _a_datetime64(rangos[p][1] for p in posiciones)
+        # busday_count excluye la fecha final; el rango aquí es inclusivo
+        conteos = numpy.busday_count(
+            inicios, numpy.maximum(fines + 1, inicios), weekmask=mascara, holidays=festivos
+        )
+        for posicion, conteo in zip(posiciones, conteos.tolist()):
+            resultado[posicion] = conteo
+    return resultado
@@ -0,0 +1,379 @@
+"""
+Pruebas de carga sobre las rutas reales con usuarios simulados concurrentes.
+
+Cada usuario simulado es un hilo con su propio ``django.test.Client`` que,
+mientras dure la prueba, abre sesiones como un usuario de la base generada
+por ``generar_datos`` (todos comparten la contraseña): inicia sesión, sigue
+la cadena de redirecciones de ``dashboard`` hasta el de su rol y hace las
+operaciones del rol, cada una seguida del dashboard al que redirige:
+
+- empleado: ``solicitar_vacaciones`` (POST);
+- jefe de área: ``aprobar_jefe`` (POST) sobre una solicitud de su personal;
+- RH: ``gestion_usuarios`` con búsqueda y ``aprobar_rh`` (POST);
+- administrador: ``gestion_usuarios`` con búsqueda.
+
+Las peticiones pasan por todo el stack de middleware en el mismo proceso (sin
+servidor ni red; el cliente de pruebas no exige el token CSRF). Por petición
+se registra la latencia, el código de estado y las consultas SQL; por ruta se
+resumen p50/p95/p99, fallos (estado distinto del esperado) y consultas, y
+``comparar()`` contrasta el resultado con una línea base guardada en JSON.
+
+La prueba escribe en la base (solicitudes, aprobaciones, sesiones): debe
+correrse sobre una base generada para eso, no sobre la de producción.
+"""
+
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from collections import Counter, deque
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import F
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .generacion import APELLIDOS, PASSWORD_DEFAULT, PREFIJO_USUARIO
+from .models import Perfil, SolicitudVacaciones
+
+
+# Proporción de sesiones por tipo de perfil
+MEZCLA = (('EMPLEADO', 60), ('JEFE_AREA', 20), ('RH', 15), ('ADMIN', 5))
+DASHBOARDS = {
+    'ADMIN': ('dashboard_admin', 'empleados:admin_dashboard'),
+    'RH': ('dashboard_rh', 'empleados:rh_dashboard'),
+    'JEFE_AREA': ('dashboard_jefe', 'empleados:jefe_dashboard'),
+    'EMPLEADO': ('dashboard_empleado', 'empleados:empleado_dashboard'),
+}
+# Usuarios de cada rol y solicitudes pendientes que se cargan para la prueba
+LIMITE_USUARIOS = 500
+LIMITE_SOLICITUDES = 20000
+
+
+def percentil(ordenados, porcentaje):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return None
+    posicion = max(0, min(len(ordenados) - 1, round(porcentaje / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[posicion]
+
+
+def _redondear(milisegundos):
+    return None if milisegundos is None else round(milisegundos, 2)
+
+
+class Datos:
+    """
+    Usuarios y solicitudes que usan los hilos. Las solicitudes pendientes se
+    reparten con colas: cada una se aprueba una sola vez en toda la prueba.
+    Con ``particion = (indice, total)`` solo se toman las solicitudes con
+    ``id % total == indice``, para que varios procesos no aprueben las mismas.
+    """
+
+    def __init__(self, semilla, password=PASSWORD_DEFAULT, particion=None):
+        self.password = password
+        aleatorio = random.Random(semilla)
+        pendientes = SolicitudVacaciones.objects.all()
+        if particion is not None:
+            indice, total = particion
+            pendientes = pendientes.alias(resto=F('id') % total).filter(resto=indice)
+        hace_un_anio = timezone.localdate() - timedelta(days=365)
+        sinteticos = Perfil.objects.filter(activo=True, usuario__username__startswith=PREFIJO_USUARIO)
+
+        def muestra(consulta):
+            nombres = list(consulta.values_list('usuario__username', flat=True)[:LIMITE_USUARIOS * 4])
+            aleatorio.shuffle(nombres)
+            return nombres[:LIMITE_USUARIOS]
+
+        self.usuarios = {
+            # Con un año de antigüedad (vacaciones normales) y días por usar
+            'EMPLEADO': muestra(sinteticos.filter(
+                tipo_perfil='EMPLEADO', fecha_contratacion__lte=hace_un_anio,
+                dias_vacaciones_anuales__gte=F('dias_vacaciones_usados') + 5,
+            )),
+            'RH': muestra(sinteticos.filter(tipo_perfil='RH')),
+            'ADMIN': muestra(sinteticos.filter(tipo_perfil='ADMIN')),
+        }
+        # Los jefes entran para aprobar a alguien de su personal
+        pendientes_jefe = list(pendientes.filter(
+            estado='PENDIENTE_JEFE',
+            empleado__supervisor__tipo_perfil='JEFE_AREA',
+            empleado__supervisor__activo=True,
+            empleado__supervisor__usuario__username__startswith=PREFIJO_USUARIO,
+        ).values_list('id', 'empleado__supervisor__usuario__username')[:LIMITE_SOLICITUDES])
+        aleatorio.shuffle(pendientes_jefe)
+        self.pendientes_jefe = deque(pendientes_jefe)
+        self.usuarios['JEFE_AREA'] = sorted({jefe for _, jefe in pendientes_jefe})[:LIMITE_USUARIOS]
+        pendientes_rh = list(pendientes.filter(
+            estado='PENDIENTE_RH'
+        ).values_list('id', flat=True)[:LIMITE_SOLICITUDES])
+        aleatorio.shuffle(pendientes_rh)
+        self.pendientes_rh = deque(pendientes_rh)
+
+    def faltantes(self):
+        """Tipos de perfil sin usuarios para la prueba"""
+        return [tipo for tipo, _ in MEZCLA if not self.usuarios[tipo]]
+
+    def siguiente(self, cola):
+        """Siguiente elemento de ``cola`` o ``None`` si se agotó (seguro entre hilos)"""
+        try:
+            return cola.popleft()
+        except IndexError:
+            return None
+
+
+class Resultados:
+    """Mediciones de todas las peticiones, agrupadas por ruta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rutas = {}
+
+    def registrar(self, ruta, milisegundos, consultas, estado, fallo):
+        with self._lock:
+            datos = self.rutas.setdefault(ruta, {
+                'latencias': [], 'consultas': [], 'estados': Counter(), 'fallos': 0,
+            })
+            datos['estados'][str(estado)] += 1
+            if fallo:
+                # Un error (p. ej. la página de depuración del 500) no es
+                # comparable en tiempo ni en consultas: solo se cuenta
+                datos['fallos'] += 1
+            else:
+                datos['latencias'].append(milisegundos)
+                datos['consultas'].append(consultas)
+
+    def resumen(self, segundos):
+        rutas = {}
+        for ruta, datos in sorted(self.rutas.items()):
+            latencias = sorted(datos['latencias'])
+            consultas = sorted(datos['consultas'])
+            peticiones = len(latencias) + datos['fallos']
+            rutas[ruta] = {
+                'peticiones': peticiones,
+                'fallos': datos['fallos'],
+                'estados': dict(datos['estados']),
+                # Solo de las peticiones correctas; None si todas fallaron
+                'p50_ms': _redondear(percentil(latencias, 50)),
+                'p95_ms': _redondear(percentil(latencias, 95)),
+                'p99_ms': _redondear(percentil(latencias, 99)),
+                'media_ms': _redondear(statistics.fmean(latencias) if latencias else None),
+                'consultas_p50': percentil(consultas, 50),
+                'consultas_max': consultas[-1] if consultas else None,
+                'por_segundo': round(peticiones / segundos, 2),
+            }
+        total = sum(ruta['peticiones'] for ruta in rutas.values())
+        return {
+            'peticiones': total,
+            'fallos': sum(ruta['fallos'] for ruta in rutas.values()),
+            'por_segundo': round(total / segundos, 2),
+            'rutas': rutas,
+        }
+
+
+class UsuarioSimulado(threading.Thread):
+    """Un hilo que abre sesiones de un rol elegido según ``MEZCLA`` hasta que termina la prueba"""
+
+    def __init__(self, prueba, numero):
+        super().__init__(name=f'usuario-simulado-{numero}', daemon=True)
+        self.prueba = prueba
+        self.datos = prueba.datos
+        self.aleatorio = random.Random(prueba.semilla * 1000 + numero)
+        self.error = None
+
+    def run(self):
+        try:
+            tipos, pesos = zip(*((tipo, peso) for tipo, peso in MEZCLA if self.datos.usuarios[tipo]))
+            while not self.prueba.terminada():
+                tipo = self.aleatorio.choices(tipos, pesos)[0]
+                self.sesion(tipo)
+        except Exception as error:
+            # Se vuelve a lanzar en el hilo principal al terminar la prueba
+            self.error = error
+        finally:
+            connections.close_all()
+
+    def peticion(self, cliente, ruta, metodo, url, esperado, datos=None):
+        consultas = 0
+
+        def contar(execute, sql, params, many, context):
+            nonlocal consultas
+            consultas += 1
+            return execute(sql, params, many, context)
+
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(contar):
+            respuesta = getattr(cliente, metodo)(url, datos or {})
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        if self.prueba.midiendo():
+            self.prueba.resultados.registrar(
+                ruta, milisegundos, consultas, respuesta.status_code, respuesta.status_code != esperado
+            )
+        return respuesta
+
+    def sesion(self, tipo):
+        # Cliente nuevo por sesión: sin cookies de la anterior
+        cliente = Client(raise_request_exception=False, HTTP_HOST=self.prueba.host)
+        ruta_dashboard, nombre_dashboard = DASHBOARDS[tipo]
+        url_dashboard = reverse(nombre_dashboard)
+        if tipo == 'JEFE_AREA':
+            pendiente = self.datos.siguiente(self.datos.pendientes_jefe)
+            if pendiente is None:
+                # Sin solicitudes que aprobar el jefe solo revisa su dashboard
+                username = self.aleatorio.choice(self.datos.usuarios[tipo])
+            else:
+                solicitud_id, username = pendiente
+        else:
+            username = self.aleatorio.choice(self.datos.usuarios[tipo])
+
+        self.peticion(cliente, 'login', 'post', reverse('empleados:login'), 302,
+                      {'username': username, 'password': self.datos.password})
+        self.peticion(cliente, 'dashboard', 'get', reverse('empleados:dashboard'), 302)
+        self.peticion(cliente, ruta_dashboard, 'get', url_dashboard, 200)
+
+        for _ in range(self.prueba.acciones):
+            if self.prueba.terminada():
+                return
+            if tipo == 'EMPLEADO':
+                inicio = timezone.localdate() + timedelta(days=self.aleatorio.randint(14, 150))
+                if inicio.weekday() >= 5:
+                    inicio += timedelta(days=7 - inicio.weekday())
+                fin = inicio + timedelta(days=self.aleatorio.randint(0, 2))
+                self.peticion(cliente, 'solicitar_vacaciones', 'post', reverse('empleados:solicitar_vacaciones'), 302, {
+                    'fecha_inicio': inicio.isoformat(), 'fecha_fin': fin.isoformat(),
+                    'tipo': 'NORMAL', 'motivo': 'Prueba de carga',
+                })
+            elif tipo == 'JEFE_AREA':
+                if pendiente is None:
+                    return
+                self.peticion(cliente, 'aprobar_jefe', 'post',
+                              reverse('empleados:aprobar_jefe', args=[solicitud_id]), 302,
+                              {'accion': 'aprobar', 'comentario': ''})
+                pendiente = None
+            else:
+                self.peticion(cliente, 'gestion_usuarios', 'get', reverse('empleados:gestion_usuarios'), 200,
+                              {'busqueda': self.aleatorio.choice(APELLIDOS)})
+                solicitud_id = self.datos.siguiente(self.datos.pendientes_rh) if tipo == 'RH' else None
+                if solicitud_id is not None:
+                    self.peticion(cliente, 'aprobar_rh', 'post',
+                                  reverse('empleados:aprobar_rh', args=[solicitud_id]), 302,
+                                  {'accion': 'aprobar', 'comentario': ''})
+            # Después de cada operación la vista redirige al dashboard
+            self.peticion(cliente, ruta_dashboard, 'get', url_dashboard, 200)
+
+
+class PruebaCarga:
+    """
+    ``usuarios`` hilos durante ``calentamiento + duracion`` segundos; lo que
+    ocurre en el calentamiento (caches vacíos, primeras conexiones) no se mide.
+    """
+
+    def __init__(self, usuarios=8, duracion=30, calentamiento=5, acciones=3, semilla=42,
+                 password=PASSWORD_DEFAULT, particion=None):
+        self.usuarios = usuarios
+        self.duracion = duracion
+        self.calentamiento = calentamiento
+        self.acciones = acciones
+        self.semilla = semilla
+        self.datos = Datos(semilla, password, particion)
+        self.resultados = Resultados()
+        self.host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost',
+        )
+        self._inicio_medicion = self._fin = None
+
+    def midiendo(self):
+        return time.monotonic() >= self._inicio_medicion
+
+    def terminada(self):
+        return time.monotonic() >= self._fin
+
+    def ejecutar(self):
+        """Correr la prueba y devolver el resumen (el JSON de la línea base)"""
+        ahora = time.monotonic()
+        self._inicio_medicion = ahora + self.calentamiento
+        self._fin = self._inicio_medicion + self.duracion
+        hilos = [UsuarioSimulado(self, numero) for numero in range(self.usuarios)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        errores = [hilo.error for hilo in hilos if hilo.error is not None]
+        if errores:
+            raise errores[0]
+
+        resumen = self.resultados.resumen(self.duracion)
+        resumen['configuracion'] = {
+            'usuarios': self.usuarios,
+            'duracion': self.duracion,
+            'calentamiento': self.calentamiento,
+            'acciones': self.acciones,
+            'semilla': self.semilla,
+        }
+        resumen['entorno'] = entorno()
+        return resumen
+
+
+def entorno():
+    """Versiones, base de datos y tamaño del conjunto de datos de la ejecución"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'fecha': timezone.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'base_de_datos': connection.vendor,
+        'perfiles': Perfil.objects.count(),
+        'solicitudes': SolicitudVacaciones.objects.count(),
+    }
+
+
+def comparar(actual, base, tolerancia=0.2, margen_ms=5.0):
+    """
+    Regresiones de ``actual`` respecto a ``base`` como lista de mensajes:
+
+    - proporción de fallos de una ruta más de un punto por encima;
+    - p95 de una ruta más de ``tolerancia`` por encima de la base (y al menos
+      ``margen_ms``, para no marcar el ruido de rutas de pocos milisegundos);
+    - más consultas SQL en la mediana de una ruta;
+    - peticiones por segundo más de ``tolerancia`` por debajo.
+    """
+    regresiones = []
+    for ruta, medida in actual['rutas'].items():
+        anterior = base['rutas'].get(ruta)
+        if anterior is None:
+            continue
+        tasa = medida['fallos'] / medida['peticiones']
+        tasa_anterior = anterior['fallos'] / anterior['peticiones'] if anterior['peticiones'] else 0
+        if tasa > tasa_anterior + 0.01:
+            regresiones.append(f'{ruta}: fallos {tasa_anterior:.1%} → {tasa:.1%}')
+        if medida['p95_ms'] is None or anterior['p95_ms'] is None:
+            continue
+        if (medida['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia)
+                and medida['p95_ms'] - anterior['p95_ms'] >= margen_ms):
+            aumento = (medida['p95_ms'] / anterior['p95_ms'] - 1) * 100 if anterior['p95_ms'] else float('inf')
+            regresiones.append(
+                f'{ruta}: p95 {anterior["p95_ms"]:.1f} → {medida["p95_ms"]:.1f} ms (+{aumento:.0f}%)'
+            )
+        if medida['consultas_p50'] > anterior['consultas_p50']:
+            regresiones.append(
+                f'{ruta}: consultas (mediana) {anterior["consultas_p50"]} → {medida["consultas_p50"]}'
+            )
+    if actual['por_segundo'] < base['por_segundo'] * (1 - tolerancia):
+        regresiones.append(
+            f'rendimiento: {base["por_segundo"]:.1f} → {actual["por_segundo"]:.1f} peticiones/s'
+        )
+    return regresiones
@@ -0,0 +1,125 @@
+"""
+Cobertura de personal por departamento.
+
+Para una ventana de fechas calcula cuántas personas del departamento están
+ausentes cada día (vacaciones aprobadas o pendientes) y señala las
+solicitudes que dejarían la cobertura por debajo del mínimo configurado en
+``ConfiguracionSistema`` (``COBERTURA_MINIMA_PORCENTAJE``).
+
+Los intervalos se cargan con una sola consulta y se cuentan con un barrido
+de eventos ordenados (+1 al inicio, -1 el día después del fin), así que el
+costo es O(n log n + días) y no depende de recorrer cada día por solicitud.
+"""
+
+from bisect import bisect_right
+from datetime import timedelta
+from itertools import accumulate
+
+from .models import Perfil, SolicitudVacaciones, ConfiguracionSistema
+
+
+ESTADOS_APROBADOS = ['APROBADO_JEFE', 'APROBADO_RH']
+ESTADOS_PENDIENTES = ['PENDIENTE_JEFE', 'PENDIENTE_RH']
+
+COBERTURA_MINIMA_DEFAULT = 75
+
+
+class IndiceIntervalos:
+    """
+    Intervalos cerrados ``[inicio, fin]`` de fechas ordenados por inicio.
+
+    ``conteo_diario`` hace el barrido y ``solapados`` usa búsqueda binaria
+    sobre los inicios más el fin máximo acumulado para descartar prefijos
+    que ya terminaron.
+    """
+
+    def __init__(self, intervalos):
+        # intervalos: iterable de (inicio, fin, dato)
+        self.intervalos = sorted(intervalos, key=lambda intervalo: intervalo[0])
+        self.inicios = [inicio for inicio, _, _ in self.intervalos]
+        self.fin_maximo = list(accumulate((fin for _, fin, _ in self.intervalos), max))
+
+    def __len__(self):
+        return len(self.intervalos)
+
+    def solapados(self, inicio, fin):
+        """Intervalos que se cruzan con ``[inicio, fin]``"""
+        limite = bisect_right(self.inicios, fin)
+        # Primer índice cuyo fin acumulado alcanza ``inicio``
+        primero = bisect_right(self.fin_maximo, inicio - timedelta(days=1), 0, limite)
+        return [
+            intervalo for intervalo in self.intervalos[primero:limite]
+            if intervalo[1] >= inicio
+        ]
+
+    def conteo_diario(self, inicio, fin):
+        """Lista con el número de intervalos activos en cada día de la ventana"""
+        dias = (fin - inicio).days + 1
+        diferencias = [0] * (dias + 1)
+        for desde, hasta, _ in self.solapados(inicio, fin):
+            diferencias[max((desde - inicio).days, 0)] += 1
+            diferencias[min((hasta - inicio).days, dias - 1) + 1] -= 1
+        return list(accumulate(diferencias[:dias]))
+
+
+def cobertura_minima():
+    """Porcentaje mínimo de personal presente configurado en el sistema"""
+    return ConfiguracionSistema.obtener_int('COBERTURA_MINIMA_PORCENTAJE', COBERTURA_MINIMA_DEFAULT)
+
+
+def cobertura_departamento(departamento, inicio, fin, incluir_pendientes=True, umbral=None):
+    """
+    Cobertura de ``departamento`` entre ``inicio`` y ``fin`` (inclusive).
+
+    Devuelve un diccionario con la plantilla activa, la serie diaria
+    ``[(fecha, ausentes, porcentaje_presente)]``, los días bajo el umbral y
+    los ids de solicitudes pendientes que, sumadas a lo ya aprobado, dejan
+    algún día bajo el umbral.
+    """
+    umbral = cobertura_minima() if umbral is None else umbral
+    plantilla = Perfil.objects.filter(departamento=departamento, activo=True).count()
+
+    estados = ESTADOS_APROBADOS + (ESTADOS_PENDIENTES if incluir_pendientes else [])
+    filas = SolicitudVacaciones.objects.filter(
+        empleado__departamento=departamento,
+        estado__in=estados,
+        fecha_inicio__lte=fin,
+        fecha_fin__gte=inicio,
+    ).values_list('fecha_inicio', 'fecha_fin', 'id', 'estado')
+
+    todos = IndiceIntervalos((desde, hasta, (pk, estado)) for desde, hasta, pk, estado in filas)
+    aprobados = IndiceIntervalos(
+        intervalo for intervalo in todos.intervalos if intervalo[2][1] in ESTADOS_APROBADOS
+    )
+    ausentes_aprobados = aprobados.conteo_diario(inicio, fin)
+
+    def porcentaje_presente(ausentes):
+        if not plantilla:
+            return 100.0
+        return round(100.0 * (plantilla - ausentes) / plantilla, 1)
+
+    serie = []
+    for desplazamiento, ausentes in enumerate(todos.conteo_diario(inicio, fin)):
+        serie.append((inicio + timedelta(days=desplazamiento), ausentes, porcentaje_presente(ausentes)))
+
+    # Una pendiente se marca si, junto con lo aprobado, algún día de su
+    # periodo queda bajo el umbral
+    solicitudes_en_riesgo = []
+    for desde, hasta, (pk, estado) in todos.intervalos:
+        if estado in ESTADOS_APROBADOS:
+            continue
+        primero = max((desde - inicio).days, 0)
+        ultimo = min((hasta - inicio).days, len(serie) - 1)
+        if primero > ultimo:
+            continue
+        peor = max(ausentes_aprobados[primero:ultimo + 1]) + 1
+        if porcentaje_presente(peor) < umbral:
+            solicitudes_en_riesgo.append(pk)
+
+    return {
+        'plantilla': plantilla,
+        'umbral': umbral,
+        'serie': serie,
+        'dias_bajo_umbral': [dia for dia in serie if dia[2] < umbral],
+        'solicitudes_en_riesgo': solicitudes_en_riesgo,
+    }
@@ -0,0 +1,9 @@
+from .fragmentos import Navegacion
+
+
+def navegacion(request):
+    """Grupos del usuario para el menú de ``base.html`` (cacheados, ver empleados.fragmentos)"""
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        return {}
+    return {'navegacion': Navegacion(usuario)}
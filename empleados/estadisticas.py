@@ -0,0 +1,97 @@
+"""
+Estadísticas de los dashboards.
+
+Cada tabla se consulta una sola vez con ``aggregate()`` y un
+``Count(..., filter=Q(...))`` por métrica. Los filtros de "este mes" usan
+rangos semiabiertos ``[inicio, fin)`` en la zona horaria local, que además
+de poder usar índices no mezclan el mismo mes de años distintos.
+"""
+
+from datetime import datetime
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Perfil, Departamento, SolicitudVacaciones
+
+
+ESTADOS_PENDIENTES = ['PENDIENTE_JEFE', 'PENDIENTE_RH']
+
+
+def rango_mes_actual():
+    """``(inicio, fin)`` del mes en curso como datetimes con zona horaria"""
+    hoy = timezone.localdate()
+    inicio = datetime(hoy.year, hoy.month, 1)
+    if hoy.month == 12:
+        fin = datetime(hoy.year + 1, 1, 1)
+    else:
+        fin = datetime(hoy.year, hoy.month + 1, 1)
+    return timezone.make_aware(inicio), timezone.make_aware(fin)
+
+
+def _en_rango(campo, rango):
+    inicio, fin = rango
+    return Q(**{f'{campo}__gte': inicio, f'{campo}__lt': fin})
+
+
+def estadisticas_admin():
+    """Estadísticas generales: una consulta por tabla"""
+    mes = rango_mes_actual()
+    # El filtro previo acota la agregación a filas alcanzables por índice
+    stats = SolicitudVacaciones.objects.filter(
+        Q(estado__in=ESTADOS_PENDIENTES) | _en_rango('fecha_solicitud', mes)
+    ).aggregate(
+        solicitudes_pendientes=Count('id', filter=Q(estado__in=ESTADOS_PENDIENTES)),
+        solicitudes_este_mes=Count('id', filter=_en_rango('fecha_solicitud', mes)),
+    )
+    stats['total_empleados'] = Perfil.objects.filter(activo=True).count()
+    stats['total_departamentos'] = Departamento.objects.filter(activo=True).count()
+    return stats
+
+
+def estadisticas_rh():
+    """Estadísticas de RH en una sola consulta"""
+    mes = rango_mes_actual()
+    return SolicitudVacaciones.objects.filter(
+        Q(estado='PENDIENTE_RH') |
+        Q(estado__in=['APROBADO_RH', 'RECHAZADO_RH']) & _en_rango('fecha_aprobacion_rh', mes)
+    ).aggregate(
+        solicitudes_pendientes=Count('id', filter=Q(estado='PENDIENTE_RH')),
+        aprobadas_este_mes=Count(
+            'id', filter=Q(estado='APROBADO_RH') & _en_rango('fecha_aprobacion_rh', mes)
+        ),
+        rechazadas_este_mes=Count(
+            'id', filter=Q(estado='RECHAZADO_RH') & _en_rango('fecha_aprobacion_rh', mes)
+        ),
+    )
+
+
+def estadisticas_jefe(jefe):
+    """
+    Estadísticas del personal a cargo del jefe (ver ``Perfil.filtro_a_cargo``):
+    una consulta de solicitudes y una de perfiles
+    """
+    mes = rango_mes_actual()
+    stats = SolicitudVacaciones.objects.filter(
+        jefe.filtro_a_cargo('empleado__')
+    ).aggregate(
+        solicitudes_pendientes=Count('id', filter=Q(estado='PENDIENTE_JEFE')),
+        aprobadas_este_mes=Count(
+            'id', filter=Q(estado='APROBADO_JEFE') & _en_rango('fecha_aprobacion_jefe', mes)
+        ),
+    )
+    stats['empleados_departamento'] = Perfil.objects.filter(
+        jefe.filtro_a_cargo(), activo=True
+    ).count()
+    return stats
+
+
+def estadisticas_empleado(perfil):
+    """Estadísticas personales en una sola consulta"""
+    stats = SolicitudVacaciones.objects.filter(empleado=perfil).aggregate(
+        solicitudes_pendientes=Count('id', filter=Q(estado__in=ESTADOS_PENDIENTES)),
+        solicitudes_aprobadas=Count('id', filter=Q(estado='APROBADO_RH')),
+    )
+    stats['dias_disponibles'] = perfil.dias_vacaciones_disponibles
+    stats['dias_usados'] = perfil.dias_vacaciones_usados
+    return stats
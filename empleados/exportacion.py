@@ -0,0 +1,104 @@
+"""
+Exportación en streaming del directorio de empleados (CSV/XLSX).
+
+Las filas se proyectan con ``values_list`` y se recorren con
+``iterator(chunk_size=...)``, de modo que la memoria del worker no crece con
+el número de empleados exportados. En PostgreSQL ``iterator`` usa un cursor
+del lado del servidor (salvo ``DISABLE_SERVER_SIDE_CURSORS``); sin él psycopg
+recibe el resultado completo antes de entregar la primera fila.
+"""
+
+import csv
+import tempfile
+
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+
+from .models import Perfil
+
+
+TAMANO_CHUNK = 2000
+
+# (campo ORM, encabezado)
+COLUMNAS_DIRECTORIO = [
+    ('numero_empleado', 'Número de Empleado'),
+    ('usuario__username', 'Usuario'),
+    ('usuario__first_name', 'Nombre'),
+    ('usuario__last_name', 'Apellidos'),
+    ('usuario__email', 'Correo'),
+    ('tipo_perfil', 'Tipo de Perfil'),
+    ('departamento__nombre', 'Departamento'),
+    ('puesto', 'Puesto'),
+    ('fecha_contratacion', 'Fecha de Contratación'),
+    ('supervisor__numero_empleado', 'Supervisor'),
+    ('telefono', 'Teléfono'),
+    ('dias_vacaciones_anuales', 'Días Anuales'),
+    ('dias_vacaciones_usados', 'Días Usados'),
+]
+
+
+class _Eco:
+    """Pseudo-archivo que devuelve lo escrito, para usar ``csv.writer`` en streaming"""
+
+    def write(self, valor):
+        return valor
+
+
+def filas_directorio(perfiles):
+    """Generador de tuplas listas para escribir, una por perfil"""
+    campos = [campo for campo, _ in COLUMNAS_DIRECTORIO]
+    indice_tipo = campos.index('tipo_perfil')
+    tipos = dict(Perfil.TIPOS_PERFIL)
+    for fila in perfiles.values_list(*campos).iterator(chunk_size=TAMANO_CHUNK):
+        fila = list(fila)
+        fila[indice_tipo] = tipos.get(fila[indice_tipo], fila[indice_tipo])
+        yield ['' if valor is None else valor for valor in fila]
+
+
+def _nombre_archivo(extension):
+    return f"directorio_empleados_{timezone.localdate():%Y%m%d}.{extension}"
+
+
+def exportar_csv(perfiles):
+    """Respuesta CSV en streaming para un queryset de ``Perfil``"""
+    escritor = csv.writer(_Eco())
+    # La base se fija ahora: el generador corre cuando el middleware ya
+    # terminó (ver empleados.replicas)
+    perfiles = perfiles.using(perfiles.db)
+
+    def generar():
+        # BOM para que Excel detecte UTF-8
+        yield '\ufeff' + escritor.writerow([encabezado for _, encabezado in COLUMNAS_DIRECTORIO])
+        for fila in filas_directorio(perfiles):
+            yield escritor.writerow(fila)
+
+    response = StreamingHttpResponse(generar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{_nombre_archivo("csv")}"'
+    return response
+
+
+def exportar_xlsx(perfiles):
+    """
+    Respuesta XLSX para un queryset de ``Perfil``.
+
+    El formato XLSX es un ZIP y no puede emitirse por partes, así que se usa
+    el modo ``write_only`` de openpyxl (que escribe las filas a disco) sobre
+    un archivo temporal y se envía con ``FileResponse``.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Empleados')
+    hoja.append([encabezado for _, encabezado in COLUMNAS_DIRECTORIO])
+    for fila in filas_directorio(perfiles):
+        hoja.append(fila)
+
+    temporal = tempfile.TemporaryFile()
+    libro.save(temporal)
+    temporal.seek(0)
+    return FileResponse(
+        temporal,
+        as_attachment=True,
+        filename=_nombre_archivo('xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -3,6 +3,9 @@ from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.utils import timezone
 from .models import Perfil, Departamento, SolicitudVacaciones
+from .importacion import TAMANO_LOTE_DEFAULT
+from .calendario import dias_habiles, MASCARA_DEFAULT
+from .autocompletar import AutocompletarSelect, supervisores, departamentos
 
 
 class UsuarioConPerfilForm(UserCreationForm):
@@ -22,7 +25,8 @@ class UsuarioConPerfilForm(UserCreationForm):
     # Campos de perfil
     tipo_perfil = forms.ChoiceField(choices=TIPOS_PERFIL, label='Tipo de Perfil')
     departamento = forms.ModelChoiceField(
-        queryset=Departamento.objects.filter(activo=True),
+        queryset=departamentos(),
+        widget=AutocompletarSelect('departamentos'),
         label='Departamento',
         required=False
     )
@@ -40,7 +44,8 @@ class UsuarioConPerfilForm(UserCreationForm):
         help_text='Salario mensual'
     )
     supervisor = forms.ModelChoiceField(
-        queryset=Perfil.objects.filter(activo=True, tipo_perfil__in=['JEFE_AREA', 'ADMIN']),
+        queryset=supervisores(),
+        widget=AutocompletarSelect('supervisores'),
         label='Supervisor',
         required=False
     )
@@ -95,20 +100,19 @@ class UsuarioConPerfilForm(UserCreationForm):
         if commit:
             user.save()
             
-            # Crear perfil
-            perfil = Perfil.objects.create(
-                usuario=user,
-                tipo_perfil=self.cleaned_data['tipo_perfil'],
-                departamento=self.cleaned_data.get('departamento'),
-                fecha_contratacion=self.cleaned_data['fecha_contratacion'],
-                numero_empleado=self.cleaned_data['numero_empleado'],
-                puesto=self.cleaned_data['puesto'],
-                salario=self.cleaned_data['salario'],
-                supervisor=self.cleaned_data.get('supervisor'),
-                telefono=self.cleaned_data.get('telefono', ''),
-                direccion=self.cleaned_data.get('direccion', ''),
-                fecha_nacimiento=self.cleaned_data.get('fecha_nacimiento')
-            )
+            # Completar el perfil que crea la señal crear_perfil_usuario
+            Perfil.objects.update_or_create(usuario=user, defaults={
+                'tipo_perfil': self.cleaned_data['tipo_perfil'],
+                'departamento': self.cleaned_data.get('departamento'),
+                'fecha_contratacion': self.cleaned_data['fecha_contratacion'],
+                'numero_empleado': self.cleaned_data['numero_empleado'],
+                'puesto': self.cleaned_data['puesto'],
+                'salario': self.cleaned_data['salario'],
+                'supervisor': self.cleaned_data.get('supervisor'),
+                'telefono': self.cleaned_data.get('telefono', ''),
+                'direccion': self.cleaned_data.get('direccion', ''),
+                'fecha_nacimiento': self.cleaned_data.get('fecha_nacimiento'),
+            })
         
         return user
 
@@ -158,8 +162,14 @@ class SolicitudVacacionesForm(forms.ModelForm):
             if fecha_inicio < hoy:
                 raise forms.ValidationError('No puedes solicitar vacaciones para fechas pasadas.')
             
-            # Calcular días solicitados
-            dias_solicitados = (fecha_fin - fecha_inicio).days + 1
+            # Calcular días solicitados (sin fines de semana ni festivos)
+            departamento = self.empleado.departamento if self.empleado else None
+            dias_solicitados = dias_habiles(
+                fecha_inicio, fecha_fin,
+                departamento.dias_laborables if departamento else MASCARA_DEFAULT
+            )
+            if dias_solicitados == 0:
+                raise forms.ValidationError('El periodo seleccionado no incluye días hábiles.')
             
             # Validar días disponibles
             if self.empleado and dias_solicitados > self.empleado.dias_vacaciones_disponibles:
@@ -235,20 +245,39 @@ class ConfigurarDepartamentoForm(forms.ModelForm):
     
     class Meta:
         model = Departamento
-        fields = ['nombre', 'descripcion', 'jefe']
+        fields = ['nombre', 'descripcion', 'jefe', 'dias_laborables']
         widgets = {
             'descripcion': forms.Textarea(attrs={'rows': 3}),
+            'jefe': AutocompletarSelect('supervisores'),
         }
         labels = {
             'nombre': 'Nombre del Departamento',
             'descripcion': 'Descripción',
             'jefe': 'Jefe de Departamento',
+            'dias_laborables': 'Días Laborables',
         }
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Solo mostrar jefes de área como opciones para jefe de departamento
-        self.fields['jefe'].queryset = Perfil.objects.filter(
-            activo=True, 
-            tipo_perfil__in=['JEFE_AREA', 'ADMIN']
-        )
+        self.fields['jefe'].queryset = supervisores()
+
+
+class ImportarEmpleadosForm(forms.Form):
+    """Formulario para importar empleados de forma masiva"""
+    archivo = forms.FileField(
+        label='Archivo CSV o XLSX',
+        help_text='Una fila por empleado; la primera fila contiene los nombres de columna'
+    )
+    tamano_lote = forms.IntegerField(
+        label='Filas por lote',
+        initial=TAMANO_LOTE_DEFAULT,
+        min_value=1,
+        max_value=10000
+    )
+    
+    def clean_archivo(self):
+        archivo = self.cleaned_data.get('archivo')
+        if archivo and not archivo.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Solo se aceptan archivos .csv o .xlsx.')
+        return archivo
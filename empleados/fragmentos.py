@@ -0,0 +1,141 @@
+"""
+Fragmentos de plantilla cacheados: menú de navegación y paneles de
+estadísticas de los dashboards.
+
+El menú de ``base.html`` depende solo de los grupos del usuario, así que se
+cachea con ``{% cache %}`` bajo la lista de grupos; los nombres de grupo del
+usuario también se guardan en cache para no consultarlos en cada página.
+Los paneles de estadísticas se cachean por rol y ámbito (uno para todos
+los usuarios de RH y otro para todos los administradores; los jefes uno por
+departamento, o por jefe cuando el alcance incluye subordinados). Las estadísticas se calculan solo si el fragmento no
+está en cache.
+
+Las claves incluyen una versión que cambia con cada modificación de grupos
+(``NAVEGACION_VERSION_KEY``) o de perfiles y solicitudes
+(``ESTADISTICAS_VERSION_KEY``); ver los receivers en models.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.functional import cached_property
+
+from . import estadisticas, metricas
+from .models import ESTADISTICAS_VERSION_KEY, NAVEGACION_VERSION_KEY
+
+
+def segundos_cache():
+    """Duración de los fragmentos; 0 desactiva el cache"""
+    return settings.RH_CONFIG.get('FRAGMENTOS_CACHE_SEGUNDOS', 300)
+
+
+def grupos_usuario(usuario):
+    """Nombres de los grupos de ``usuario`` ordenados, desde cache si se puede"""
+    segundos = segundos_cache()
+    if not segundos:
+        return sorted(usuario.groups.values_list('name', flat=True))
+    version = cache.get_or_set(NAVEGACION_VERSION_KEY, 1, None)
+    clave = f'navegacion:{version}:grupos:{usuario.pk}'
+    grupos = cache.get(clave)
+    metricas.registrar_cache('grupos', grupos is not None)
+    if grupos is None:
+        grupos = sorted(usuario.groups.values_list('name', flat=True))
+        cache.set(clave, grupos, segundos)
+    return grupos
+
+
+class Navegacion:
+    """Datos del menú para ``base.html``; se evalúan al usarse en la plantilla"""
+
+    def __init__(self, usuario):
+        self.usuario = usuario
+        self.segundos = segundos_cache()
+
+    @cached_property
+    def grupos(self):
+        return grupos_usuario(self.usuario)
+
+    @cached_property
+    def clave(self):
+        version = cache.get_or_set(NAVEGACION_VERSION_KEY, 1, None) if self.segundos else 0
+        return f'{version}:{",".join(self.grupos)}'
+
+
+# Tarjetas de cada panel: (clave en las estadísticas, título, icono)
+TARJETAS = {
+    'admin': [
+        ('total_empleados', 'Empleados activos', 'fa-users'),
+        ('total_departamentos', 'Departamentos', 'fa-building'),
+        ('solicitudes_pendientes', 'Solicitudes pendientes', 'fa-hourglass-half'),
+        ('solicitudes_este_mes', 'Solicitudes este mes', 'fa-calendar-alt'),
+    ],
+    'rh': [
+        ('solicitudes_pendientes', 'Pendientes de RH', 'fa-hourglass-half'),
+        ('aprobadas_este_mes', 'Aprobadas este mes', 'fa-check-circle'),
+        ('rechazadas_este_mes', 'Rechazadas este mes', 'fa-times-circle'),
+    ],
+    'jefe': [
+        ('empleados_departamento', 'Personal a cargo', 'fa-users'),
+        ('solicitudes_pendientes', 'Pendientes de aprobar', 'fa-hourglass-half'),
+        ('aprobadas_este_mes', 'Aprobadas este mes', 'fa-check-circle'),
+    ],
+    'empleado': [
+        ('dias_disponibles', 'Días disponibles', 'fa-umbrella-beach'),
+        ('dias_usados', 'Días usados', 'fa-calendar-check'),
+        ('solicitudes_pendientes', 'Solicitudes pendientes', 'fa-hourglass-half'),
+        ('solicitudes_aprobadas', 'Solicitudes aprobadas', 'fa-check-circle'),
+    ],
+}
+
+
+class PanelEstadisticas:
+    """
+    Panel de tarjetas de un dashboard. ``clave`` es ``None`` cuando el panel
+    no se comparte entre usuarios (el del empleado) y no se cachea.
+    """
+
+    def __init__(self, rol, calcular, ambito=None):
+        self.rol = rol
+        self._calcular = calcular
+        self.segundos = segundos_cache()
+        self.clave = None
+        if ambito is not None and self.segundos:
+            version = cache.get_or_set(ESTADISTICAS_VERSION_KEY, 1, None)
+            self.clave = f'{version}:{rol}:{ambito}'
+
+    @cached_property
+    def stats(self):
+        return self._calcular()
+
+    def en_cache(self):
+        """
+        Si el fragmento ya está en cache y la plantilla no pedirá ``stats``.
+        Las vistas async lo usan para calcular las estadísticas de antemano,
+        a la vez que las demás consultas, solo cuando hacen falta.
+        """
+        if self.clave is None:
+            return False
+        return cache.has_key(make_template_fragment_key('panel_estadisticas', [self.clave]))
+
+    @property
+    def tarjetas(self):
+        return [
+            {'titulo': titulo, 'icono': icono, 'valor': self.stats[campo]}
+            for campo, titulo, icono in TARJETAS[self.rol]
+        ]
+
+
+def panel_estadisticas(rol, perfil=None):
+    """``PanelEstadisticas`` del dashboard de ``rol`` para ``perfil``"""
+    if rol == 'admin':
+        return PanelEstadisticas(rol, estadisticas.estadisticas_admin, 'todo')
+    if rol == 'rh':
+        return PanelEstadisticas(rol, estadisticas.estadisticas_rh, 'todo')
+    if rol == 'jefe':
+        # Con alcance por departamento todos los jefes del departamento ven lo mismo
+        if settings.RH_CONFIG.get('ALCANCE_JEFE', 'ambos') == 'departamento':
+            ambito = f'd{perfil.departamento_id}'
+        else:
+            ambito = f'p{perfil.pk}'
+        return PanelEstadisticas(rol, lambda: estadisticas.estadisticas_jefe(perfil), ambito)
+    return PanelEstadisticas(rol, lambda: estadisticas.estadisticas_empleado(perfil))
@@ -0,0 +1,544 @@
+"""
+Generación de datos sintéticos a escala de producción para pruebas de carga.
+
+Crea departamentos, usuarios con perfil y solicitudes de vacaciones con
+distribuciones parecidas a las reales: departamentos de tamaño desigual,
+una jerarquía de directores, jefes de departamento, jefes de equipo y
+empleados, antigüedades sesgadas hacia contrataciones recientes y estados
+de solicitud según la fecha (el pasado ya está resuelto, lo próximo sigue
+pendiente). Con la misma semilla y la misma base de datos inicial el
+resultado es el mismo.
+
+Todo se escribe con ``bulk_create`` en lotes de ``tamano_lote`` filas, una
+transacción por lote. Como ``bulk_create`` no pasa por ``save()`` ni envía
+señales, aquí se calculan ``texto_busqueda``, ``dias_solicitados`` (con
+``calendario.dias_habiles_lote``) y el saldo de días usados, y al final se
+reconstruye la jerarquía y se invalidan los caches. Las solicitudes
+aprobadas del año en curso se registran en el libro de movimientos igual
+que las aprueba RH; no se generan notificaciones (serían correos por enviar).
+"""
+
+import random
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, time as hora, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .busqueda import texto_busqueda
+from .calendario import dias_habiles, dias_habiles_lote, MASCARA_DEFAULT
+from .models import (
+    Perfil, Departamento, SolicitudVacaciones, MovimientoVacaciones,
+    invalidar_estadisticas, incrementar_version, DEPARTAMENTOS_VERSION_KEY, NAVEGACION_VERSION_KEY,
+)
+
+
+TAMANO_LOTE_DEFAULT = 10000
+PASSWORD_DEFAULT = 'carga-rh-2024'
+PREFIJO_NUMERO = 'S'  # numero_empleado de los perfiles generados: S0000001...
+PREFIJO_USUARIO = 'sintetico'
+
+NOMBRES = [
+    'Ana', 'Carlos', 'María', 'Luis', 'Laura', 'José', 'Guadalupe', 'Juan', 'Fernanda', 'Miguel',
+    'Sofía', 'Alejandro', 'Valeria', 'Jorge', 'Daniela', 'Ricardo', 'Gabriela', 'Francisco',
+    'Mariana', 'Eduardo', 'Paola', 'Roberto', 'Andrea', 'Arturo', 'Claudia', 'Héctor', 'Lucía',
+    'Raúl', 'Patricia', 'Sergio', 'Verónica', 'Javier', 'Adriana', 'Óscar', 'Mónica', 'Iván',
+]
+APELLIDOS = [
+    'García', 'Hernández', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+    'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Jiménez', 'Reyes', 'Díaz',
+    'Torres', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Ortiz', 'Moreno', 'Castillo', 'Romero',
+    'Álvarez', 'Méndez', 'Chávez', 'Rivera', 'Juárez', 'Ramos', 'Domínguez', 'Herrera', 'Medina',
+    'Castro', 'Vargas', 'Guzmán', 'Velázquez', 'Muñoz', 'Rojas', 'Núñez', 'Salazar', 'Ibarra',
+]
+AREAS = [
+    'Tecnología', 'Ventas', 'Finanzas', 'Operaciones', 'Logística', 'Compras', 'Jurídico',
+    'Marketing', 'Atención a Clientes', 'Producción', 'Calidad', 'Mantenimiento', 'Auditoría',
+    'Seguridad', 'Almacén', 'Proyectos', 'Contabilidad', 'Soporte Técnico',
+]
+SEDES = ['Norte', 'Sur', 'Centro', 'Occidente', 'Bajío', 'Sureste', 'Noreste', 'Pacífico']
+PUESTOS = {
+    'ADMIN': ['Director General', 'Director de Operaciones', 'Director de Finanzas'],
+    'RH': ['Analista de RH', 'Especialista en Nómina', 'Reclutador', 'Generalista de RH'],
+    'JEFE_DEPARTAMENTO': ['Gerente', 'Gerente de Área'],
+    'JEFE_EQUIPO': ['Jefe de Equipo', 'Coordinador', 'Supervisor'],
+    'EMPLEADO': ['Analista', 'Auxiliar', 'Asistente', 'Especialista', 'Técnico', 'Ejecutivo',
+                 'Desarrollador', 'Operador', 'Consultor'],
+}
+SALARIO_BASE = {
+    'ADMIN': 95000, 'RH': 21000, 'JEFE_DEPARTAMENTO': 48000, 'JEFE_EQUIPO': 29000, 'EMPLEADO': 15000,
+}
+MOTIVOS = [
+    'Vacaciones familiares', 'Descanso personal', 'Viaje', 'Asuntos personales',
+    'Boda de un familiar', 'Mudanza', 'Trámites personales', 'Celebración familiar',
+]
+COMENTARIOS_RECHAZO = [
+    'Periodo de alta carga de trabajo', 'Falta de cobertura en el área',
+    'Se traslapa con otras ausencias del equipo', 'Solicitar con más anticipación',
+]
+
+
+def _tabla(opciones):
+    """``[(valor, peso), ...]`` → ``(valores, pesos acumulados)`` para ``choices``"""
+    valores, pesos = zip(*opciones)
+    return valores, list(accumulate(pesos))
+
+
+# Semana laboral de los departamentos
+SEMANAS_LABORALES = _tabla([('1111100', 85), ('1111110', 12), ('1111111', 3)])
+# Días naturales de cada solicitud: (mínimo, máximo)
+DURACIONES = _tabla([((1, 3), 40), ((4, 7), 35), ((8, 14), 20), ((15, 21), 5)])
+# Estado según si la solicitud ya empezó
+ESTADOS_PASADO = _tabla([('APROBADO_RH', 78), ('RECHAZADO_JEFE', 7), ('RECHAZADO_RH', 4), ('CANCELADO', 11)])
+ESTADOS_FUTURO = _tabla([
+    ('PENDIENTE_JEFE', 35), ('PENDIENTE_RH', 20), ('APROBADO_RH', 35),
+    ('RECHAZADO_JEFE', 4), ('RECHAZADO_RH', 2), ('CANCELADO', 4),
+])
+TIPOS_SOLICITUD = _tabla([('NORMAL', 90), ('EXTRAORDINARIA', 7), ('EMERGENCIA', 3)])
+GRUPOS = {'RH': 'RH', 'JEFE_AREA': 'JEFES', 'EMPLEADO': 'EMPLEADOS'}
+
+ANIOS_HISTORIA = 3
+DIAS_FUTURO = 120
+
+
+def dias_por_antiguedad(anios):
+    """Días de vacaciones anuales por años cumplidos (LFT art. 76, reforma 2023)"""
+    if anios < 1:
+        return 12
+    if anios <= 5:
+        return 10 + 2 * anios
+    return 20 + 2 * ((anios - 1) // 5)
+
+
+@contextmanager
+def fechas_manuales(*campos):
+    """
+    Desactivar ``auto_now_add`` de ``campos`` para insertar fechas
+    históricas con ``bulk_create`` (que, si no, pone la fecha actual).
+    """
+    originales = [(campo, campo.auto_now_add) for campo in campos]
+    for campo, _ in originales:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, valor in originales:
+            campo.auto_now_add = valor
+
+
+class ResultadoGeneracion:
+    """Filas creadas y tiempo por etapa"""
+
+    def __init__(self):
+        self.creadas = {}
+        self.segundos = {}
+
+    def registrar(self, etapa, filas, segundos):
+        self.creadas[etapa] = self.creadas.get(etapa, 0) + filas
+        self.segundos[etapa] = self.segundos.get(etapa, 0.0) + segundos
+
+    @property
+    def segundos_totales(self):
+        return sum(self.segundos.values())
+
+    def __str__(self):
+        lineas = []
+        for etapa, filas in self.creadas.items():
+            segundos = self.segundos[etapa]
+            if segundos:
+                lineas.append(f'  {etapa:<14} {filas:>9} filas en {segundos:7.1f}s ({filas / segundos:,.0f} filas/s)')
+            else:
+                lineas.append(f'  {etapa:<14} {filas:>9} filas')
+        lineas.append(f'  Total: {self.segundos_totales:.1f}s')
+        return '\n'.join(lineas)
+
+
+class GeneradorDatos:
+    """
+    Genera ``empleados`` perfiles y ``solicitudes`` solicitudes de vacaciones.
+
+    La estructura se decide primero en memoria (solo índices y tipos) y se
+    escribe por niveles de la jerarquía, de modo que cada perfil conoce el
+    id de su supervisor al insertarse.
+    """
+
+    def __init__(self, empleados, solicitudes, semilla=42, tamano_lote=TAMANO_LOTE_DEFAULT,
+                 password=PASSWORD_DEFAULT, progreso=None):
+        self.total_empleados = empleados
+        self.total_solicitudes = solicitudes
+        self.aleatorio = random.Random(semilla)
+        self.tamano_lote = tamano_lote
+        self.password = password
+        self.progreso = progreso or (lambda mensaje: None)
+        self.resultado = ResultadoGeneracion()
+        self.hoy = timezone.localdate()
+        self.ahora = timezone.now()
+        self.zona = timezone.get_current_timezone()
+
+    def generar(self):
+        with self._cache_paginas():
+            departamentos = self._crear_departamentos()
+            perfiles = self._crear_perfiles(departamentos)
+            inicio = time.perf_counter()
+            Perfil.objects.reconstruir_jerarquia(self.tamano_lote)
+            self.resultado.registrar('jerarquía', len(perfiles), time.perf_counter() - inicio)
+            if self.total_solicitudes:
+                self._crear_solicitudes(perfiles, departamentos)
+        invalidar_estadisticas()
+        incrementar_version(DEPARTAMENTOS_VERSION_KEY)
+        incrementar_version(NAVEGACION_VERSION_KEY)
+        return self.resultado
+
+    @contextmanager
+    def _cache_paginas(self):
+        """
+        En SQLite, subir el cache de páginas de la conexión a 256 MB mientras
+        se genera: los índices por empleado reciben inserciones en orden
+        aleatorio y con el cache por omisión (2 MB) cada lote relee páginas
+        del disco.
+        """
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            anterior = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size = -262144')
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA cache_size = {int(anterior)}')
+
+    def _elegir(self, tabla):
+        """Elegir un valor de una tabla de ``_tabla()``"""
+        valores, acumulados = tabla
+        return self.aleatorio.choices(valores, cum_weights=acumulados)[0]
+
+    # --- Departamentos ---
+
+    def _crear_departamentos(self):
+        """Lista de ``(pk, máscara, peso)``; el primero es Recursos Humanos"""
+        inicio = time.perf_counter()
+        cantidad = max(3, min(500, self.total_empleados // 200))
+        existentes = set(Departamento.objects.values_list('nombre', flat=True))
+        nombres = []
+        candidatos = (
+            f'{area} {sede}' if vuelta == 0 else f'{area} {sede} {vuelta + 1}'
+            for vuelta in range(10 ** 6) for sede in SEDES for area in AREAS
+        )
+        rh = 'Recursos Humanos'
+        numero = 2
+        while rh in existentes:
+            rh = f'Recursos Humanos {numero}'
+            numero += 1
+        nombres.append(rh)
+        for nombre in candidatos:
+            if len(nombres) == cantidad:
+                break
+            if nombre not in existentes:
+                nombres.append(nombre)
+
+        creados = Departamento.objects.bulk_create([
+            Departamento(
+                nombre=nombre,
+                descripcion='Departamento generado para pruebas de carga',
+                dias_laborables='1111100' if indice == 0 else self._elegir(SEMANAS_LABORALES),
+            )
+            for indice, nombre in enumerate(nombres)
+        ])
+        # Tamaños desiguales: unos pocos departamentos concentran a la mayoría
+        departamentos = [
+            (departamento.pk, departamento.dias_laborables, self.aleatorio.lognormvariate(0, 0.9))
+            for departamento in creados
+        ]
+        self.resultado.registrar('departamentos', len(creados), time.perf_counter() - inicio)
+        return departamentos
+
+    # --- Perfiles ---
+
+    def _estructura(self, departamentos):
+        """
+        Niveles de la jerarquía (directores; jefes de departamento; personal
+        de RH y jefes de equipo; empleados) como listas de ``(rol,
+        departamento, supervisor)``. ``departamento`` es un índice de
+        ``departamentos`` y ``supervisor`` la posición del supervisor en los
+        niveles concatenados, siempre en un nivel anterior. También devuelve
+        ``{departamento: posición de su jefe}``.
+        """
+        aleatorio = self.aleatorio
+        directores = max(1, self.total_empleados // 5000)
+        personal_rh = max(1, self.total_empleados // 250)
+        otros = range(1, len(departamentos))
+
+        niveles = [[('ADMIN', None, None)] * directores, [], [], []]
+        jefes = {}
+        for departamento in range(len(departamentos)):
+            jefes[departamento] = directores + departamento
+            rol = 'RH' if departamento == 0 else 'JEFE_DEPARTAMENTO'
+            niveles[1].append((rol, departamento, aleatorio.randrange(directores)))
+        niveles[2] = [('RH', 0, jefes[0])] * personal_rh
+
+        inicio_nivel_2 = directores + len(niveles[1])
+        restantes = self.total_empleados - inicio_nivel_2 - personal_rh
+        pesos = [departamentos[indice][2] for indice in otros]
+        tamanos = Counter(aleatorio.choices(otros, pesos, k=max(0, restantes)))
+        equipos = {}
+        for departamento in otros:
+            cantidad = tamanos[departamento] // 12 if tamanos[departamento] > 15 else 0
+            desde = inicio_nivel_2 + len(niveles[2])
+            equipos[departamento] = range(desde, desde + cantidad)
+            niveles[2].extend([('JEFE_EQUIPO', departamento, jefes[departamento])] * cantidad)
+        for departamento in otros:
+            for _ in range(tamanos[departamento] - len(equipos[departamento])):
+                supervisor = (aleatorio.choice(equipos[departamento]) if equipos[departamento]
+                              else jefes[departamento])
+                niveles[3].append(('EMPLEADO', departamento, supervisor))
+        # Los ids de un mismo departamento no quedan contiguos
+        aleatorio.shuffle(niveles[3])
+        return niveles, jefes
+
+    def _siguiente_numero(self):
+        ultimo = Perfil.objects.filter(numero_empleado__startswith=PREFIJO_NUMERO).aggregate(
+            maximo=Max('numero_empleado')
+        )['maximo']
+        try:
+            return int(ultimo[len(PREFIJO_NUMERO):]) + 1
+        except (TypeError, ValueError):
+            return 1
+
+    def _datos_perfil(self, rol):
+        """Antigüedad, puesto y salario según el rol"""
+        aleatorio = self.aleatorio
+        # Antigüedad exponencial (muchas contrataciones recientes); los jefes
+        # llevan más tiempo en la empresa
+        anios = aleatorio.expovariate(1 / 5)
+        if rol in ('ADMIN', 'JEFE_DEPARTAMENTO'):
+            anios += 6
+        elif rol == 'JEFE_EQUIPO':
+            anios += 3
+        anios = min(anios, 38)
+        contratacion = self.hoy - timedelta(days=int(anios * 365.25))
+        nacimiento = contratacion - timedelta(days=int(aleatorio.uniform(19, 45) * 365.25))
+        salario = SALARIO_BASE[rol] * aleatorio.lognormvariate(0, 0.25) * (1 + 0.015 * anios)
+        return {
+            'fecha_contratacion': contratacion,
+            'fecha_nacimiento': nacimiento,
+            'puesto': aleatorio.choice(PUESTOS[rol]),
+            'salario': Decimal(round(salario, -1)).quantize(Decimal('0.01')),
+            'dias_vacaciones_anuales': dias_por_antiguedad(int(anios)),
+        }
+
+    def _crear_perfiles(self, departamentos):
+        """
+        Crear usuarios y perfiles por niveles. Devuelve una lista paralela a
+        la estructura con ``(perfil_pk, departamento, supervisor_pk,
+        tipo_perfil, fecha_contratacion, dias_anuales, activo)``.
+        """
+        inicio = time.perf_counter()
+        niveles, jefes = self._estructura(departamentos)
+        total = sum(len(nivel) for nivel in niveles)
+        # Un solo hash para todos: con cientos de miles de usuarios hashear
+        # por fila tomaría horas
+        password = make_password(self.password)
+        numero = self._siguiente_numero()
+        grupos = {tipo: Group.objects.get_or_create(name=nombre)[0].pk for tipo, nombre in GRUPOS.items()}
+        UsuarioGrupo = User.groups.through
+
+        perfiles = []
+        # Por niveles: el supervisor de cada perfil ya está insertado
+        lotes = (
+            nivel[desde:desde + self.tamano_lote]
+            for nivel in niveles for desde in range(0, len(nivel), self.tamano_lote)
+        )
+        for lote in lotes:
+            desde = len(perfiles)
+            usuarios = []
+            nuevos = []
+            for posicion, (rol, departamento, supervisor) in enumerate(lote, start=desde):
+                consecutivo = numero + posicion
+                nombre = self.aleatorio.choice(NOMBRES)
+                apellido = f'{self.aleatorio.choice(APELLIDOS)} {self.aleatorio.choice(APELLIDOS)}'
+                username = f'{PREFIJO_USUARIO}{consecutivo:07d}'
+                tipo = {'JEFE_DEPARTAMENTO': 'JEFE_AREA', 'JEFE_EQUIPO': 'JEFE_AREA'}.get(rol, rol)
+                usuarios.append(User(
+                    username=username, email=f'{username}@ejemplo.com', password=password,
+                    first_name=nombre, last_name=apellido, is_staff=tipo == 'ADMIN',
+                    date_joined=self.ahora,
+                ))
+                datos = self._datos_perfil(rol)
+                activo = tipo != 'EMPLEADO' or self.aleatorio.random() >= 0.03
+                nuevos.append(Perfil(
+                    tipo_perfil=tipo,
+                    departamento_id=departamentos[departamento][0] if departamento is not None else None,
+                    numero_empleado=f'{PREFIJO_NUMERO}{consecutivo:07d}',
+                    supervisor_id=perfiles[supervisor][0] if supervisor is not None else None,
+                    telefono=f'55{self.aleatorio.randrange(10 ** 8):08d}',
+                    activo=activo,
+                    **datos,
+                ))
+            with transaction.atomic():
+                User.objects.bulk_create(usuarios)
+                for usuario, perfil in zip(usuarios, nuevos):
+                    perfil.usuario_id = usuario.pk
+                    perfil.texto_busqueda = texto_busqueda(usuario, perfil.numero_empleado)
+                Perfil.objects.bulk_create(nuevos)
+                UsuarioGrupo.objects.bulk_create([
+                    UsuarioGrupo(user_id=perfil.usuario_id, group_id=grupos[perfil.tipo_perfil])
+                    for perfil in nuevos if perfil.tipo_perfil in grupos
+                ])
+            for (_, departamento, _), perfil in zip(lote, nuevos):
+                perfiles.append((
+                    perfil.pk, departamento, perfil.supervisor_id, perfil.tipo_perfil,
+                    perfil.fecha_contratacion, perfil.dias_vacaciones_anuales, perfil.activo,
+                ))
+            self.progreso(f'{len(perfiles)}/{total} perfiles')
+
+        Departamento.objects.bulk_update(
+            [Departamento(pk=departamentos[indice][0], jefe_id=perfiles[posicion][0])
+             for indice, posicion in jefes.items()],
+            ['jefe'], batch_size=self.tamano_lote,
+        )
+        self.resultado.registrar('perfiles', len(perfiles), time.perf_counter() - inicio)
+        return perfiles
+
+    # --- Solicitudes ---
+
+    def _fecha_hora(self, dia, minimo=None):
+        """Fecha y hora laboral de ``dia``, no posterior a ahora ni anterior a ``minimo``"""
+        momento = datetime.combine(dia, hora(8), tzinfo=self.zona) + timedelta(
+            seconds=self.aleatorio.randrange(11 * 3600)
+        )
+        if minimo is not None and momento < minimo:
+            momento = minimo + timedelta(seconds=self.aleatorio.randrange(1, 4 * 3600))
+        return min(momento, self.ahora)
+
+    def _crear_solicitudes(self, perfiles, departamentos):
+        inicio = time.perf_counter()
+        aleatorio = self.aleatorio
+        rh = [pk for pk, _, _, tipo, _, _, _ in perfiles if tipo == 'RH']
+        # Los directores no tienen departamento
+        mascaras = {indice: mascara for indice, (_, mascara, _) in enumerate(departamentos)}
+        mascaras[None] = MASCARA_DEFAULT
+        limite_historia = self.hoy - timedelta(days=int(ANIOS_HISTORIA * 365.25))
+        ultimo_dia = self.hoy + timedelta(days=DIAS_FUTURO)
+        inicio_anio = date(self.hoy.year, 1, 1)
+        usados = {}
+        anuales = {pk: dias for pk, _, _, _, _, dias, _ in perfiles}
+        campos_fecha = (
+            SolicitudVacaciones._meta.get_field('fecha_solicitud'),
+            MovimientoVacaciones._meta.get_field('fecha'),
+        )
+
+        # Primero el empleado y la fecha de inicio de todas las solicitudes,
+        # para insertarlas en orden cronológico: los ids crecen con la fecha
+        # como en la base real y los índices por fecha se llenan por el final
+        elegidos = aleatorio.choices(range(len(perfiles)), k=self.total_solicitudes)
+        inicios = array('l')
+        for posicion in elegidos:
+            contratacion = perfiles[posicion][4]
+            desde = max(contratacion, limite_historia).toordinal()
+            inicios.append(desde + aleatorio.randrange(ultimo_dia.toordinal() - desde + 1))
+        orden = sorted(range(self.total_solicitudes), key=inicios.__getitem__)
+
+        creadas = 0
+        movimientos_totales = 0
+        for desde_lote in range(0, self.total_solicitudes, self.tamano_lote):
+            filas = []
+            for indice in orden[desde_lote:desde_lote + self.tamano_lote]:
+                pk, departamento, supervisor = perfiles[elegidos[indice]][:3]
+                dia = date.fromordinal(inicios[indice])
+                if dia.weekday() >= 5:
+                    dia += timedelta(days=7 - dia.weekday())
+                minimo, maximo = self._elegir(DURACIONES)
+                fin = dia + timedelta(days=aleatorio.randint(minimo, maximo) - 1)
+                filas.append((pk, departamento, supervisor, dia, fin))
+            dias = dias_habiles_lote((dia, fin, mascaras[departamento]) for _, departamento, _, dia, fin in filas)
+            # Una solicitud sin días hábiles (festivos) no pasa el formulario:
+            # se recorre hasta que incluya al menos uno
+            for posicion, habiles in enumerate(dias):
+                if habiles:
+                    continue
+                pk, departamento, supervisor, dia, fin = filas[posicion]
+                while not habiles:
+                    dia += timedelta(days=1)
+                    fin += timedelta(days=1)
+                    habiles = dias_habiles(dia, fin, mascaras[departamento])
+                filas[posicion] = (pk, departamento, supervisor, dia, fin)
+                dias[posicion] = habiles
+
+            solicitudes = []
+            for (pk, _, supervisor, dia, fin), habiles in zip(filas, dias):
+                tipo = self._elegir(TIPOS_SOLICITUD)
+                estado = self._elegir(ESTADOS_PASADO if dia < self.hoy else ESTADOS_FUTURO)
+                if estado == 'PENDIENTE_RH' and tipo != 'NORMAL':
+                    estado = 'APROBADO_JEFE'
+                anticipacion = aleatorio.randint(7, 60) if tipo == 'NORMAL' else aleatorio.randint(0, 6)
+                solicitada = self._fecha_hora(dia - timedelta(days=anticipacion))
+                solicitud = SolicitudVacaciones(
+                    empleado_id=pk, fecha_inicio=dia, fecha_fin=fin, dias_solicitados=habiles,
+                    tipo=tipo, motivo=aleatorio.choice(MOTIVOS), estado=estado, fecha_solicitud=solicitada,
+                )
+                if estado == 'APROBADO_RH' and dia >= inicio_anio:
+                    # Saldo del año: sin días suficientes RH la habría rechazado
+                    if usados.get(pk, 0) + habiles > anuales[pk]:
+                        estado = solicitud.estado = 'RECHAZADO_RH'
+                        solicitud.comentarios_rh = 'Saldo de vacaciones insuficiente'
+                    else:
+                        usados[pk] = usados.get(pk, 0) + habiles
+                if estado != 'PENDIENTE_JEFE' and not (estado == 'CANCELADO' and aleatorio.random() < 0.5):
+                    solicitud.aprobado_por_jefe_id = supervisor
+                    solicitud.fecha_aprobacion_jefe = self._fecha_hora(
+                        solicitada.date() + timedelta(days=aleatorio.randint(0, 3)), solicitada
+                    )
+                    if estado == 'RECHAZADO_JEFE':
+                        solicitud.comentarios_jefe = aleatorio.choice(COMENTARIOS_RECHAZO)
+                if estado in ('APROBADO_RH', 'RECHAZADO_RH') and rh:
+                    solicitud.aprobado_por_rh_id = aleatorio.choice(rh)
+                    referencia = solicitud.fecha_aprobacion_jefe or solicitada
+                    solicitud.fecha_aprobacion_rh = self._fecha_hora(
+                        referencia.date() + timedelta(days=aleatorio.randint(0, 3)), referencia
+                    )
+                    if estado == 'RECHAZADO_RH' and not solicitud.comentarios_rh:
+                        solicitud.comentarios_rh = aleatorio.choice(COMENTARIOS_RECHAZO)
+                solicitudes.append(solicitud)
+
+            with fechas_manuales(*campos_fecha), transaction.atomic():
+                SolicitudVacaciones.objects.bulk_create(solicitudes)
+                movimientos = [
+                    MovimientoVacaciones(
+                        perfil_id=solicitud.empleado_id, solicitud_id=solicitud.pk, tipo='APROBACION',
+                        dias=solicitud.dias_solicitados, registrado_por_id=solicitud.aprobado_por_rh_id,
+                        fecha=solicitud.fecha_aprobacion_rh or solicitud.fecha_solicitud,
+                    )
+                    for solicitud in solicitudes
+                    if solicitud.estado == 'APROBADO_RH' and solicitud.fecha_inicio >= inicio_anio
+                ]
+                MovimientoVacaciones.objects.bulk_create(movimientos)
+            creadas += len(solicitudes)
+            movimientos_totales += len(movimientos)
+            self.progreso(f'{creadas}/{self.total_solicitudes} solicitudes')
+
+        # Saldo igual a la suma de movimientos, como lo deja MovimientoVacaciones.registrar
+        self._actualizar_saldos(usados)
+        segundos = time.perf_counter() - inicio
+        self.resultado.registrar('solicitudes', creadas, segundos)
+        self.resultado.registrar('movimientos', movimientos_totales, 0.0)
+
+    def _actualizar_saldos(self, usados):
+        # executemany con un UPDATE parametrizado, como reconstruir_jerarquia
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            *map(connection.ops.quote_name, (Perfil._meta.db_table, 'dias_vacaciones_usados', 'id'))
+        )
+        cambios = [(dias, pk) for pk, dias in usados.items()]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for desde in range(0, len(cambios), self.tamano_lote):
+                cursor.executemany(sql, cambios[desde:desde + self.tamano_lote])
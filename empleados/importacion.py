@@ -0,0 +1,380 @@
+"""
+Importación masiva de empleados (User + Perfil) desde archivos CSV/XLSX.
+
+El archivo se lee en streaming fila por fila, se valida en lotes contra
+conjuntos precargados (usernames, emails, números de empleado) y se escribe
+con ``bulk_create`` dentro de una transacción por lote. ``bulk_create`` no
+dispara ``post_save``, por lo que la señal ``crear_perfil_usuario`` no se
+ejecuta por fila: el perfil se crea aquí con los datos reales del archivo.
+
+Las contraseñas de la columna ``password`` se hashean por lote con un pool
+de ``RH_CONFIG['IMPORTACION_HILOS_HASH']`` hilos: PBKDF2 (``hashlib``)
+libera el GIL, así que con varios núcleos los hashes corren en paralelo sin
+que la cantidad de hilos crezca con el archivo. Las filas sin contraseña
+reciben una inutilizable hasta que se les asigne una desde el admin.
+El CSV de errores nunca incluye la columna ``password``.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import codecs
+import csv
+import io
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .busqueda import texto_busqueda
+from .models import Perfil, Departamento, invalidar_estadisticas
+
+
+COLUMNAS = [
+    'username', 'email', 'first_name', 'last_name', 'password',
+    'tipo_perfil', 'departamento', 'fecha_contratacion', 'numero_empleado',
+    'puesto', 'salario', 'supervisor', 'telefono', 'direccion',
+    'fecha_nacimiento', 'dias_vacaciones_anuales',
+]
+
+COLUMNAS_REQUERIDAS = [
+    'username', 'email', 'first_name', 'last_name',
+    'fecha_contratacion', 'numero_empleado', 'puesto', 'salario',
+]
+
+# Columnas del CSV de errores: nunca la contraseña en texto plano
+COLUMNAS_ERRORES = [columna for columna in COLUMNAS if columna != 'password']
+
+FORMATOS_FECHA = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']
+
+TAMANO_LOTE_DEFAULT = 1000
+
+# Excel en Windows exporta "CSV (delimitado por comas)" en cp1252
+CODIFICACION_ALTERNATIVA = 'cp1252'
+
+
+class ErrorImportacion(Exception):
+    """Error que impide procesar el archivo completo"""
+
+
+class ErrorFila(Exception):
+    """Error de validación de una fila del archivo"""
+
+
+def leer_filas(archivo, nombre):
+    """
+    Devolver un generador de diccionarios ``{columna: valor}`` a partir de
+    un archivo CSV o XLSX, sin cargarlo completo en memoria.
+    """
+    if nombre.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ErrorImportacion('Para importar archivos XLSX instala openpyxl (pip install openpyxl).')
+        return _leer_xlsx(load_workbook(archivo, read_only=True, data_only=True))
+    return _leer_csv(archivo)
+
+
+def _detectar_codificacion(archivo):
+    """
+    ``utf-8-sig`` si todo el archivo es UTF-8 válido, si no la codificación
+    de Excel. Recorre el archivo por bloques y lo regresa a su posición.
+    """
+    if not archivo.seekable():
+        return 'utf-8-sig'
+    inicio = archivo.tell()
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    try:
+        while bloque := archivo.read(1 << 20):
+            decodificador.decode(bloque)
+        decodificador.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return CODIFICACION_ALTERNATIVA
+    finally:
+        archivo.seek(inicio)
+
+
+def _leer_csv(archivo):
+    if isinstance(archivo, io.TextIOBase):
+        texto = archivo
+        codificacion = archivo.encoding
+    else:
+        codificacion = _detectar_codificacion(archivo)
+        texto = io.TextIOWrapper(archivo, encoding=codificacion, newline='')
+    lector = csv.DictReader(texto)
+    try:
+        for fila in lector:
+            yield {
+                (clave or '').strip().lower(): (valor or '').strip()
+                for clave, valor in fila.items()
+            }
+    except UnicodeDecodeError:
+        raise ErrorImportacion(
+            f'El archivo no se pudo leer como {codificacion} (cerca de la línea '
+            f'{lector.line_num + 1}). Guárdalo como "CSV UTF-8" e inténtalo de nuevo.'
+        )
+
+
+def _leer_xlsx(libro):
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [str(c or '').strip().lower() for c in next(filas, [])]
+        for valores in filas:
+            if not any(v not in (None, '') for v in valores):
+                continue
+            yield {
+                encabezado: ('' if valor is None else valor.strip() if isinstance(valor, str) else valor)
+                for encabezado, valor in zip(encabezados, valores)
+            }
+    finally:
+        libro.close()
+
+
+def _validar_campo(modelo, nombre, valor):
+    """
+    Aplicar los validadores del campo del modelo (longitud, dígitos, rango)
+    para que un valor fuera de límites sea un error de la fila y no un
+    ``DataError`` de la base que aborte el lote completo.
+    """
+    try:
+        modelo._meta.get_field(nombre).run_validators(valor)
+    except ValidationError as error:
+        raise ErrorFila(f'{nombre}: "{valor}" {" ".join(error.messages)}')
+
+
+def _parsear_fecha(valor, campo, requerido=False):
+    if valor in (None, ''):
+        if requerido:
+            raise ErrorFila(f'{campo}: campo requerido')
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(str(valor), formato).date()
+        except ValueError:
+            continue
+    raise ErrorFila(f'{campo}: fecha inválida "{valor}"')
+
+
+class ResultadoImportacion:
+    """Resumen de una importación"""
+
+    def __init__(self):
+        self.procesadas = 0
+        self.creadas = 0
+        self.errores = 0
+        self.segundos = 0.0
+
+    @property
+    def filas_por_segundo(self):
+        if not self.segundos:
+            return 0.0
+        return self.procesadas / self.segundos
+
+    def __str__(self):
+        return (
+            f'{self.procesadas} filas procesadas, {self.creadas} creadas, '
+            f'{self.errores} con error en {self.segundos:.2f}s '
+            f'({self.filas_por_segundo:.0f} filas/s)'
+        )
+
+
+class ImportadorEmpleados:
+    """
+    Valida y crea empleados en lotes.
+
+    Los duplicados se detectan contra conjuntos precargados en memoria, de
+    modo que cada lote cuesta dos INSERT múltiples en lugar de tres
+    ``exists()`` más dos INSERT por empleado.
+    """
+
+    def __init__(self, tamano_lote=TAMANO_LOTE_DEFAULT, archivo_errores=None):
+        self.tamano_lote = tamano_lote
+        self.archivo_errores = archivo_errores
+        self._escritor_errores = None
+        self.resultado = ResultadoImportacion()
+        self.errores_muestra = []
+
+        self.usernames = set(User.objects.values_list('username', flat=True))
+        self.emails = set(
+            email.lower() for email in User.objects.exclude(email='').values_list('email', flat=True)
+        )
+        self.perfiles_por_numero = dict(Perfil.objects.values_list('numero_empleado', 'id'))
+        self.departamentos = {
+            nombre.lower(): pk
+            for pk, nombre in Departamento.objects.filter(activo=True).values_list('id', 'nombre')
+        }
+        self.tipos_validos = {clave for clave, _ in Perfil.TIPOS_PERFIL}
+        # (perfil_id, numero_empleado, numero_supervisor) que se resuelven al final,
+        # por si el supervisor aparece más adelante en el archivo
+        self.supervisores_pendientes = []
+
+    def importar(self, filas):
+        """Procesar un iterable de filas y devolver el ``ResultadoImportacion``"""
+        inicio = time.perf_counter()
+        hilos = settings.RH_CONFIG.get('IMPORTACION_HILOS_HASH') or min(4, os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash') as self._pool_hash:
+            lote = []
+            for numero_fila, fila in enumerate(filas, start=2):
+                self.resultado.procesadas += 1
+                try:
+                    lote.append(self._validar(fila))
+                except ErrorFila as error:
+                    self._registrar_error(numero_fila, fila, str(error))
+                    continue
+                if len(lote) >= self.tamano_lote:
+                    self._guardar_lote(lote)
+                    lote = []
+            if lote:
+                self._guardar_lote(lote)
+        self._resolver_supervisores()
+        # bulk_create/bulk_update no pasan por Perfil.save()
+        if self.resultado.creadas:
+            Perfil.objects.reconstruir_jerarquia(self.tamano_lote)
+            invalidar_estadisticas()
+        self.resultado.segundos = time.perf_counter() - inicio
+        return self.resultado
+
+    def _validar(self, fila):
+        faltantes = [c for c in COLUMNAS_REQUERIDAS if fila.get(c) in (None, '')]
+        if faltantes:
+            raise ErrorFila(f'Campos requeridos vacíos: {", ".join(faltantes)}')
+
+        username = str(fila['username'])
+        _validar_campo(User, 'username', username)
+        if username in self.usernames:
+            raise ErrorFila(f'username: "{username}" ya existe')
+
+        email = str(fila['email']).lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise ErrorFila(f'email: "{email}" no es válido')
+        _validar_campo(User, 'email', email)
+        if email in self.emails:
+            raise ErrorFila(f'email: "{email}" ya está registrado')
+
+        numero_empleado = str(fila['numero_empleado'])
+        _validar_campo(Perfil, 'numero_empleado', numero_empleado)
+        if numero_empleado in self.perfiles_por_numero:
+            raise ErrorFila(f'numero_empleado: "{numero_empleado}" ya existe')
+
+        tipo_perfil = str(fila.get('tipo_perfil') or 'EMPLEADO').upper()
+        if tipo_perfil not in self.tipos_validos:
+            raise ErrorFila(f'tipo_perfil: "{tipo_perfil}" no es válido')
+
+        departamento_id = None
+        if fila.get('departamento'):
+            departamento_id = self.departamentos.get(str(fila['departamento']).lower())
+            if departamento_id is None:
+                raise ErrorFila(f'departamento: "{fila["departamento"]}" no existe')
+
+        try:
+            salario = Decimal(str(fila['salario']))
+        except InvalidOperation:
+            raise ErrorFila(f'salario: "{fila["salario"]}" no es un número')
+        if not salario.is_finite():
+            raise ErrorFila(f'salario: "{fila["salario"]}" no es un número')
+        _validar_campo(Perfil, 'salario', salario)
+
+        dias_anuales = fila.get('dias_vacaciones_anuales')
+        try:
+            dias_anuales = int(dias_anuales) if dias_anuales not in (None, '') else 20
+        except (TypeError, ValueError):
+            raise ErrorFila(f'dias_vacaciones_anuales: "{dias_anuales}" no es un entero')
+        _validar_campo(Perfil, 'dias_vacaciones_anuales', dias_anuales)
+
+        datos = {
+            'usuario': User(
+                username=username,
+                email=email,
+                first_name=str(fila['first_name'])[:150],
+                last_name=str(fila['last_name'])[:150],
+                password=make_password(None),
+            ),
+            'password': str(fila.get('password') or ''),
+            'perfil': Perfil(
+                tipo_perfil=tipo_perfil,
+                departamento_id=departamento_id,
+                fecha_contratacion=_parsear_fecha(fila['fecha_contratacion'], 'fecha_contratacion', requerido=True),
+                numero_empleado=numero_empleado,
+                puesto=str(fila['puesto'])[:100],
+                salario=salario,
+                telefono=str(fila.get('telefono') or '')[:15],
+                direccion=str(fila.get('direccion') or ''),
+                fecha_nacimiento=_parsear_fecha(fila.get('fecha_nacimiento'), 'fecha_nacimiento'),
+                dias_vacaciones_anuales=dias_anuales,
+            ),
+            'supervisor': str(fila.get('supervisor') or ''),
+        }
+
+        # Reservar claves para detectar duplicados dentro del mismo archivo
+        self.usernames.add(username)
+        self.emails.add(email)
+        self.perfiles_por_numero[numero_empleado] = None
+        return datos
+
+    def _hashear_passwords(self, lote):
+        """Hashear en el pool, fuera de la transacción, las contraseñas del lote"""
+        con_password = [datos for datos in lote if datos['password']]
+        hashes = self._pool_hash.map(make_password, [datos['password'] for datos in con_password])
+        for datos, hash_password in zip(con_password, hashes):
+            datos['usuario'].password = hash_password
+            datos['password'] = ''
+
+    def _guardar_lote(self, lote):
+        self._hashear_passwords(lote)
+        with transaction.atomic():
+            usuarios = User.objects.bulk_create([datos['usuario'] for datos in lote])
+            perfiles = []
+            for datos, usuario in zip(lote, usuarios):
+                perfil = datos['perfil']
+                perfil.usuario_id = usuario.pk
+                perfil.texto_busqueda = texto_busqueda(usuario, perfil.numero_empleado)
+                perfiles.append(perfil)
+            Perfil.objects.bulk_create(perfiles)
+
+        for datos, perfil in zip(lote, perfiles):
+            self.perfiles_por_numero[perfil.numero_empleado] = perfil.pk
+            if datos['supervisor']:
+                self.supervisores_pendientes.append(
+                    (perfil.pk, perfil.numero_empleado, datos['supervisor'])
+                )
+        self.resultado.creadas += len(lote)
+
+    def _resolver_supervisores(self):
+        actualizar = []
+        for perfil_id, numero_empleado, numero_supervisor in self.supervisores_pendientes:
+            supervisor_id = self.perfiles_por_numero.get(numero_supervisor)
+            if supervisor_id is None:
+                self._registrar_error(
+                    '-', {'numero_empleado': numero_empleado, 'supervisor': numero_supervisor},
+                    f'supervisor: "{numero_supervisor}" no existe; el perfil se creó sin supervisor'
+                )
+                continue
+            actualizar.append(Perfil(pk=perfil_id, supervisor_id=supervisor_id))
+        for inicio in range(0, len(actualizar), self.tamano_lote):
+            with transaction.atomic():
+                Perfil.objects.bulk_update(actualizar[inicio:inicio + self.tamano_lote], ['supervisor'])
+
+    def _registrar_error(self, numero_fila, fila, mensaje):
+        self.resultado.errores += 1
+        if len(self.errores_muestra) < 100:
+            self.errores_muestra.append((numero_fila, mensaje))
+        if self.archivo_errores is None:
+            return
+        if self._escritor_errores is None:
+            self._escritor_errores = csv.writer(self.archivo_errores)
+            self._escritor_errores.writerow(['fila', 'error'] + COLUMNAS_ERRORES)
+        self._escritor_errores.writerow(
+            [numero_fila, mensaje] + [fila.get(columna, '') for columna in COLUMNAS_ERRORES]
+        )
@@ -0,0 +1,76 @@
+"""
+Organigrama a partir de la ruta materializada de ``Perfil``.
+
+El árbol completo (o el subárbol de un perfil) se lee con una sola consulta
+ordenada por ``ruta_jerarquia``, por partes (en PostgreSQL con un cursor del
+lado del servidor), y se arma en O(n) enlazando cada nodo con su
+supervisor. El JSON ya serializado se guarda en cache bajo una versión que
+se incrementa con cada cambio de perfiles (ver ``invalidar_organigrama`` en
+models).
+"""
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metricas
+from .exportacion import TAMANO_CHUNK
+from .models import Perfil, ORGANIGRAMA_VERSION_KEY
+
+
+def _nodos(raiz=None):
+    perfiles = Perfil.objects.filter(activo=True)
+    if raiz is not None:
+        perfiles = perfiles & Perfil.objects.subordinados(raiz, incluir_propio=True)
+    filas = perfiles.order_by('ruta_jerarquia').values_list(
+        'id', 'supervisor_id', 'numero_empleado', 'usuario__first_name', 'usuario__last_name',
+        'usuario__username', 'puesto', 'tipo_perfil', 'departamento__nombre',
+    )
+
+    nodos = {}
+    enlaces = []
+    for pk, supervisor_id, numero, nombre, apellido, username, puesto, tipo, departamento in filas.iterator(
+        chunk_size=TAMANO_CHUNK
+    ):
+        nodos[pk] = {
+            'id': pk,
+            'numero_empleado': numero,
+            'nombre': f'{nombre} {apellido}'.strip() or username,
+            'puesto': puesto,
+            'tipo_perfil': tipo,
+            'departamento': departamento,
+            'subordinados': [],
+        }
+        enlaces.append((pk, supervisor_id))
+
+    raices = []
+    for pk, supervisor_id in enlaces:
+        padre = nodos.get(supervisor_id)
+        # Si el supervisor está inactivo o fuera del subárbol, el nodo es raíz
+        if padre is None or pk == getattr(raiz, 'pk', None):
+            raices.append(nodos[pk])
+        else:
+            padre['subordinados'].append(nodos[pk])
+    return raices, len(nodos)
+
+
+def organigrama_json(raiz=None):
+    """JSON (str) del organigrama completo o del subárbol de ``raiz``"""
+    segundos = settings.RH_CONFIG.get('ORGANIGRAMA_CACHE_SEGUNDOS', 300)
+    version = cache.get_or_set(ORGANIGRAMA_VERSION_KEY, 1, None)
+    clave = f'organigrama:{version}:{getattr(raiz, "pk", "todo")}'
+    if segundos:
+        contenido = cache.get(clave)
+        metricas.registrar_cache('organigrama', contenido is not None)
+        if contenido is not None:
+            return contenido
+
+    raices, total = _nodos(raiz)
+    contenido = json.dumps(
+        {'raiz': getattr(raiz, 'pk', None), 'total': total, 'organigrama': raices},
+        ensure_ascii=False, separators=(',', ':'),
+    )
+    if segundos:
+        cache.set(clave, contenido, segundos)
+    return contenido
@@ -0,0 +1,90 @@
+"""
+Copia consistente de la base SQLite para usarla como réplica de lectura.
+Ejecutar: python manage.py copiar_replica [--destino ruta] [--paginas -1] [--verificar]
+
+Usa la API de respaldo en línea de SQLite (``sqlite3.Connection.backup``):
+la copia es una imagen consistente de la base aunque la aplicación siga
+escribiendo. Se escribe en ``<destino>.tmp`` y se renombra al terminar, así
+las conexiones de la réplica nunca ven una copia a medias; las abiertas
+siguen leyendo la anterior hasta que cierran (con ``CONN_MAX_AGE = 0``, al
+terminar la petición).
+
+Con ``--paginas -1`` (default) se copia en un solo paso: el más rápido,
+pero mientras dura la base no acepta escrituras si no está en modo WAL. Con
+``--paginas N`` se copia por partes con ``--pausa`` entre ellas para dejar
+escribir a la aplicación; si la base cambia entre partes SQLite reinicia la
+copia, así que con muchas escrituras puede no terminar.
+
+El destino por defecto es el ``NAME`` del alias ``replica`` (ver
+``RH_DB_REPLICA`` en los settings). Programarlo cada pocos minutos, con
+``RH_CONFIG['REPLICA_ESCRITURA_SEGUNDOS']`` mayor que el intervalo.
+"""
+
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from empleados.replicas import PRIMARIO, REPLICA
+
+
+class Command(BaseCommand):
+    help = 'Copia la base SQLite con la API de respaldo en línea para la réplica de lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino',
+                            help='Archivo de la copia (default: NAME del alias replica)')
+        parser.add_argument('--paginas', type=int, default=-1,
+                            help='Páginas por paso; -1 copia todo en un paso (default: -1)')
+        parser.add_argument('--pausa', type=float, default=0.05,
+                            help='Segundos entre pasos con --paginas (default: 0.05)')
+        parser.add_argument('--verificar', action='store_true',
+                            help='Ejecutar PRAGMA quick_check sobre la copia antes de publicarla')
+
+    def handle(self, *args, **options):
+        fuente = connections[PRIMARIO]
+        if fuente.vendor != 'sqlite':
+            raise CommandError(
+                f'La base es {fuente.vendor}: la réplica se mantiene con la replicación del servidor'
+            )
+        destino = options['destino'] or settings.DATABASES.get(REPLICA, {}).get('NAME')
+        if not destino:
+            raise CommandError('Sin destino: usar --destino o definir RH_DB_REPLICA')
+        destino = os.path.abspath(os.fspath(destino))
+        if destino == os.path.abspath(os.fspath(fuente.settings_dict['NAME'])):
+            raise CommandError('El destino es la misma base de datos')
+
+        temporal = f'{destino}.tmp'
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+        inicio = time.perf_counter()
+        fuente.ensure_connection()
+        copia = sqlite3.connect(temporal)
+        try:
+            fuente.connection.backup(
+                copia,
+                pages=options['paginas'] if options['paginas'] > 0 else -1,
+                sleep=max(0, options['pausa']),
+            )
+            # La réplica se abre como archivo suelto, sin -wal ni -shm
+            copia.execute('PRAGMA journal_mode = DELETE')
+            if options['verificar']:
+                resultado = copia.execute('PRAGMA quick_check').fetchone()[0]
+                if resultado != 'ok':
+                    raise CommandError(f'La copia no pasó quick_check: {resultado}')
+        except BaseException:
+            copia.close()
+            os.remove(temporal)
+            raise
+        copia.close()
+        os.replace(temporal, destino)
+
+        segundos = time.perf_counter() - inicio
+        megabytes = os.path.getsize(destino) / 1024 / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Réplica copiada en {destino} ({megabytes:.1f} MB, {segundos:.1f}s)'
+        ))
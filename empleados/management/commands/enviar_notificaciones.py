@@ -0,0 +1,80 @@
+"""
+Worker que envía la bandeja de salida de notificaciones.
+Ejecutar: python manage.py enviar_notificaciones [--una-vez] [--lote 100] [--intervalo 5]
+
+Para probar el envío real sin un servidor de correo, levantar un SMTP local
+(por ejemplo ``python -m aiosmtpd -n -l localhost:1025``) y correr
+``python manage.py enviar_notificaciones --una-vez --smtp localhost:1025``.
+"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from empleados.notificaciones import enviar_pendientes, TAMANO_LOTE_DEFAULT
+
+
+class Command(BaseCommand):
+    help = 'Envía las notificaciones pendientes por lotes, con reintentos y resumen diario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Vaciar la bandeja de lo que ya venció y terminar'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_DEFAULT,
+            help=f'Notificaciones por lote (default: {TAMANO_LOTE_DEFAULT})'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=5,
+            help='Segundos de espera cuando no hay pendientes (default: 5)'
+        )
+        parser.add_argument(
+            '--smtp', default=None, metavar='HOST:PUERTO',
+            help='Enviar por SMTP sin TLS ni autenticación a este servidor (pruebas locales)'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        smtp = None
+        if options['smtp']:
+            host, _, puerto = options['smtp'].rpartition(':')
+            if not host or not puerto.isdigit():
+                raise CommandError('--smtp debe tener la forma HOST:PUERTO')
+            smtp = {'host': host, 'port': int(puerto)}
+
+        total_enviadas = total_fallidas = total_omitidas = 0
+        try:
+            while True:
+                conexion = None
+                if smtp:
+                    conexion = get_connection(
+                        'django.core.mail.backends.smtp.EmailBackend',
+                        use_tls=False, use_ssl=False, username='', password='', **smtp
+                    )
+                enviadas, fallidas, omitidas = enviar_pendientes(options['lote'], conexion)
+                total_enviadas += enviadas
+                total_fallidas += fallidas
+                total_omitidas += omitidas
+                if not (enviadas or fallidas or omitidas):
+                    # La bandeja no tiene nada vencido
+                    if options['una_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+                self.stdout.write(f'{enviadas} enviadas, {fallidas} con error, {omitidas} omitidas')
+                # Si todo el lote falló no insistir de inmediato; con --una-vez
+                # las fallidas quedan para después y se sigue con el resto
+                if not (enviadas or omitidas or options['una_vez']):
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total_enviadas} notificaciones enviadas, {total_fallidas} con error, '
+            f'{total_omitidas} omitidas'
+        ))
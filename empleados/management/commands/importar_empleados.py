@@ -0,0 +1,58 @@
+"""
+Importar empleados de forma masiva desde CSV/XLSX.
+Ejecutar: python manage.py importar_empleados archivo.csv --lote 2000 --errores errores.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from empleados.importacion import (
+    ImportadorEmpleados, ErrorImportacion, leer_filas, COLUMNAS, TAMANO_LOTE_DEFAULT
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa empleados (usuario + perfil) desde un archivo CSV o XLSX en lotes. '
+        f'Columnas reconocidas: {", ".join(COLUMNAS)}. '
+        'Si no se incluye "password" el usuario se crea con contraseña inutilizable; '
+        'las contraseñas se hashean por lote con RH_CONFIG["IMPORTACION_HILOS_HASH"] hilos '
+        'y nunca se copian al CSV de errores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE_DEFAULT,
+            help=f'Filas por transacción (default: {TAMANO_LOTE_DEFAULT})'
+        )
+        parser.add_argument(
+            '--errores', default=None,
+            help='Ruta del CSV donde se escriben las filas rechazadas'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        archivo_errores = None
+        if options['errores']:
+            archivo_errores = open(options['errores'], 'w', newline='', encoding='utf-8')
+
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                importador = ImportadorEmpleados(
+                    tamano_lote=options['lote'],
+                    archivo_errores=archivo_errores,
+                )
+                resultado = importador.importar(leer_filas(archivo, options['archivo']))
+        except (OSError, ErrorImportacion) as error:
+            raise CommandError(str(error))
+        finally:
+            if archivo_errores:
+                archivo_errores.close()
+
+        for numero_fila, mensaje in importador.errores_muestra[:10]:
+            self.stderr.write(f'  Fila {numero_fila}: {mensaje}')
+        if resultado.errores and options['errores']:
+            self.stderr.write(f'Detalle de errores en {options["errores"]}')
+        self.stdout.write(self.style.SUCCESS(str(resultado)))
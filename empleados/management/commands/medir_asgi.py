@@ -0,0 +1,249 @@
+"""
+Latencia de los dashboards servidos por WSGI (vistas sync) y por ASGI
+(``empleados.views_async``) con peticiones concurrentes, lado a lado.
+Ejecutar: python manage.py medir_asgi [--concurrencia 16] [--peticiones 800] [--sin-cache]
+
+Cada modo corre en un proceso aparte (las rutas se eligen al importar
+``empleados.urls`` según ``RH_DASHBOARDS_ASYNC``) y en el mismo proceso que
+la aplicación, sin servidor ni red:
+
+- WSGI: ``--concurrencia`` hilos, cada uno con su ``django.test.Client``;
+- ASGI: ``--concurrencia`` tareas en un event loop con ``AsyncClient``, que
+  pasa por el middleware en modo async. Cada petición va dentro de un
+  ``ThreadSensitiveContext``, como en ``ASGIHandler``: su código sync corre
+  en un hilo propio y no en el único hilo sync del proceso.
+
+Se inicia sesión una vez con un usuario de cada rol y todos los clientes
+reusan esas cookies. Con ``--sin-cache`` los paneles de estadísticas no se
+guardan en cache y cada petición hace todas las consultas del dashboard.
+Solo hace lecturas (y las sesiones del inicio).
+
+Las consultas simultáneas de un dashboard async solo corren en paralelo con
+PostgreSQL (ver ``empleados.views_async``); en SQLite la comparación mide el
+costo del stack async.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from empleados.carga import DASHBOARDS, MEZCLA, percentil, _redondear
+from empleados.models import Perfil
+
+
+MODOS = ('wsgi', 'asgi')
+# Peticiones a cada dashboard antes de medir: caches, conexiones y plantillas
+CALENTAMIENTO = 3
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de los dashboards por WSGI (sync) y por ASGI (async) con peticiones concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=16,
+                            help='Peticiones simultáneas (default: 16)')
+        parser.add_argument('--peticiones', type=int, default=800,
+                            help='Peticiones medidas en cada modo, repartidas entre los roles (default: 800)')
+        parser.add_argument('--sin-cache', action='store_true',
+                            help='No guardar en cache los paneles de estadísticas')
+        parser.add_argument('--modo', choices=MODOS,
+                            help='Medir solo este modo en este proceso e imprimir el resultado en JSON')
+
+    def handle(self, *args, **options):
+        if options['concurrencia'] < 1 or options['peticiones'] < 1:
+            raise CommandError('--concurrencia y --peticiones deben ser mayores que cero')
+        if options['modo']:
+            self._medir(options)
+            return
+
+        resultados = {modo: self._subproceso(modo, options) for modo in MODOS}
+        self._mostrar(resultados, options)
+
+    def _subproceso(self, modo, options):
+        self.stdout.write(f'Midiendo {modo.upper()}...')
+        comando = [
+            sys.executable, '-m', 'django', 'medir_asgi', '--modo', modo,
+            '--concurrencia', str(options['concurrencia']),
+            '--peticiones', str(options['peticiones']),
+        ]
+        if options['sin_cache']:
+            comando.append('--sin-cache')
+        entorno = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'rh_project.settings'),
+            'RH_DASHBOARDS_ASYNC': '1' if modo == 'asgi' else '0',
+            'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])),
+        }
+        proceso = subprocess.run(comando, env=entorno, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            self.stderr.write(proceso.stderr)
+            raise CommandError(f'Falló la medición {modo.upper()}')
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def _medir(self, options):
+        asincrono = options['modo'] == 'asgi'
+        if asincrono != bool(settings.RH_CONFIG.get('DASHBOARDS_ASYNC')):
+            raise CommandError(f'--modo {options["modo"]} requiere RH_DASHBOARDS_ASYNC={int(asincrono)}')
+
+        usuarios = {}
+        for tipo, _ in MEZCLA:
+            perfil = Perfil.objects.filter(activo=True, tipo_perfil=tipo).select_related('usuario').first()
+            if perfil is None:
+                raise CommandError(f'No hay perfiles activos de tipo {tipo}; crear datos con: python manage.py generar_datos')
+            usuarios[tipo] = perfil.usuario
+        rutas = [(tipo, reverse(DASHBOARDS[tipo][1])) for tipo, _ in MEZCLA]
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost',
+        )
+        ajustes = {}
+        if options['sin_cache']:
+            ajustes['RH_CONFIG'] = {**settings.RH_CONFIG, 'FRAGMENTOS_CACHE_SEGUNDOS': 0}
+
+        with override_settings(**ajustes):
+            # Una sesión por rol; las cookies se copian a cada cliente
+            sesiones = {}
+            for tipo, usuario in usuarios.items():
+                cliente = Client(HTTP_HOST=host)
+                cliente.force_login(usuario)
+                sesiones[tipo] = cliente.cookies
+            connection.close()
+
+            medir = self._medir_asgi if asincrono else self._medir_wsgi
+            latencias, fallos, segundos = medir(options, rutas, sesiones, host)
+
+        roles = {}
+        for tipo, _ in MEZCLA:
+            ordenadas = sorted(latencias[tipo])
+            roles[tipo] = {
+                'peticiones': len(ordenadas) + fallos[tipo],
+                'fallos': fallos[tipo],
+                'p50_ms': _redondear(percentil(ordenadas, 50)),
+                'p95_ms': _redondear(percentil(ordenadas, 95)),
+                'p99_ms': _redondear(percentil(ordenadas, 99)),
+            }
+        total = sum(medida['peticiones'] for medida in roles.values())
+        self.stdout.write(json.dumps({
+            'modo': options['modo'],
+            'base_de_datos': connection.vendor,
+            'roles': roles,
+            'peticiones': total,
+            'por_segundo': round(total / segundos, 1),
+        }))
+
+    def _plan(self, options, rutas):
+        """Rutas que pide cada trabajador, alternando los roles"""
+        concurrencia = options['concurrencia']
+        por_trabajador = -(-options['peticiones'] // concurrencia)
+        return [
+            [rutas[(numero + indice) % len(rutas)] for indice in range(por_trabajador)]
+            for numero in range(concurrencia)
+        ]
+
+    def _medir_wsgi(self, options, rutas, sesiones, host):
+        latencias, fallos = defaultdict(list), defaultdict(int)
+        lock = threading.Lock()
+        errores = []
+
+        def trabajador(plan):
+            try:
+                clientes = {}
+                for tipo, cookies in sesiones.items():
+                    clientes[tipo] = Client(HTTP_HOST=host)
+                    clientes[tipo].cookies.update(cookies)
+                for tipo, url in plan:
+                    inicio = time.perf_counter()
+                    respuesta = clientes[tipo].get(url)
+                    milisegundos = (time.perf_counter() - inicio) * 1000
+                    with lock:
+                        if respuesta.status_code == 200:
+                            latencias[tipo].append(milisegundos)
+                        else:
+                            fallos[tipo] += 1
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        cliente = Client(HTTP_HOST=host)
+        for tipo, url in rutas * CALENTAMIENTO:
+            cliente.cookies = sesiones[tipo]
+            cliente.get(url)
+
+        hilos = [threading.Thread(target=trabajador, args=(plan,)) for plan in self._plan(options, rutas)]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        if errores:
+            raise errores[0]
+        return latencias, fallos, time.perf_counter() - inicio
+
+    def _medir_asgi(self, options, rutas, sesiones, host):
+        latencias, fallos = defaultdict(list), defaultdict(int)
+
+        async def trabajador(plan):
+            clientes = {}
+            for tipo, cookies in sesiones.items():
+                clientes[tipo] = AsyncClient(HTTP_HOST=host)
+                clientes[tipo].cookies.update(cookies)
+            for tipo, url in plan:
+                inicio = time.perf_counter()
+                async with ThreadSensitiveContext():
+                    respuesta = await clientes[tipo].get(url)
+                milisegundos = (time.perf_counter() - inicio) * 1000
+                if respuesta.status_code == 200:
+                    latencias[tipo].append(milisegundos)
+                else:
+                    fallos[tipo] += 1
+
+        async def principal():
+            cliente = AsyncClient(HTTP_HOST=host)
+            for tipo, url in rutas * CALENTAMIENTO:
+                cliente.cookies = sesiones[tipo]
+                await cliente.get(url)
+            inicio = time.perf_counter()
+            await asyncio.gather(*(trabajador(plan) for plan in self._plan(options, rutas)))
+            return time.perf_counter() - inicio
+
+        segundos = asyncio.run(principal())
+        return latencias, fallos, segundos
+
+    def _mostrar(self, resultados, options):
+        wsgi, asgi = resultados['wsgi'], resultados['asgi']
+        self.stdout.write(
+            f'{options["concurrencia"]} peticiones simultáneas, base {wsgi["base_de_datos"]}, '
+            f'paneles {"sin cache" if options["sin_cache"] else "con cache"}'
+        )
+        self.stdout.write(
+            f'{"dashboard":<12} {"":>4} {"WSGI p50":>9} {"p95":>8} {"p99":>8}   '
+            f'{"ASGI p50":>9} {"p95":>8} {"p99":>8}'
+        )
+        for tipo, _ in MEZCLA:
+            celdas = []
+            for resultado in (wsgi, asgi):
+                medida = resultado['roles'][tipo]
+                celdas.append(' '.join(
+                    f'{"-" if medida[campo] is None else format(medida[campo], ".1f"):>{ancho}}'
+                    for campo, ancho in (('p50_ms', 9), ('p95_ms', 8), ('p99_ms', 8))
+                ))
+            self.stdout.write(f'{DASHBOARDS[tipo][0][len("dashboard_"):]:<12} {"":>4} {celdas[0]}   {celdas[1]}')
+        for resultado in (wsgi, asgi):
+            fallos = sum(medida['fallos'] for medida in resultado['roles'].values())
+            self.stdout.write(
+                f'{resultado["modo"].upper()}: {resultado["peticiones"]} peticiones, {fallos} fallos, '
+                f'{resultado["por_segundo"]:.1f} peticiones/s'
+            )
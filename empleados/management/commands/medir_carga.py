@@ -0,0 +1,128 @@
+"""
+Prueba de carga de las rutas principales contra una línea base guardada.
+Ejecutar: python manage.py medir_carga [--usuarios 8] [--duracion 30] [--linea-base rendimiento/linea_base.json]
+
+Corre ``empleados.carga.PruebaCarga`` sobre una base creada con
+``generar_datos`` y muestra por ruta p50/p95/p99, fallos y consultas SQL,
+además de las peticiones por segundo. El resultado se guarda en
+``--salida`` y se compara con ``--linea-base``: si hay regresiones el
+comando termina con error. Si la línea base no existe, o con
+``--actualizar``, el resultado pasa a ser la nueva línea base.
+
+Escribe en la base (crea y aprueba solicitudes): no correr en producción.
+"""
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from empleados.carga import PruebaCarga, comparar
+from empleados.generacion import PASSWORD_DEFAULT
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia, rendimiento y consultas de las rutas principales y los compara con la línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=8,
+                            help='Usuarios simulados concurrentes (default: 8)')
+        parser.add_argument('--duracion', type=float, default=30,
+                            help='Segundos medidos (default: 30)')
+        parser.add_argument('--calentamiento', type=float, default=5,
+                            help='Segundos iniciales que no se miden (default: 5)')
+        parser.add_argument('--acciones', type=int, default=3,
+                            help='Operaciones por sesión después del login (default: 3)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Semilla de los usuarios simulados (default: 42)')
+        parser.add_argument('--password', default=PASSWORD_DEFAULT,
+                            help='Contraseña de los usuarios generados')
+        parser.add_argument('--linea-base', default='rendimiento/linea_base.json',
+                            help='JSON con la línea base, relativo a BASE_DIR (default: rendimiento/linea_base.json)')
+        parser.add_argument('--salida', default='rendimiento/ultima_ejecucion.json',
+                            help='JSON donde se guarda este resultado (default: rendimiento/ultima_ejecucion.json)')
+        parser.add_argument('--actualizar', action='store_true',
+                            help='Guardar este resultado como la nueva línea base')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Aumento relativo de p95 (y caída de peticiones/s) tolerado (default: 0.2)')
+        parser.add_argument('--margen-ms', type=float, default=5.0,
+                            help='Aumento mínimo de p95 en ms para marcar regresión (default: 5)')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['duracion'] <= 0 or options['acciones'] < 1:
+            raise CommandError('--usuarios, --duracion y --acciones deben ser mayores que cero')
+
+        prueba = PruebaCarga(
+            usuarios=options['usuarios'],
+            duracion=options['duracion'],
+            calentamiento=max(0, options['calentamiento']),
+            acciones=options['acciones'],
+            semilla=options['seed'],
+            password=options['password'],
+        )
+        faltantes = prueba.datos.faltantes()
+        if len(faltantes) == 4:
+            raise CommandError('No hay usuarios generados; crear los datos con: python manage.py generar_datos')
+        if faltantes:
+            self.stdout.write(self.style.WARNING(f'Sin usuarios para: {", ".join(faltantes)}'))
+
+        self.stdout.write(
+            f'{options["usuarios"]} usuarios simulados, {options["calentamiento"]:g}s de calentamiento '
+            f'y {options["duracion"]:g}s medidos...'
+        )
+        resultado = prueba.ejecutar()
+        self._mostrar(resultado)
+
+        salida = Path(settings.BASE_DIR, options['salida'])
+        self._guardar(salida, resultado)
+        self.stdout.write(f'Resultado guardado en {salida}')
+
+        linea_base = Path(settings.BASE_DIR, options['linea_base'])
+        if options['actualizar'] or not linea_base.exists():
+            self._guardar(linea_base, resultado)
+            self.stdout.write(self.style.SUCCESS(f'✓ Línea base guardada en {linea_base}'))
+            return
+
+        with open(linea_base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        if base.get('configuracion') != resultado['configuracion']:
+            self.stdout.write(self.style.WARNING('La línea base se tomó con otra configuración de la prueba'))
+        if ({k: base['entorno'].get(k) for k in ('base_de_datos', 'perfiles')}
+                != {k: resultado['entorno'][k] for k in ('base_de_datos', 'perfiles')}):
+            self.stdout.write(self.style.WARNING('La línea base se tomó con otra base de datos o volumen de datos'))
+
+        regresiones = comparar(resultado, base, options['tolerancia'], options['margen_ms'])
+        if regresiones:
+            for regresion in regresiones:
+                self.stdout.write(self.style.ERROR(f'  {regresion}'))
+            raise CommandError(
+                f'{len(regresiones)} regresiones respecto a la línea base del {base["entorno"]["fecha"]} '
+                f'(commit {base["entorno"]["commit"] or "desconocido"})'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ Sin regresiones respecto a {linea_base}'))
+
+    def _guardar(self, ruta, resultado):
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+            archivo.write('\n')
+
+    def _mostrar(self, resultado):
+        self.stdout.write(
+            f'{"ruta":<22} {"n":>6} {"fallos":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"consultas":>9} {"req/s":>7}'
+        )
+        for ruta, medida in resultado['rutas'].items():
+            p50, p95, p99 = (
+                '-' if medida[campo] is None else f'{medida[campo]:.1f}' for campo in ('p50_ms', 'p95_ms', 'p99_ms')
+            )
+            consultas = '-' if medida['consultas_p50'] is None else medida['consultas_p50']
+            self.stdout.write(
+                f'{ruta:<22} {medida["peticiones"]:>6} {medida["fallos"]:>6} {p50:>8} {p95:>8} {p99:>8} '
+                f'{consultas:>9} {medida["por_segundo"]:>7.1f}'
+            )
+        self.stdout.write(
+            f'Total: {resultado["peticiones"]} peticiones, {resultado["fallos"]} fallos, '
+            f'{resultado["por_segundo"]:.1f} peticiones/s'
+        )
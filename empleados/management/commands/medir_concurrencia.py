@@ -0,0 +1,179 @@
+"""
+Rendimiento de SQLite con varios procesos escribiendo a la vez, sin y con el
+perfil de producción (ver ``empleados.basedatos``).
+Ejecutar: python manage.py medir_concurrencia [--procesos 4] [--usuarios 4] [--duracion 20]
+
+Para cada configuración lanza ``--procesos`` procesos al mismo tiempo, como
+los workers de gunicorn, y cada uno corre ``empleados.carga.PruebaCarga``
+con ``--usuarios`` hilos: inicios de sesión, solicitudes, aprobaciones y
+dashboards sobre la misma base. Cada proceso aprueba solicitudes distintas.
+
+- ``base``: journal ``DELETE``, ``BEGIN`` diferido, sin pragmas, sin
+  conexiones persistentes ni reintentos (``RH_SQLITE_PRODUCCION=0``);
+- ``produccion``: WAL y pragmas, ``BEGIN IMMEDIATE``, ``CONN_MAX_AGE`` y
+  reintentos (``RH_SQLITE_PRODUCCION=1``).
+
+Muestra por ruta peticiones, fallos (la mayoría, "database is locked") y
+p50/p95, y el total de peticiones correctas por segundo. Al terminar la base
+vuelve a su modo de journal original.
+
+Escribe en la base: correrlo sobre una base creada con ``generar_datos``.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from empleados.carga import PruebaCarga, percentil, _redondear
+from empleados.generacion import PASSWORD_DEFAULT
+
+
+MODOS = {'base': '0', 'produccion': '1'}
+
+
+class Command(BaseCommand):
+    help = 'Compara SQLite sin y con el perfil de producción con varios procesos concurrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=4,
+                            help='Procesos simultáneos (default: 4)')
+        parser.add_argument('--usuarios', type=int, default=4,
+                            help='Usuarios simulados (hilos) por proceso (default: 4)')
+        parser.add_argument('--duracion', type=float, default=20,
+                            help='Segundos medidos en cada configuración (default: 20)')
+        parser.add_argument('--calentamiento', type=float, default=3,
+                            help='Segundos iniciales que no se miden (default: 3)')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Semilla de los usuarios simulados (default: 42)')
+        parser.add_argument('--password', default=PASSWORD_DEFAULT,
+                            help='Contraseña de los usuarios generados')
+        parser.add_argument('--particion', type=int,
+                            help='Uso interno: correr como el proceso N e imprimir el resultado en JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'La base es {connection.vendor}: esta comparación es para SQLite')
+        if min(options['procesos'], options['usuarios']) < 1 or options['duracion'] <= 0:
+            raise CommandError('--procesos, --usuarios y --duracion deben ser mayores que cero')
+        if options['particion'] is not None:
+            self._trabajador(options)
+            return
+
+        journal_original = self._journal()
+        try:
+            resultados = {}
+            for modo, valor in MODOS.items():
+                # El modo WAL queda guardado en el archivo: la base empieza en DELETE
+                self._journal('DELETE')
+                connection.close()
+                self.stdout.write(
+                    f'{modo}: {options["procesos"]} procesos x {options["usuarios"]} usuarios, '
+                    f'{options["duracion"]:g}s...'
+                )
+                resultados[modo] = self._medir(options, valor)
+        finally:
+            self._journal(journal_original)
+        self._mostrar(resultados, options)
+
+    def _journal(self, modo=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode = {modo}' if modo else 'PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def _medir(self, options, produccion):
+        entorno = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'rh_project.settings'),
+            'RH_SQLITE_PRODUCCION': produccion,
+            'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])),
+        }
+        procesos = []
+        for particion in range(options['procesos']):
+            comando = [
+                sys.executable, '-m', 'django', 'medir_concurrencia',
+                '--particion', str(particion), '--procesos', str(options['procesos']),
+                '--usuarios', str(options['usuarios']), '--duracion', str(options['duracion']),
+                '--calentamiento', str(options['calentamiento']), '--seed', str(options['seed']),
+                '--password', options['password'],
+            ]
+            procesos.append(subprocess.Popen(
+                comando, env=entorno, cwd=settings.BASE_DIR,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            ))
+
+        rutas, journal = {}, set()
+        for proceso in procesos:
+            salida, errores = proceso.communicate()
+            if proceso.returncode != 0:
+                self.stderr.write(errores[-4000:])
+                raise CommandError('Falló un proceso de la prueba')
+            resultado = json.loads(salida.strip().splitlines()[-1])
+            journal.add(resultado['journal'])
+            for ruta, datos in resultado['rutas'].items():
+                total = rutas.setdefault(ruta, {'latencias': [], 'fallos': 0})
+                total['latencias'].extend(datos['latencias'])
+                total['fallos'] += datos['fallos']
+
+        resumen = {}
+        for ruta, datos in sorted(rutas.items()):
+            latencias = sorted(datos['latencias'])
+            resumen[ruta] = {
+                'correctas': len(latencias),
+                'fallos': datos['fallos'],
+                'p50_ms': _redondear(percentil(latencias, 50)),
+                'p95_ms': _redondear(percentil(latencias, 95)),
+            }
+        correctas = sum(ruta['correctas'] for ruta in resumen.values())
+        return {
+            'journal': ', '.join(sorted(journal)),
+            'rutas': resumen,
+            'correctas': correctas,
+            'fallos': sum(ruta['fallos'] for ruta in resumen.values()),
+            'por_segundo': round(correctas / options['duracion'], 1),
+        }
+
+    def _trabajador(self, options):
+        prueba = PruebaCarga(
+            usuarios=options['usuarios'],
+            duracion=options['duracion'],
+            calentamiento=max(0, options['calentamiento']),
+            semilla=options['seed'] + options['particion'],
+            password=options['password'],
+            particion=(options['particion'], options['procesos']),
+        )
+        if len(prueba.datos.faltantes()) == 4:
+            raise CommandError('No hay usuarios generados; crear los datos con: python manage.py generar_datos')
+        prueba.ejecutar()
+        rutas = {
+            ruta: {'latencias': datos['latencias'], 'fallos': datos['fallos']}
+            for ruta, datos in prueba.resultados.rutas.items()
+        }
+        self.stdout.write(json.dumps({'journal': self._journal(), 'rutas': rutas}))
+
+    def _mostrar(self, resultados, options):
+        base, produccion = resultados['base'], resultados['produccion']
+        self.stdout.write(
+            f'{"ruta":<22} {"base ok":>8} {"fallos":>6} {"p50":>7} {"p95":>7}   '
+            f'{"prod ok":>8} {"fallos":>6} {"p50":>7} {"p95":>7}'
+        )
+        for ruta in sorted(set(base['rutas']) | set(produccion['rutas'])):
+            celdas = []
+            for resultado in (base, produccion):
+                medida = resultado['rutas'].get(ruta, {'correctas': 0, 'fallos': 0, 'p50_ms': None, 'p95_ms': None})
+                p50, p95 = ('-' if medida[campo] is None else f'{medida[campo]:.0f}' for campo in ('p50_ms', 'p95_ms'))
+                celdas.append(f'{medida["correctas"]:>8} {medida["fallos"]:>6} {p50:>7} {p95:>7}')
+            self.stdout.write(f'{ruta:<22} {celdas[0]}   {celdas[1]}')
+        for modo, resultado in resultados.items():
+            self.stdout.write(
+                f'{modo} (journal {resultado["journal"]}): {resultado["correctas"]} correctas, '
+                f'{resultado["fallos"]} fallos, {resultado["por_segundo"]:.1f} peticiones correctas/s'
+            )
+        if base['por_segundo']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Producción / base: {produccion["por_segundo"] / base["por_segundo"]:.2f}x peticiones correctas/s'
+            ))
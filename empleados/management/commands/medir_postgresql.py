@@ -0,0 +1,234 @@
+"""
+Costo de las conexiones y de la exportación con PostgreSQL según la
+configuración de ``rh_project.settings_production`` (variables ``DB_*``).
+Ejecutar: python manage.py medir_postgresql --settings=rh_project.settings_production [--concurrencia 8] [--peticiones 400]
+
+Cada configuración corre en un proceso aparte, contra la misma base:
+
+- conexiones: ``--concurrencia`` hilos con ``django.test.Client`` piden los
+  dashboards de los cuatro roles, como los hilos de un worker:
+
+  - ``sin_reuso``: una conexión nueva por petición (``DB_CONN_MAX_AGE=0``);
+  - ``persistentes``: ``DB_CONN_MAX_AGE=60`` con health checks;
+  - ``pool``: pool de psycopg 3 con ``DB_POOL_MAX=--concurrencia``;
+
+- exportación: el CSV completo del directorio con cursor del lado del
+  servidor (``DB_SERVER_SIDE_CURSORS=1``) y sin él (``0``): tiempo hasta la
+  primera fila, tiempo total y memoria máxima del proceso.
+
+Con ``DB_HOST`` en otra máquina el costo de abrir conexiones (TCP, TLS,
+autenticación) es mayor que en una base local. Solo hace lecturas (y las
+sesiones del inicio).
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from empleados.carga import DASHBOARDS, MEZCLA, percentil, _redondear
+from empleados.models import Perfil
+
+
+CONEXIONES = {
+    'sin_reuso': {'DB_POOL_MAX': '0', 'DB_CONN_MAX_AGE': '0'},
+    'persistentes': {'DB_POOL_MAX': '0', 'DB_CONN_MAX_AGE': '60'},
+    'pool': {'DB_CONN_MAX_AGE': '0'},  # DB_POOL_MAX = --concurrencia
+}
+EXPORTACION = {
+    'cursor_servidor': {'DB_SERVER_SIDE_CURSORS': '1'},
+    'cursor_cliente': {'DB_SERVER_SIDE_CURSORS': '0'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara conexiones sin reuso, persistentes y con pool, y la exportación con y sin cursor del servidor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=8,
+                            help='Hilos simultáneos (default: 8)')
+        parser.add_argument('--peticiones', type=int, default=400,
+                            help='Peticiones medidas por configuración (default: 400)')
+        parser.add_argument('--sin-exportacion', action='store_true',
+                            help='No medir la exportación')
+        parser.add_argument('--medir', choices=['conexiones', 'exportacion'],
+                            help='Uso interno: medir en este proceso e imprimir el resultado en JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(
+                f'La base es {connection.vendor}: usar --settings=rh_project.settings_production'
+            )
+        if options['concurrencia'] < 1 or options['peticiones'] < 1:
+            raise CommandError('--concurrencia y --peticiones deben ser mayores que cero')
+        if options['medir'] == 'conexiones':
+            self._medir_conexiones(options)
+            return
+        if options['medir'] == 'exportacion':
+            self._medir_exportacion()
+            return
+
+        conexiones = {}
+        for nombre, variables in CONEXIONES.items():
+            if nombre == 'pool':
+                variables = {**variables, 'DB_POOL_MAX': str(options['concurrencia'])}
+            conexiones[nombre] = self._subproceso(nombre, 'conexiones', variables, options)
+        self._mostrar_conexiones(conexiones, options)
+
+        if not options['sin_exportacion']:
+            exportacion = {
+                nombre: self._subproceso(nombre, 'exportacion', variables, options)
+                for nombre, variables in EXPORTACION.items()
+            }
+            self._mostrar_exportacion(exportacion)
+
+    def _subproceso(self, nombre, medir, variables, options):
+        self.stdout.write(f'Midiendo {nombre}...')
+        comando = [
+            sys.executable, '-m', 'django', 'medir_postgresql', '--medir', medir,
+            '--concurrencia', str(options['concurrencia']),
+            '--peticiones', str(options['peticiones']),
+        ]
+        entorno = {
+            **os.environ,
+            **variables,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            'PYTHONPATH': os.pathsep.join(filter(None, [str(settings.BASE_DIR), os.environ.get('PYTHONPATH')])),
+        }
+        proceso = subprocess.run(comando, env=entorno, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            self.stderr.write(proceso.stderr[-4000:])
+            raise CommandError(f'Falló la medición {nombre}')
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def _usuario(self, *tipos):
+        perfil = Perfil.objects.filter(activo=True, tipo_perfil__in=tipos).select_related('usuario').first()
+        if perfil is None:
+            raise CommandError(
+                f'No hay perfiles activos de tipo {" o ".join(tipos)}; '
+                'crear datos con: python manage.py generar_datos'
+            )
+        return perfil.usuario
+
+    def _host(self):
+        return next(
+            (host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')),
+            'localhost',
+        )
+
+    def _medir_conexiones(self, options):
+        host = self._host()
+        rutas, sesiones = [], {}
+        for tipo, _ in MEZCLA:
+            cliente = Client(HTTP_HOST=host)
+            cliente.force_login(self._usuario(tipo))
+            sesiones[tipo] = cliente.cookies
+            rutas.append((tipo, reverse(DASHBOARDS[tipo][1])))
+            # Calentamiento: plantillas, caches y pool
+            cliente.get(rutas[-1][1])
+        connections.close_all()
+
+        latencias, fallos = defaultdict(list), defaultdict(int)
+        lock = threading.Lock()
+        errores = []
+        por_hilo = -(-options['peticiones'] // options['concurrencia'])
+
+        def trabajador(numero):
+            try:
+                clientes = {}
+                for tipo, cookies in sesiones.items():
+                    clientes[tipo] = Client(HTTP_HOST=host)
+                    clientes[tipo].cookies.update(cookies)
+                for indice in range(por_hilo):
+                    tipo, url = rutas[(numero + indice) % len(rutas)]
+                    inicio = time.perf_counter()
+                    respuesta = clientes[tipo].get(url)
+                    milisegundos = (time.perf_counter() - inicio) * 1000
+                    with lock:
+                        if respuesta.status_code == 200:
+                            latencias[tipo].append(milisegundos)
+                        else:
+                            fallos[tipo] += 1
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajador, args=(numero,)) for numero in range(options['concurrencia'])]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+        if errores:
+            raise errores[0]
+
+        todas = sorted(latencia for lista in latencias.values() for latencia in lista)
+        total = len(todas) + sum(fallos.values())
+        self.stdout.write(json.dumps({
+            'p50_ms': _redondear(percentil(todas, 50)),
+            'p95_ms': _redondear(percentil(todas, 95)),
+            'p99_ms': _redondear(percentil(todas, 99)),
+            'peticiones': total,
+            'fallos': sum(fallos.values()),
+            'por_segundo': round(total / segundos, 1),
+        }))
+
+    def _medir_exportacion(self):
+        cliente = Client(HTTP_HOST=self._host())
+        cliente.force_login(self._usuario('RH', 'ADMIN'))
+        memoria_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        inicio = time.perf_counter()
+        respuesta = cliente.get(reverse('empleados:exportar_usuarios'))
+        if respuesta.status_code != 200:
+            raise CommandError(f'La exportación respondió {respuesta.status_code}')
+        primera_fila = None
+        filas = -1  # encabezado
+        for parte in respuesta.streaming_content:
+            filas += parte.count(b'\n')
+            if primera_fila is None and filas > 0:
+                primera_fila = time.perf_counter() - inicio
+        total = time.perf_counter() - inicio
+        respuesta.close()
+
+        # ru_maxrss está en KiB en Linux
+        memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memoria_inicial
+        self.stdout.write(json.dumps({
+            'filas': filas,
+            'primera_fila_ms': _redondear(None if primera_fila is None else primera_fila * 1000),
+            'total_ms': _redondear(total * 1000),
+            'memoria_mb': round(memoria / 1024, 1),
+        }))
+
+    def _mostrar_conexiones(self, resultados, options):
+        self.stdout.write(f'Dashboards con {options["concurrencia"]} hilos:')
+        self.stdout.write(f'{"conexiones":<14} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"fallos":>7} {"req/s":>8}')
+        for nombre, medida in resultados.items():
+            p50, p95, p99 = (
+                '-' if medida[campo] is None else f'{medida[campo]:.1f}' for campo in ('p50_ms', 'p95_ms', 'p99_ms')
+            )
+            self.stdout.write(
+                f'{nombre:<14} {p50:>8} {p95:>8} {p99:>8} {medida["fallos"]:>7} {medida["por_segundo"]:>8.1f}'
+            )
+
+    def _mostrar_exportacion(self, resultados):
+        self.stdout.write('Exportación CSV del directorio:')
+        self.stdout.write(f'{"cursor":<16} {"filas":>8} {"1a fila ms":>11} {"total ms":>10} {"memoria MB":>11}')
+        for nombre, medida in resultados.items():
+            primera = '-' if medida['primera_fila_ms'] is None else f'{medida["primera_fila_ms"]:.0f}'
+            self.stdout.write(
+                f'{nombre:<16} {medida["filas"]:>8} {primera:>11} {medida["total_ms"]:>10.0f} '
+                f'{medida["memoria_mb"]:>11.1f}'
+            )
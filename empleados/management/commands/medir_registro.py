@@ -0,0 +1,115 @@
+"""
+Medir cuánto tiempo agrega el logging a cada petición.
+Ejecutar: python manage.py medir_registro [--peticiones 5000] [--lineas 3] [--latencia-ms 0]
+
+Simula peticiones que registran ``--lineas`` mensajes cada una (una con el
+extra ``medicion``, como ``MedicionMiddleware``) y compara, en un directorio
+temporal, el tiempo que pasa la petición en el logging con:
+
+- sin logs: solo el contexto de la petición, la línea base;
+- FileHandler: la configuración anterior, texto escrito en la petición;
+- cola JSON: ``empleados.bitacora``, la petición solo encola y el hilo
+  escritor formatea y escribe.
+
+``--latencia-ms`` agrega una espera a cada escritura para simular un disco
+lento u ocupado; con la cola esa espera no la paga la petición. Para la cola
+también se reporta cuánto tarda el hilo escritor en vaciarla.
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from empleados.bitacora import FiltroPeticion, FormatoJSON, ManejadorCola, _peticion_actual
+
+
+def _con_latencia(manejador, segundos):
+    """Hacer que cada escritura de ``manejador`` tarde ``segundos`` más"""
+    if segundos:
+        emitir = manejador.emit
+
+        def emitir_lento(record):
+            time.sleep(segundos)
+            emitir(record)
+
+        manejador.emit = emitir_lento
+    return manejador
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo por petición del logging síncrono y del logging por cola'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=5000,
+                            help='Peticiones simuladas por modo (default: 5000)')
+        parser.add_argument('--lineas', type=int, default=3,
+                            help='Mensajes registrados por petición (default: 3)')
+        parser.add_argument('--latencia-ms', type=float, default=0,
+                            help='Espera agregada a cada escritura a disco (default: 0)')
+
+    def handle(self, *args, **options):
+        if options['peticiones'] < 1 or options['lineas'] < 1:
+            raise CommandError('--peticiones y --lineas deben ser mayores que cero')
+        self.peticiones = options['peticiones']
+        self.lineas = options['lineas']
+        latencia = options['latencia_ms'] / 1000
+
+        logger = logging.getLogger('empleados.medir_registro')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            base, _ = self._medir(logger, None)
+
+            archivo = logging.FileHandler(os.path.join(directorio, 'sincrono.log'))
+            archivo.setFormatter(logging.Formatter(
+                '{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{'
+            ))
+            sincrono, _ = self._medir(logger, _con_latencia(archivo, latencia))
+
+            cola = ManejadorCola(os.path.join(directorio, 'cola.log'))
+            cola.setFormatter(FormatoJSON())
+            cola.addFilter(FiltroPeticion())
+            _con_latencia(cola.destino, latencia)
+            encolado, vaciado = self._medir(logger, cola)
+
+        self.stdout.write(f'{self.peticiones} peticiones, {self.lineas} mensajes por petición, '
+                          f'latencia de escritura {options["latencia_ms"]} ms')
+        self.stdout.write(f'{"modo":<14} {"µs/petición":>12} {"sobrecosto":>12}')
+        for nombre, segundos in (('sin logs', base), ('FileHandler', sincrono), ('cola JSON', encolado)):
+            por_peticion = segundos * 1e6 / self.peticiones
+            sobrecosto = (segundos - base) * 1e6 / self.peticiones
+            self.stdout.write(f'{nombre:<14} {por_peticion:>12.1f} {sobrecosto:>12.1f}')
+        self.stdout.write(f'El hilo escritor terminó {vaciado * 1000:.0f} ms después de la última petición')
+
+    def _medir(self, logger, manejador):
+        """``(segundos en las peticiones, segundos hasta vaciar la cola)``"""
+        logger.handlers = [manejador] if manejador is not None else []
+        fabrica = RequestFactory()
+        usuario = AnonymousUser()
+        medicion = {'vista': 'empleados:dashboard', 'total_ms': 12.5, 'sql': 4}
+        total = 0.0
+        for numero in range(self.peticiones):
+            request = fabrica.get('/')
+            request.request_id = f'{numero:032x}'
+            request.user = usuario
+            inicio = time.perf_counter()
+            token = _peticion_actual.set(request)
+            if manejador is not None:
+                logger.warning('vista=%s total_ms=%s', medicion['vista'], medicion['total_ms'],
+                               extra={'medicion': medicion})
+                for linea in range(1, self.lineas):
+                    logger.info('Mensaje %d de la petición %d', linea, numero)
+            _peticion_actual.reset(token)
+            total += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        if manejador is not None:
+            manejador.close()
+        logger.handlers = []
+        return total, time.perf_counter() - inicio
@@ -0,0 +1,79 @@
+"""
+Medir el renderizado de los dashboards con y sin cache de fragmentos.
+Ejecutar: python manage.py medir_renderizado [--repeticiones 200]
+
+Para un perfil de ejemplo de cada rol renderiza ``base.html`` con el panel de
+estadísticas del dashboard, primero con ``FRAGMENTOS_CACHE_SEGUNDOS = 0``
+(grupos y estadísticas consultados en cada página) y después con el cache
+activo, y reporta el tiempo medio y las consultas por página. La primera
+página con cache (la que llena los fragmentos) no entra en la media.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import engines
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from empleados.fragmentos import panel_estadisticas
+from empleados.models import Perfil
+
+
+PAGINA = (
+    "{% extends 'base.html' %}{% block content %}"
+    "{% include 'empleados/partials/estadisticas.html' with panel=panel_estadisticas %}"
+    "{% endblock %}"
+)
+
+# rol del panel: tipo de perfil
+ROLES = {'admin': 'ADMIN', 'rh': 'RH', 'jefe': 'JEFE_AREA', 'empleado': 'EMPLEADO'}
+
+
+class Command(BaseCommand):
+    help = 'Compara el tiempo de renderizado de los dashboards con y sin cache de fragmentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeticiones', type=int, default=200,
+            help='Páginas renderizadas por rol y modo (default: 200)'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+
+        plantilla = engines['django'].from_string(PAGINA)
+        sin_cache = {**settings.RH_CONFIG, 'FRAGMENTOS_CACHE_SEGUNDOS': 0}
+        self.stdout.write(f'{"rol":<10} {"sin cache":>22} {"con cache":>22}')
+        for rol, tipo in ROLES.items():
+            perfil = Perfil.objects.filter(activo=True, tipo_perfil=tipo).select_related('usuario').first()
+            if perfil is None:
+                self.stdout.write(f'{rol:<10} sin perfiles {tipo} activos')
+                continue
+            with override_settings(RH_CONFIG=sin_cache):
+                antes = self._medir(plantilla, rol, perfil, options['repeticiones'])
+            cache.clear()
+            self._medir(plantilla, rol, perfil, 1)
+            despues = self._medir(plantilla, rol, perfil, options['repeticiones'])
+            self.stdout.write(f'{rol:<10} {self._formato(antes):>22} {self._formato(despues):>22}')
+
+    def _medir(self, plantilla, rol, perfil, repeticiones):
+        """``(milisegundos, consultas)`` medios por página"""
+        fabrica = RequestFactory()
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                request = fabrica.get('/')
+                request.user = perfil.usuario
+                request.perfil = perfil
+                plantilla.render({'panel_estadisticas': panel_estadisticas(rol, perfil)}, request)
+            segundos = time.perf_counter() - inicio
+        return segundos * 1000 / repeticiones, len(consultas) / repeticiones
+
+    def _formato(self, medicion):
+        milisegundos, consultas = medicion
+        return f'{milisegundos:.2f} ms {consultas:.1f} q'
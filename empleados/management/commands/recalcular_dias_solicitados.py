@@ -0,0 +1,95 @@
+"""
+Recalcular ``dias_solicitados`` de todas las solicitudes con días hábiles.
+Ejecutar: python manage.py recalcular_dias_solicitados [--dry-run] [--sin-ajustes] [--lote 5000]
+
+Las solicitudes se leen por lotes con ``values_list`` y se cuentan con
+``calendario.dias_habiles_lote`` (vectorizado si NumPy está instalado). Solo
+se escriben las que cambian, con un UPDATE por cada valor distinto de días
+(hay pocos: la duración de las solicitudes está acotada); en las ya
+aprobadas por RH la diferencia se registra como AJUSTE en el libro de
+movimientos para que el saldo del empleado quede consistente. Todo el
+recálculo corre en una sola transacción: si falla no se guarda nada.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from empleados.calendario import dias_habiles_lote, MASCARA_DEFAULT
+from empleados.models import SolicitudVacaciones, MovimientoVacaciones
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los días solicitados de todas las solicitudes descontando fines de semana y festivos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo reportar, sin guardar cambios')
+        parser.add_argument(
+            '--sin-ajustes', action='store_true',
+            help='Corregir solo las solicitudes, sin registrar ajustes de saldo'
+        )
+        parser.add_argument('--lote', type=int, default=5000, help='Solicitudes por lote (default: 5000)')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        self.dry_run = options['dry_run']
+        self.ajustar_saldo = not options['sin_ajustes']
+        with transaction.atomic():
+            revisadas, cambiadas, ajustes = self._recalcular(options['lote'])
+
+        prefijo = '[dry-run] ' if self.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefijo}{revisadas} solicitudes revisadas, {cambiadas} con días distintos, '
+            f'{ajustes} ajustes de saldo'
+        ))
+
+    def _recalcular(self, tamano_lote):
+        filas = SolicitudVacaciones.objects.order_by('pk').values_list(
+            'id', 'empleado_id', 'estado', 'fecha_inicio', 'fecha_fin',
+            'dias_solicitados', 'empleado__departamento__dias_laborables',
+        )
+        revisadas = cambiadas = ajustes = 0
+        lote = []
+        for fila in filas.iterator(chunk_size=tamano_lote):
+            lote.append(fila)
+            if len(lote) >= tamano_lote:
+                cambios = self._procesar(lote)
+                cambiadas += cambios[0]
+                ajustes += cambios[1]
+                revisadas += len(lote)
+                lote = []
+        if lote:
+            cambios = self._procesar(lote)
+            cambiadas += cambios[0]
+            ajustes += cambios[1]
+            revisadas += len(lote)
+        return revisadas, cambiadas, ajustes
+
+    def _procesar(self, lote):
+        """Devuelve ``(cambiadas, ajustes)`` del lote"""
+        nuevos = dias_habiles_lote(
+            (inicio, fin, mascara or MASCARA_DEFAULT) for _, _, _, inicio, fin, _, mascara in lote
+        )
+        cambios = {}
+        por_dias = {}
+        movimientos = []
+        for (pk, empleado_id, estado, _, _, anteriores, _), dias in zip(lote, nuevos):
+            if dias == anteriores:
+                continue
+            cambios[pk] = dias
+            por_dias.setdefault(dias, []).append(pk)
+            if self.ajustar_saldo and estado == 'APROBADO_RH':
+                movimientos.append(MovimientoVacaciones(
+                    perfil_id=empleado_id,
+                    solicitud_id=pk,
+                    tipo='AJUSTE',
+                    dias=dias - anteriores,
+                    comentario='Recálculo de días hábiles',
+                ))
+
+        if cambios and not self.dry_run:
+            for dias, ids in por_dias.items():
+                SolicitudVacaciones.objects.filter(pk__in=ids).update(dias_solicitados=dias)
+            MovimientoVacaciones.registrar_varios(movimientos)
+        return len(cambios), len(movimientos)
@@ -0,0 +1,45 @@
+"""
+Recalcular la ruta materializada de la jerarquía de supervisores.
+Ejecutar: python manage.py reconstruir_jerarquia [--verificar]
+
+Normalmente la ruta se mantiene en ``Perfil.save()``; este comando repara
+datos cargados por fuera del ORM. Con ``--verificar`` compara, para cada
+supervisor, el subárbol por ruta contra el ``WITH RECURSIVE`` y no modifica
+nada.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from empleados.models import Perfil
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Perfil.ruta_jerarquia desde supervisor_id o verifica que esté al día'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Comparar rutas contra la consulta recursiva sin modificar datos'
+        )
+
+    def handle(self, *args, **options):
+        if not options['verificar']:
+            actualizados = Perfil.objects.reconstruir_jerarquia()
+            self.stdout.write(self.style.SUCCESS(f'{actualizados} rutas actualizadas'))
+            return
+
+        supervisores = Perfil.objects.filter(
+            pk__in=Perfil.objects.exclude(supervisor=None).values('supervisor_id')
+        ).only('id', 'ruta_jerarquia')
+        diferencias = 0
+        for supervisor in supervisores.iterator():
+            por_ruta = set(Perfil.objects.subordinados(supervisor).values_list('id', flat=True))
+            por_cte = set(Perfil.objects.subordinados(supervisor, usar_cte=True).values_list('id', flat=True))
+            if por_ruta != por_cte:
+                diferencias += 1
+                self.stderr.write(
+                    f'  Perfil {supervisor.pk}: {len(por_ruta ^ por_cte)} subordinados no coinciden'
+                )
+        if diferencias:
+            raise CommandError(f'{diferencias} subárboles desactualizados; ejecute sin --verificar')
+        self.stdout.write(self.style.SUCCESS('✓ La jerarquía materializada coincide con supervisor_id'))
@@ -0,0 +1,227 @@
+"""
+Métricas en formato de texto de Prometheus para ``/metrics``.
+
+Cada proceso acumula en memoria sus contadores e histogramas (peticiones por
+vista, consultas SQL, aciertos de cache); ``MedicionMiddleware`` los
+alimenta en cada petición. Con varios workers cada proceso vuelca su estado
+cada ``METRICAS_VOLCADO_SEGUNDOS`` a ``<METRICAS_DIRECTORIO>/metricas-<pid>.json``
+y ``/metrics`` suma los archivos de todos los procesos, de modo que
+cualquier worker que atienda la petición responde el total. Sin directorio
+configurado solo se exponen las métricas del propio proceso (servidor de
+desarrollo). El directorio debe vaciarse al arrancar el servidor, igual que
+con el modo multiproceso de ``prometheus_client``.
+
+Los indicadores del negocio (solicitudes pendientes por estado y por
+departamento, bandeja de notificaciones) salen de una agregación por índice
+que se cachea ``METRICAS_CACHE_SEGUNDOS``; un scrape no recorre tablas.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .estadisticas import ESTADOS_PENDIENTES
+from .models import SolicitudVacaciones, Notificacion
+
+
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nombre: (tipo, ayuda)
+DESCRIPCIONES = {
+    'rh_http_requests_total': ('counter', 'Peticiones atendidas por vista, método y estado HTTP'),
+    'rh_http_request_duration_seconds': ('histogram', 'Duración de las peticiones por vista'),
+    'rh_db_queries_total': ('counter', 'Consultas SQL ejecutadas por vista'),
+    'rh_db_query_duration_seconds_total': ('counter', 'Tiempo total en SQL por vista'),
+    'rh_cache_requests_total': ('counter', 'Lecturas de cache por uso y resultado (acierto/fallo)'),
+    'rh_solicitudes_pendientes': ('gauge', 'Solicitudes de vacaciones pendientes por estado'),
+    'rh_solicitudes_pendientes_departamento': ('gauge', 'Solicitudes pendientes por departamento'),
+    'rh_notificaciones': ('gauge', 'Notificaciones en la bandeja de salida por estado'),
+}
+
+CLAVE_DOMINIO = 'metricas:dominio'
+
+
+def _config(clave, default):
+    return settings.RH_CONFIG.get(clave, default)
+
+
+class Registro:
+    """Contadores e histogramas de este proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (nombre, ((etiqueta, valor), ...)) -> valor
+        self.contadores = {}
+        # (nombre, etiquetas) -> [conteo por cubeta..., conteo total, suma]
+        self.histogramas = {}
+        self._ultimo_volcado = time.monotonic()
+
+    def incrementar(self, nombre, etiquetas, valor=1):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, etiquetas, valor):
+        clave = (nombre, etiquetas)
+        with self._lock:
+            serie = self.histogramas.get(clave)
+            if serie is None:
+                serie = self.histogramas[clave] = [0] * (len(CUBETAS) + 2)
+            for indice, limite in enumerate(CUBETAS):
+                if valor <= limite:
+                    serie[indice] += 1
+                    break
+            serie[-2] += 1
+            serie[-1] += valor
+
+    def estado(self):
+        with self._lock:
+            return {
+                'contadores': [[n, list(e), v] for (n, e), v in self.contadores.items()],
+                'histogramas': [[n, list(e), list(s)] for (n, e), s in self.histogramas.items()],
+            }
+
+    def volcar(self, forzar=False):
+        """Escribir el estado al directorio compartido si ya pasó el intervalo"""
+        directorio = _config('METRICAS_DIRECTORIO', None)
+        if not directorio:
+            return
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_volcado < _config('METRICAS_VOLCADO_SEGUNDOS', 5):
+            return
+        self._ultimo_volcado = ahora
+        ruta = os.path.join(directorio, f'metricas-{os.getpid()}.json')
+        temporal = f'{ruta}.tmp'
+        with open(temporal, 'w') as archivo:
+            json.dump(self.estado(), archivo, separators=(',', ':'))
+        # Reemplazo atómico: /metrics nunca lee un archivo a medias
+        os.replace(temporal, ruta)
+
+
+registro = Registro()
+
+
+def observar_peticion(vista, metodo, estado, segundos, consultas, segundos_sql):
+    etiquetas_vista = (('vista', vista),)
+    registro.incrementar('rh_http_requests_total', (('vista', vista), ('metodo', metodo), ('estado', str(estado))))
+    registro.observar('rh_http_request_duration_seconds', etiquetas_vista, segundos)
+    registro.incrementar('rh_db_queries_total', etiquetas_vista, consultas)
+    registro.incrementar('rh_db_query_duration_seconds_total', etiquetas_vista, segundos_sql)
+    registro.volcar()
+
+
+def registrar_cache(uso, acierto):
+    """Contar una lectura de cache de ``uso`` ('perfil', 'organigrama', ...)"""
+    resultado = 'acierto' if acierto else 'fallo'
+    registro.incrementar('rh_cache_requests_total', (('cache', uso), ('resultado', resultado)))
+
+
+def _estados_procesos():
+    """Estados de todos los procesos (o solo de este sin directorio)"""
+    directorio = _config('METRICAS_DIRECTORIO', None)
+    if not directorio:
+        return [registro.estado()]
+    registro.volcar(forzar=True)
+    estados = []
+    for ruta in glob.glob(os.path.join(directorio, 'metricas-*.json')):
+        try:
+            with open(ruta) as archivo:
+                estados.append(json.load(archivo))
+        except (OSError, ValueError):
+            # El proceso pudo borrarlo o reemplazarlo mientras se leía
+            continue
+    return estados
+
+
+def indicadores_dominio():
+    """Pendientes por estado y departamento y bandeja de notificaciones, cacheados"""
+    datos = cache.get(CLAVE_DOMINIO)
+    if datos is not None:
+        return datos
+    por_estado = {estado: 0 for estado in ESTADOS_PENDIENTES}
+    por_departamento = {}
+    filas = SolicitudVacaciones.objects.filter(estado__in=ESTADOS_PENDIENTES).values_list(
+        'estado', 'empleado__departamento__nombre'
+    ).annotate(total=Count('id')).order_by()
+    for estado, departamento, total in filas:
+        por_estado[estado] += total
+        clave = (departamento or 'Sin departamento', estado)
+        por_departamento[clave] = por_departamento.get(clave, 0) + total
+    notificaciones = dict(
+        Notificacion.objects.filter(estado__in=['PENDIENTE', 'FALLIDA'])
+        .values_list('estado').annotate(total=Count('id')).order_by()
+    )
+    datos = {
+        'por_estado': list(por_estado.items()),
+        'por_departamento': [[d, e, t] for (d, e), t in por_departamento.items()],
+        'notificaciones': [[e, notificaciones.get(e, 0)] for e in ('PENDIENTE', 'FALLIDA')],
+    }
+    cache.set(CLAVE_DOMINIO, datos, _config('METRICAS_CACHE_SEGUNDOS', 30))
+    return datos
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer():
+    """Texto de ``/metrics`` (formato de exposición 0.0.4)"""
+    contadores = {}
+    histogramas = {}
+    for estado in _estados_procesos():
+        for nombre, etiquetas, valor in estado['contadores']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for nombre, etiquetas, serie in estado['histogramas']:
+            clave = (nombre, tuple(map(tuple, etiquetas)))
+            acumulada = histogramas.setdefault(clave, [0] * len(serie))
+            for indice, valor in enumerate(serie):
+                acumulada[indice] += valor
+
+    dominio = indicadores_dominio()
+    indicadores = {}
+    for estado, total in dominio['por_estado']:
+        indicadores[('rh_solicitudes_pendientes', (('estado', estado),))] = total
+    for departamento, estado, total in dominio['por_departamento']:
+        indicadores[('rh_solicitudes_pendientes_departamento',
+                     (('departamento', departamento), ('estado', estado)))] = total
+    for estado, total in dominio['notificaciones']:
+        indicadores[('rh_notificaciones', (('estado', estado),))] = total
+
+    lineas = []
+    for nombre, (tipo, ayuda) in DESCRIPCIONES.items():
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        if tipo == 'histogram':
+            for (serie_nombre, etiquetas), serie in sorted(histogramas.items()):
+                if serie_nombre != nombre:
+                    continue
+                acumulado = 0
+                for limite, conteo in zip(CUBETAS, serie):
+                    acumulado += conteo
+                    lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", limite),))} {acumulado}')
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", "+Inf"),))} {serie[-2]}')
+                lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {serie[-2]}')
+                lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_numero(serie[-1])}')
+            continue
+        valores = contadores if tipo == 'counter' else indicadores
+        for (serie_nombre, etiquetas), valor in sorted(valores.items()):
+            if serie_nombre == nombre:
+                lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_numero(valor)}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,358 @@
+"""
+Middleware del sistema de RH
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+import uuid
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as PlantillaDjango
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import metricas
+from .bitacora import _peticion_actual
+from .models import Perfil, perfil_cache_key
+from .replicas import (
+    COOKIE_ESCRITURA, EstadoLecturas, _estado, instrumentar_escrituras, lecturas, replica_configurada
+)
+
+
+logger_medicion = logging.getLogger('empleados.medicion')
+
+# Ids de petición aceptados desde el proxy (X-Request-ID)
+REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def cargar_perfil(user):
+    """
+    Perfil del usuario con departamento y supervisor en una sola consulta.
+
+    Si ``RH_CONFIG['PERFIL_CACHE_SEGUNDOS']`` es mayor que cero el perfil se
+    guarda en el cache por id de usuario; las señales de ``models`` lo
+    invalidan al guardar el ``Perfil`` o el ``User``. Con varios procesos
+    se necesita un cache compartido (Redis/Memcached), no ``LocMemCache``.
+    """
+    if not user.is_authenticated:
+        return None
+
+    segundos = settings.RH_CONFIG.get('PERFIL_CACHE_SEGUNDOS', 0)
+    if segundos:
+        perfil = cache.get(perfil_cache_key(user.pk))
+        metricas.registrar_cache('perfil', perfil is not None)
+        if perfil is not None:
+            return perfil
+
+    # Del primario aunque la vista lea de la réplica (ver empleados.replicas)
+    with lecturas(replica=False):
+        perfil = Perfil.objects.select_related(
+            'usuario', 'departamento', 'supervisor__usuario'
+        ).filter(usuario_id=user.pk).first()
+
+    if perfil is not None and segundos:
+        cache.set(perfil_cache_key(user.pk), perfil, segundos)
+    return perfil
+
+
+async def aperfil(request):
+    """
+    ``request.perfil`` para vistas async: se carga sin bloquear el event loop
+    (evaluar ``request.perfil`` ahí lanzaría ``SynchronousOnlyOperation``) y
+    queda guardado en el mismo objeto perezoso.
+    """
+    perfil = request.perfil
+    if perfil._wrapped is empty:
+        perfil._wrapped = await sync_to_async(cargar_perfil)(await request.auser())
+    return perfil._wrapped
+
+
+class MiddlewareSyncAsync:
+    """
+    Base de los middleware que funcionan en WSGI y en ASGI sin que Django
+    tenga que adaptarlos a un hilo en cada petición: ``__call__`` atiende el
+    modo sync y ``__acall__`` el async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.procesar(request)
+
+
+class PerfilMiddleware(MiddlewareSyncAsync):
+    """
+    Adjunta ``request.perfil``, evaluado de forma perezosa la primera vez que
+    se usa y reutilizado durante el resto de la petición, y ``request.aperfil()``
+    para las vistas async. Debe ir después de ``AuthenticationMiddleware``.
+    """
+
+    def _preparar(self, request):
+        request.perfil = SimpleLazyObject(lambda: cargar_perfil(request.user))
+        request.aperfil = lambda: aperfil(request)
+
+    def procesar(self, request):
+        self._preparar(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._preparar(request)
+        return await self.get_response(request)
+
+
+class ContextoPeticionMiddleware(MiddlewareSyncAsync):
+    """
+    Asigna ``request.request_id`` (el ``X-Request-ID`` del proxy si es válido,
+    uno nuevo si no), lo devuelve en la respuesta y deja la petición como
+    contexto de los logs para que ``empleados.bitacora.FiltroPeticion`` agregue
+    el id de la petición y del usuario a cada registro. Debe ir primero en
+    ``MIDDLEWARE`` para cubrir también los logs del resto del middleware.
+    """
+
+    def _request_id(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not REQUEST_ID_VALIDO.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return request_id
+
+    def procesar(self, request):
+        request_id = self._request_id(request)
+        token = _peticion_actual.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+    async def __acall__(self, request):
+        # La variable de contexto llega también a los hilos de sync_to_async
+        request_id = self._request_id(request)
+        token = _peticion_actual.set(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _peticion_actual.reset(token)
+        response['X-Request-ID'] = request_id
+        return response
+
+
+class Medicion:
+    """Tiempos y consultas acumulados durante una petición"""
+
+    __slots__ = ('consultas', 'sql', 'plantillas', '_lock')
+
+    def __init__(self):
+        self.consultas = 0
+        self.sql = 0.0
+        self.plantillas = 0.0
+        # Una vista async puede consultar desde varios hilos a la vez
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: se llama una vez por consulta en cada conexión
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.sql += time.perf_counter() - inicio
+                self.consultas += 1
+
+
+_medicion_actual = contextvars.ContextVar('medicion', default=None)
+_render_original = None
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    return medicion(execute, sql, params, many, context)
+
+
+def _agregar_medicion(connection, **kwargs):
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _medir_consulta)
+
+
+def instrumentar_consultas():
+    """
+    Medir las consultas de todas las conexiones, en cualquier hilo. Cada
+    conexión lleva un ``execute_wrapper`` permanente que suma a la medición
+    de la petición en curso (una variable de contexto, que ``sync_to_async``
+    copia a sus hilos). Un ``execute_wrapper`` por petición solo vería la
+    conexión del hilo que atiende la petición, y las vistas async consultan
+    desde otros hilos.
+    """
+    connection_created.connect(_agregar_medicion, dispatch_uid='empleados.medicion')
+    for conexion in connections.all(initialized_only=True):
+        _agregar_medicion(conexion)
+
+
+def _render_medido(self, context=None, request=None):
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        return _render_original(self, context, request)
+    inicio = time.perf_counter()
+    try:
+        return _render_original(self, context, request)
+    finally:
+        medicion.plantillas += time.perf_counter() - inicio
+
+
+def instrumentar_plantillas():
+    """
+    Medir el renderizado de plantillas en ``render()``, ``TemplateResponse``
+    y ``render_to_string``. Django solo envía ``template_rendered`` bajo el
+    test runner, así que se envuelve el ``render`` del backend de plantillas
+    (los ``{% include %}`` quedan dentro del tiempo de la plantilla que los
+    incluye).
+    """
+    global _render_original
+    if _render_original is None:
+        _render_original = PlantillaDjango.render
+        PlantillaDjango.render = _render_medido
+
+
+class MedicionMiddleware(MiddlewareSyncAsync):
+    """
+    Mide cada petición (tiempo total, consultas SQL, tiempo en SQL y en
+    plantillas), la acumula en las métricas de ``/metrics`` (ver
+    empleados.metricas) y registra una línea en el logger
+    ``empleados.medicion`` cuando supera ``RH_CONFIG['MEDICION_UMBRAL_MS']``
+    o ``RH_CONFIG['MEDICION_UMBRAL_CONSULTAS']``. Debe ir al principio de
+    ``MIDDLEWARE`` (después de ``ContextoPeticionMiddleware``) para incluir
+    el resto de middleware en el tiempo total.
+    Con ``RH_CONFIG['MEDICION_ACTIVA'] = False`` Django lo descarta al arrancar.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RH_CONFIG.get('MEDICION_ACTIVA', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.umbral_ms = settings.RH_CONFIG.get('MEDICION_UMBRAL_MS', 500)
+        self.umbral_consultas = settings.RH_CONFIG.get('MEDICION_UMBRAL_CONSULTAS', 50)
+        instrumentar_plantillas()
+        instrumentar_consultas()
+
+    def procesar(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        self.observar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        self.observar(request, response, medicion, time.perf_counter() - inicio)
+        return response
+
+    def observar(self, request, response, medicion, segundos):
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else '-'
+        metricas.observar_peticion(
+            vista, request.method, response.status_code, segundos, medicion.consultas, medicion.sql
+        )
+        total_ms = segundos * 1000
+        if total_ms >= self.umbral_ms or medicion.consultas >= self.umbral_consultas:
+            self.registrar(request, response, vista, medicion, total_ms)
+
+    def registrar(self, request, response, vista, medicion, total_ms):
+        datos = {
+            'vista': vista,
+            'metodo': request.method,
+            'estado': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'sql': medicion.consultas,
+            'sql_ms': round(medicion.sql * 1000, 1),
+            'plantillas_ms': round(medicion.plantillas * 1000, 1),
+        }
+        logger_medicion.warning(
+            ' '.join(f'{clave}={valor}' for clave, valor in datos.items()),
+            extra={'medicion': datos},
+        )
+
+
+class ReplicaMiddleware(MiddlewareSyncAsync):
+    """
+    Manda a la réplica las lecturas de las vistas ``@lectura_replica`` en GET
+    y HEAD, salvo que el cliente tenga la cookie de escritura reciente, y la
+    entrega cuando la petición escribió (ver ``empleados.replicas``). Sin el
+    alias ``replica`` en ``DATABASES`` Django lo descarta al arrancar.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configurada():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.segundos = settings.RH_CONFIG.get('REPLICA_ESCRITURA_SEGUNDOS', 300)
+        instrumentar_escrituras()
+        if self.async_mode:
+            # Sin salto a un hilo: no consulta nada
+            self.process_view = self._aprocess_view
+
+    def _elegir(self, request, view_func):
+        estado = _estado.get()
+        if (estado is not None and getattr(view_func, 'lectura_replica', False)
+                and request.method in ('GET', 'HEAD') and COOKIE_ESCRITURA not in request.COOKIES):
+            estado.replica = True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self._elegir(request, view_func)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self._elegir(request, view_func)
+
+    def _marcar(self, response, estado):
+        if estado.escribio:
+            response.set_cookie(
+                COOKIE_ESCRITURA, '1', max_age=self.segundos, httponly=True,
+                samesite='Lax', secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+    def procesar(self, request):
+        estado = EstadoLecturas()
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._marcar(response, estado)
+
+    async def __acall__(self, request):
+        estado = EstadoLecturas()
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._marcar(response, estado)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0003_configuracionsistema_remove_vacacion_empleado_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['departamento'], name='perfil_depto_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['tipo_perfil'], name='perfil_tipo_activo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['estado', 'fecha_solicitud'], name='solicitud_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['empleado', 'estado'], name='solicitud_empleado_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['estado', 'fecha_aprobacion_rh'], name='solicitud_estado_rh_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['estado', 'fecha_aprobacion_jefe'], name='solicitud_estado_jefe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(fields=['fecha_solicitud', 'id'], name='solicitud_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudvacaciones',
+            index=models.Index(condition=models.Q(('estado__in', ['PENDIENTE_JEFE', 'PENDIENTE_RH'])), fields=['fecha_solicitud', 'id'], name='solicitud_pendientes_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def saldo_inicial(apps, schema_editor):
+    """Registrar los días ya usados como movimiento inicial de cada perfil"""
+    Perfil = apps.get_model('empleados', 'Perfil')
+    MovimientoVacaciones = apps.get_model('empleados', 'MovimientoVacaciones')
+    perfiles = Perfil.objects.filter(dias_vacaciones_usados__gt=0).values_list('id', 'dias_vacaciones_usados')
+    MovimientoVacaciones.objects.bulk_create(
+        [
+            MovimientoVacaciones(perfil_id=perfil_id, tipo='AJUSTE', dias=dias, comentario='Saldo inicial')
+            for perfil_id, dias in perfiles.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0004_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoVacaciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('APROBACION', 'Aprobación'), ('CANCELACION', 'Cancelación'), ('AJUSTE', 'Ajuste')], max_length=20, verbose_name='Tipo')),
+                ('dias', models.IntegerField(help_text='Positivo consume días, negativo los devuelve', verbose_name='Días')),
+                ('comentario', models.TextField(blank=True, verbose_name='Comentario')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('perfil', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movimientos_vacaciones', to='empleados.perfil', verbose_name='Empleado')),
+                ('registrado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_registrados', to='empleados.perfil', verbose_name='Registrado por')),
+                ('solicitud', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos', to='empleados.solicitudvacaciones', verbose_name='Solicitud')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Vacaciones',
+                'verbose_name_plural': 'Movimientos de Vacaciones',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['perfil', 'fecha'], name='movimiento_perfil_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(saldo_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:03
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0005_movimientos_vacaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiaFestivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+            ],
+            options={
+                'verbose_name': 'Día Festivo',
+                'verbose_name_plural': 'Días Festivos',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AddField(
+            model_name='departamento',
+            name='dias_laborables',
+            field=models.CharField(default='1111100', help_text='Semana laboral de lunes a domingo, 1 = laborable (ej. 1111100)', max_length=7, validators=[django.core.validators.RegexValidator('^(?=.*1)[01]{7}$', 'Use siete dígitos 0/1 de lunes a domingo.')], verbose_name='Días Laborables'),
+        ),
+    ]
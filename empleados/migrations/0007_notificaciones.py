@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0006_calendario_laboral'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='resumen_diario',
+            field=models.BooleanField(default=False, help_text='Recibir las notificaciones en un solo correo al día', verbose_name='Resumen Diario'),
+        ),
+        migrations.CreateModel(
+            name='Notificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.CharField(choices=[('PENDIENTE_JEFE', 'Pendiente Jefe de Área'), ('APROBADO_JEFE', 'Aprobado por Jefe'), ('RECHAZADO_JEFE', 'Rechazado por Jefe'), ('PENDIENTE_RH', 'Pendiente RH'), ('APROBADO_RH', 'Aprobado por RH'), ('RECHAZADO_RH', 'Rechazado por RH'), ('CANCELADO', 'Cancelado')], max_length=20, verbose_name='Evento')),
+                ('resumen', models.BooleanField(default=False, verbose_name='En Resumen Diario')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADA', 'Enviada'), ('FALLIDA', 'Fallida'), ('OMITIDA', 'Omitida')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('disponible_en', models.DateTimeField(verbose_name='Enviar a partir de')),
+                ('reserva', models.CharField(blank=True, help_text='Worker que la tiene tomada', max_length=32, verbose_name='Reserva')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último Error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Envío')),
+                ('destinatario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='empleados.perfil', verbose_name='Destinatario')),
+                ('solicitud', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='empleados.solicitudvacaciones', verbose_name='Solicitud')),
+            ],
+            options={
+                'verbose_name': 'Notificación',
+                'verbose_name_plural': 'Notificaciones',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'PENDIENTE')), fields=['disponible_en', 'id'], name='notificacion_pendiente_idx'), models.Index(fields=['reserva'], name='notificacion_reserva_idx')],
+            },
+        ),
+    ]
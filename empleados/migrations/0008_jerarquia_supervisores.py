@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+
+def construir_rutas(apps, schema_editor):
+    """Calcular la ruta de cada perfil recorriendo desde las raíces"""
+    Perfil = apps.get_model('empleados', 'Perfil')
+    hijos = {}
+    for perfil_id, supervisor_id in Perfil.objects.values_list('id', 'supervisor_id'):
+        hijos.setdefault(supervisor_id, []).append(perfil_id)
+    rutas = {}
+    pendientes = [(perfil_id, '/') for perfil_id in hijos.get(None, [])]
+    while pendientes:
+        perfil_id, prefijo = pendientes.pop()
+        rutas[perfil_id] = f'{prefijo}{perfil_id}/'
+        pendientes.extend((hijo, rutas[perfil_id]) for hijo in hijos.get(perfil_id, []))
+    # Los perfiles en ciclos quedan sin ruta; reconstruir_jerarquia los repara
+    Perfil.objects.bulk_update(
+        [Perfil(pk=perfil_id, ruta_jerarquia=ruta) for perfil_id, ruta in rutas.items()],
+        ['ruta_jerarquia'], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0007_notificaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='ruta_jerarquia',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500, verbose_name='Ruta en la Jerarquía'),
+        ),
+        migrations.RunPython(construir_rutas, migrations.RunPython.noop),
+    ]
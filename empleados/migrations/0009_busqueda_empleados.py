@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:13
+
+from django.db import migrations, models
+
+from empleados.busqueda import texto_busqueda, asegurar_indice_sqlite, TABLA_FTS
+
+
+class _Usuario:
+    def __init__(self, username, first_name, last_name):
+        self.username, self.first_name, self.last_name = username, first_name, last_name
+
+
+def llenar_texto_busqueda(apps, schema_editor):
+    """Calcular texto_busqueda de los perfiles existentes"""
+    Perfil = apps.get_model('empleados', 'Perfil')
+    filas = Perfil.objects.values_list(
+        'id', 'usuario__username', 'usuario__first_name', 'usuario__last_name', 'numero_empleado'
+    )
+    cambios = [
+        (texto_busqueda(_Usuario(username, nombre, apellido), numero), perfil_id)
+        for perfil_id, username, nombre, apellido, numero in filas.iterator()
+    ]
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {quote(Perfil._meta.db_table)} SET {quote("texto_busqueda")} = %s WHERE {quote("id")} = %s',
+            cambios,
+        )
+
+
+def crear_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        asegurar_indice_sqlite(connection)
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS perfil_busqueda_trgm_idx '
+            'ON empleados_perfil USING gin (texto_busqueda gin_trgm_ops)'
+        )
+
+
+def eliminar_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for sufijo in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABLA_FTS}_{sufijo}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLA_FTS}')
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS perfil_busqueda_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleados', '0008_jerarquia_supervisores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='texto_busqueda',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='Texto de Búsqueda'),
+        ),
+        migrations.RunPython(llenar_texto_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
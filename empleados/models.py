@@ -1,11 +1,99 @@
-from django.db import models
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db import models, transaction, connections
+from django.db.models import F, Q, Max, Case, When, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat, Greatest, Length, Substr
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from datetime import date
 
+from .busqueda import texto_busqueda, asegurar_indice_sqlite
+
 User = get_user_model()
 
 
+def rango_subarbol(ruta, campo='ruta_jerarquia'):
+    """
+    Filtro por rango equivalente a ``ruta_jerarquia__startswith=ruta``.
+    Las rutas son ``/id/id/.../`` y ``'0'`` sigue a ``'/'`` en ASCII, así que
+    todo el subárbol queda en ``[ruta, ruta[:-1] + '0')``; a diferencia de
+    ``LIKE`` el rango usa el índice en SQLite y en PostgreSQL.
+    """
+    return Q(**{f'{campo}__gte': ruta, f'{campo}__lt': ruta[:-1] + '0'})
+
+
+class PerfilQuerySet(models.QuerySet):
+    """Consultas sobre la jerarquía de supervisores"""
+    
+    def subordinados(self, perfil, incluir_propio=False, usar_cte=False):
+        """
+        Perfiles que reportan directa o indirectamente a ``perfil``, en una
+        sola consulta. Usa la ruta materializada; si el perfil aún no tiene
+        ruta (o con ``usar_cte``) cae a un ``WITH RECURSIVE`` sobre
+        ``supervisor_id``.
+        """
+        if perfil.ruta_jerarquia and not usar_cte:
+            consulta = self.filter(rango_subarbol(perfil.ruta_jerarquia))
+            return consulta if incluir_propio else consulta.exclude(pk=perfil.pk)
+        
+        tabla = self.model._meta.db_table
+        sql = (
+            f'WITH RECURSIVE sub(id) AS ('
+            f'SELECT id FROM {tabla} WHERE supervisor_id = %s '
+            f'UNION SELECT p.id FROM {tabla} p JOIN sub ON p.supervisor_id = sub.id'
+            f') SELECT id FROM sub'
+        )
+        filtro = Q(pk__in=RawSQL(sql, (perfil.pk,)))
+        if incluir_propio:
+            filtro |= Q(pk=perfil.pk)
+        return self.filter(filtro)
+    
+    def reconstruir_jerarquia(self, tamano_lote=1000):
+        """
+        Recalcular ``ruta_jerarquia`` de todos los perfiles desde
+        ``supervisor_id`` (después de cargas con ``bulk_update`` o para
+        reparar). Los perfiles atrapados en un ciclo quedan como raíz.
+        Devuelve el número de perfiles actualizados.
+        """
+        filas = list(self.model.objects.values_list('id', 'supervisor_id', 'ruta_jerarquia'))
+        hijos = {}
+        for pk, supervisor_id, _ in filas:
+            hijos.setdefault(supervisor_id, []).append(pk)
+        
+        rutas = {}
+        pendientes = [(pk, '/') for pk in hijos.get(None, [])]
+        while pendientes:
+            pk, prefijo = pendientes.pop()
+            rutas[pk] = f'{prefijo}{pk}/'
+            pendientes.extend((hijo, rutas[pk]) for hijo in hijos.get(pk, []))
+        # Lo que no se alcanzó desde una raíz forma ciclos
+        for pk, _, _ in filas:
+            if pk not in rutas:
+                pendientes = [(pk, '/')]
+                while pendientes:
+                    actual, prefijo = pendientes.pop()
+                    if actual in rutas:
+                        continue
+                    rutas[actual] = f'{prefijo}{actual}/'
+                    pendientes.extend((hijo, rutas[actual]) for hijo in hijos.get(actual, []))
+        
+        cambios = [(rutas[pk], pk) for pk, _, ruta in filas if rutas[pk] != ruta]
+        # executemany con un UPDATE parametrizado: bulk_update arma un CASE
+        # por lote y es ~25 veces más lento con decenas de miles de filas
+        conexion = connections[self.db]
+        sql = 'UPDATE {} SET {} = %s WHERE {} = %s'.format(
+            *map(conexion.ops.quote_name, (self.model._meta.db_table, 'ruta_jerarquia', 'id'))
+        )
+        with transaction.atomic(using=self.db), conexion.cursor() as cursor:
+            for inicio in range(0, len(cambios), tamano_lote):
+                cursor.executemany(sql, cambios[inicio:inicio + tamano_lote])
+        if cambios:
+            invalidar_organigrama()
+        return len(cambios)
+
+
 class Perfil(models.Model):
     """Modelo unificado para todos los perfiles de usuario"""
     TIPOS_PERFIL = [
@@ -23,6 +111,12 @@ class Perfil(models.Model):
     puesto = models.CharField(max_length=100, verbose_name="Puesto")
     salario = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Salario")
     supervisor = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Supervisor")
+    # Ruta materializada de ids desde la raíz ("/1/5/12/"); se mantiene en save()
+    ruta_jerarquia = models.CharField(max_length=500, blank=True, default='', db_index=True, editable=False,
+                                      verbose_name="Ruta en la Jerarquía")
+    # Usuario, nombre y número normalizados para empleados.busqueda
+    texto_busqueda = models.CharField(max_length=500, blank=True, default='', editable=False,
+                                      verbose_name="Texto de Búsqueda")
     activo = models.BooleanField(default=True, verbose_name="Activo")
     
     # Información personal adicional
@@ -34,18 +128,122 @@ class Perfil(models.Model):
     dias_vacaciones_anuales = models.PositiveIntegerField(default=20, verbose_name="Días de Vacaciones Anuales")
     dias_vacaciones_usados = models.PositiveIntegerField(default=0, verbose_name="Días de Vacaciones Usados")
     
+    # Notificaciones
+    resumen_diario = models.BooleanField(default=False, verbose_name="Resumen Diario",
+                                         help_text="Recibir las notificaciones en un solo correo al día")
+    
     # Auditoría
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
+    objects = PerfilQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Perfil"
         verbose_name_plural = "Perfiles"
         ordering = ['usuario__last_name', 'usuario__first_name']
+        # Índices parciales sobre perfiles activos (SQLite y PostgreSQL);
+        # en backends sin soporte la condición se ignora
+        indexes = [
+            models.Index(fields=['departamento'], condition=models.Q(activo=True),
+                         name='perfil_depto_activo_idx'),
+            models.Index(fields=['tipo_perfil'], condition=models.Q(activo=True),
+                         name='perfil_tipo_activo_idx'),
+        ]
     
     def __str__(self):
         return f"{self.usuario.get_full_name()} - {self.get_tipo_perfil_display()}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Para detectar en save() si cambió el supervisor sin otra consulta
+        instancia._supervisor_original = instancia.__dict__.get('supervisor_id')
+        return instancia
+    
+    def clean(self):
+        super().clean()
+        if self.pk and self.supervisor_id:
+            ruta_supervisor = Perfil.objects.filter(pk=self.supervisor_id).values_list(
+                'ruta_jerarquia', flat=True
+            ).first() or ''
+            if self.supervisor_id == self.pk or f'/{self.pk}/' in ruta_supervisor:
+                raise ValidationError({'supervisor': 'El supervisor no puede ser un subordinado de este perfil.'})
+    
+    def save(self, *args, **kwargs):
+        self.texto_busqueda = texto_busqueda(self.usuario, self.numero_empleado)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'texto_busqueda'}
+        nuevo = self._state.adding
+        cambio_supervisor = getattr(self, '_supervisor_original', self.supervisor_id) != self.supervisor_id
+        if nuevo or cambio_supervisor or not self.ruta_jerarquia:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                self._actualizar_ruta()
+        else:
+            super().save(*args, **kwargs)
+        self._supervisor_original = self.supervisor_id
+    
+    def _actualizar_ruta(self):
+        """Recalcular la ruta propia y mover el subárbol con un solo UPDATE"""
+        prefijo = '/'
+        if self.supervisor_id:
+            prefijo = Perfil.objects.filter(pk=self.supervisor_id).values_list(
+                'ruta_jerarquia', flat=True
+            ).first() or '/'
+            if self.supervisor_id == self.pk or f'/{self.pk}/' in prefijo:
+                raise ValidationError('El supervisor no puede ser un subordinado de este perfil.')
+        nueva = f'{prefijo}{self.pk}/'
+        anterior = self.ruta_jerarquia
+        if anterior == nueva:
+            return
+        maximo = Perfil._meta.get_field('ruta_jerarquia').max_length
+        profundidad = len(anterior) if anterior else 0
+        if anterior:
+            profundidad = Perfil.objects.filter(rango_subarbol(anterior)).aggregate(
+                maximo=Max(Length('ruta_jerarquia'))
+            )['maximo'] or len(anterior)
+        if len(nueva) + profundidad - len(anterior) > maximo:
+            raise ValidationError('La jerarquía de supervisores es demasiado profunda.')
+        if anterior:
+            Perfil.objects.filter(rango_subarbol(anterior)).update(
+                ruta_jerarquia=Concat(Value(nueva), Substr('ruta_jerarquia', len(anterior) + 1))
+            )
+        else:
+            Perfil.objects.filter(pk=self.pk).update(ruta_jerarquia=nueva)
+        self.ruta_jerarquia = nueva
+    
+    def filtro_a_cargo(self, prefijo=''):
+        """
+        ``Q`` de los perfiles que este jefe supervisa según
+        ``RH_CONFIG['ALCANCE_JEFE']``: su departamento, su subárbol de
+        subordinados o ambos. ``prefijo`` permite filtrar otros modelos
+        (``'empleado__'`` para solicitudes).
+        """
+        from django.conf import settings
+        alcance = settings.RH_CONFIG.get('ALCANCE_JEFE', 'ambos')
+        filtro = Q(pk__in=[])
+        if alcance in ('departamento', 'ambos') and self.departamento_id:
+            filtro |= Q(**{f'{prefijo}departamento_id': self.departamento_id})
+        if alcance in ('jerarquia', 'ambos') and self.ruta_jerarquia:
+            filtro |= (
+                rango_subarbol(self.ruta_jerarquia, f'{prefijo}ruta_jerarquia')
+                & ~Q(**{f'{prefijo}pk': self.pk})
+            )
+        return filtro
+    
+    def tiene_a_cargo(self, departamento_id, ruta_jerarquia):
+        """Versión en memoria de ``filtro_a_cargo`` para un perfil ya cargado"""
+        from django.conf import settings
+        alcance = settings.RH_CONFIG.get('ALCANCE_JEFE', 'ambos')
+        if alcance in ('departamento', 'ambos') and self.departamento_id and departamento_id == self.departamento_id:
+            return True
+        return (
+            alcance in ('jerarquia', 'ambos') and bool(self.ruta_jerarquia)
+            and ruta_jerarquia != self.ruta_jerarquia
+            and ruta_jerarquia.startswith(self.ruta_jerarquia)
+        )
+    
     @property
     def nombre_completo(self):
         return self.usuario.get_full_name() or self.usuario.username
@@ -72,6 +270,14 @@ class Perfil(models.Model):
     
     def es_empleado(self):
         return self.tipo_perfil == 'EMPLEADO'
+    
+    def ajustar_saldo(self, dias, registrado_por=None, comentario=""):
+        """Ajuste manual de días usados (positivo consume, negativo devuelve)"""
+        movimiento = MovimientoVacaciones.registrar(
+            self.pk, 'AJUSTE', dias, registrado_por=registrado_por, comentario=comentario
+        )
+        self.refresh_from_db(fields=['dias_vacaciones_usados'])
+        return movimiento
 
 
 class Departamento(models.Model):
@@ -81,6 +287,11 @@ class Departamento(models.Model):
     jefe = models.ForeignKey(Perfil, on_delete=models.SET_NULL, null=True, blank=True, 
                             related_name='departamento_dirigido', verbose_name="Jefe de Departamento")
     activo = models.BooleanField(default=True, verbose_name="Activo")
+    dias_laborables = models.CharField(
+        max_length=7, default='1111100', verbose_name="Días Laborables",
+        validators=[RegexValidator(r'^(?=.*1)[01]{7}$', 'Use siete dígitos 0/1 de lunes a domingo.')],
+        help_text="Semana laboral de lunes a domingo, 1 = laborable (ej. 1111100)"
+    )
     
     class Meta:
         verbose_name = "Departamento"
@@ -113,6 +324,8 @@ class SolicitudVacaciones(models.Model):
         ('EMERGENCIA', 'Vacación de Emergencia'),
     ]
     
+    ESTADOS_CANCELABLES = ['PENDIENTE_JEFE', 'APROBADO_JEFE', 'PENDIENTE_RH', 'APROBADO_RH']
+    
     empleado = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='solicitudes_vacaciones', 
                                 verbose_name="Empleado")
     fecha_inicio = models.DateField(verbose_name="Fecha de Inicio")
@@ -140,16 +353,40 @@ class SolicitudVacaciones(models.Model):
         verbose_name = "Solicitud de Vacaciones"
         verbose_name_plural = "Solicitudes de Vacaciones"
         ordering = ['-fecha_solicitud']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_solicitud'], name='solicitud_estado_fecha_idx'),
+            models.Index(fields=['empleado', 'estado'], name='solicitud_empleado_estado_idx'),
+            models.Index(fields=['estado', 'fecha_aprobacion_rh'], name='solicitud_estado_rh_idx'),
+            models.Index(fields=['estado', 'fecha_aprobacion_jefe'], name='solicitud_estado_jefe_idx'),
+            models.Index(fields=['fecha_solicitud', 'id'], name='solicitud_fecha_idx'),
+            # Listados de pendientes ordenados por fecha (admin_dashboard)
+            models.Index(fields=['fecha_solicitud', 'id'],
+                         condition=models.Q(estado__in=['PENDIENTE_JEFE', 'PENDIENTE_RH']),
+                         name='solicitud_pendientes_idx'),
+        ]
     
     def __str__(self):
         return f"{self.empleado.nombre_completo} - {self.fecha_inicio} a {self.fecha_fin}"
     
     def save(self, *args, **kwargs):
-        # Calcular días solicitados automáticamente
+        # Calcular días solicitados automáticamente (solo días hábiles)
         if self.fecha_inicio and self.fecha_fin:
-            delta = self.fecha_fin - self.fecha_inicio
-            self.dias_solicitados = delta.days + 1
-        super().save(*args, **kwargs)
+            self.dias_solicitados = self.calcular_dias_habiles()
+        if not self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # La notificación al jefe se guarda en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._notificar()
+    
+    def calcular_dias_habiles(self):
+        """Días hábiles del periodo según la semana laboral del departamento"""
+        from .calendario import dias_habiles, MASCARA_DEFAULT
+        
+        departamento = self.empleado.departamento if self.empleado_id else None
+        mascara = departamento.dias_laborables if departamento else MASCARA_DEFAULT
+        return dias_habiles(self.fecha_inicio, self.fecha_fin, mascara)
     
     def puede_ser_aprobada_por_jefe(self):
         """Verifica si puede ser aprobada por jefe"""
@@ -164,45 +401,64 @@ class SolicitudVacaciones(models.Model):
         if not self.puede_ser_aprobada_por_jefe():
             return False
         
-        self.estado = 'APROBADO_JEFE'
-        self.aprobado_por_jefe = jefe
-        self.comentarios_jefe = comentario
-        self.fecha_aprobacion_jefe = models.DateTimeField(auto_now=True)
-        
         # Si es empleado normal, va directo a RH
-        if self.tipo == 'NORMAL':
-            self.estado = 'PENDIENTE_RH'
-        
-        self.save()
-        return True
+        return self._cambiar_estado(
+            'PENDIENTE_JEFE',
+            estado='PENDIENTE_RH' if self.tipo == 'NORMAL' else 'APROBADO_JEFE',
+            aprobado_por_jefe=jefe,
+            comentarios_jefe=comentario,
+            fecha_aprobacion_jefe=timezone.now(),
+        )
     
     def rechazar_por_jefe(self, jefe, comentario=""):
         """Rechazar solicitud por jefe de área"""
         if not self.puede_ser_aprobada_por_jefe():
             return False
         
-        self.estado = 'RECHAZADO_JEFE'
-        self.aprobado_por_jefe = jefe
-        self.comentarios_jefe = comentario
-        self.fecha_aprobacion_jefe = models.DateTimeField(auto_now=True)
-        self.save()
-        return True
+        return self._cambiar_estado(
+            'PENDIENTE_JEFE',
+            estado='RECHAZADO_JEFE',
+            aprobado_por_jefe=jefe,
+            comentarios_jefe=comentario,
+            fecha_aprobacion_jefe=timezone.now(),
+        )
     
     def aprobar_por_rh(self, rh_user, comentario=""):
-        """Aprobar solicitud por RH"""
+        """
+        Aprobar solicitud por RH.
+        
+        El cambio de estado es un UPDATE condicionado al estado pendiente, de
+        modo que si dos usuarios de RH aprueban a la vez solo uno descuenta
+        los días; el saldo se actualiza en el libro de movimientos.
+        """
         if not self.puede_ser_aprobada_por_rh():
             return False
         
+        ahora = timezone.now()
+        with transaction.atomic():
+            actualizadas = SolicitudVacaciones.objects.filter(
+                pk=self.pk, estado='PENDIENTE_RH'
+            ).update(
+                estado='APROBADO_RH',
+                aprobado_por_rh=rh_user,
+                comentarios_rh=comentario,
+                fecha_aprobacion_rh=ahora,
+            )
+            if not actualizadas:
+                return False
+            MovimientoVacaciones.registrar(
+                self.empleado_id, 'APROBACION', self.dias_solicitados,
+                solicitud=self, registrado_por=rh_user, comentario=comentario
+            )
+            self._notificar('APROBADO_RH')
+            # update() no envía post_save
+            transaction.on_commit(invalidar_estadisticas)
+        
         self.estado = 'APROBADO_RH'
         self.aprobado_por_rh = rh_user
         self.comentarios_rh = comentario
-        self.fecha_aprobacion_rh = models.DateTimeField(auto_now=True)
-        
-        # Actualizar días usados del empleado
-        self.empleado.dias_vacaciones_usados += self.dias_solicitados
-        self.empleado.save()
-        
-        self.save()
+        self.fecha_aprobacion_rh = ahora
+        self._refrescar_saldo_empleado()
         return True
     
     def rechazar_por_rh(self, rh_user, comentario=""):
@@ -210,12 +466,234 @@ class SolicitudVacaciones(models.Model):
         if not self.puede_ser_aprobada_por_rh():
             return False
         
-        self.estado = 'RECHAZADO_RH'
-        self.aprobado_por_rh = rh_user
-        self.comentarios_rh = comentario
-        self.fecha_aprobacion_rh = models.DateTimeField(auto_now=True)
-        self.save()
+        return self._cambiar_estado(
+            'PENDIENTE_RH',
+            estado='RECHAZADO_RH',
+            aprobado_por_rh=rh_user,
+            comentarios_rh=comentario,
+            fecha_aprobacion_rh=timezone.now(),
+        )
+    
+    def _cambiar_estado(self, estado_actual, **campos):
+        """
+        Aplicar ``campos`` con un UPDATE condicionado a ``estado_actual``,
+        igual que ``aprobar_por_rh``: si otro usuario ya resolvió la solicitud
+        no se sobrescribe su decisión y se devuelve False.
+        """
+        with transaction.atomic():
+            actualizadas = SolicitudVacaciones.objects.filter(
+                pk=self.pk, estado=estado_actual
+            ).update(**campos)
+            if not actualizadas:
+                return False
+            self._notificar(campos['estado'])
+            # update() no envía post_save
+            transaction.on_commit(invalidar_estadisticas)
+        
+        for campo, valor in campos.items():
+            setattr(self, campo, valor)
         return True
+    
+    def cancelar(self, perfil=None, comentario=""):
+        """
+        Cancelar la solicitud. Si ya estaba aprobada por RH se registra un
+        movimiento que devuelve los días al saldo del empleado.
+        """
+        with transaction.atomic():
+            estado_anterior = SolicitudVacaciones.objects.select_for_update().filter(
+                pk=self.pk
+            ).values_list('estado', flat=True).first()
+            if estado_anterior not in self.ESTADOS_CANCELABLES:
+                return False
+            actualizadas = SolicitudVacaciones.objects.filter(
+                pk=self.pk, estado=estado_anterior
+            ).update(estado='CANCELADO')
+            if not actualizadas:
+                return False
+            if estado_anterior == 'APROBADO_RH':
+                MovimientoVacaciones.registrar(
+                    self.empleado_id, 'CANCELACION', -self.dias_solicitados,
+                    solicitud=self, registrado_por=perfil, comentario=comentario
+                )
+            self._notificar('CANCELADO')
+            transaction.on_commit(invalidar_estadisticas)
+        
+        self.estado = 'CANCELADO'
+        self._refrescar_saldo_empleado()
+        return True
+    
+    def _notificar(self, estado=None):
+        """Encolar las notificaciones del cambio a ``estado`` (ver empleados.notificaciones)"""
+        from .notificaciones import encolar
+        encolar([(self.pk, self.empleado_id, estado or self.estado)])
+    
+    def _refrescar_saldo_empleado(self):
+        """Actualizar el saldo del empleado en memoria si ya estaba cargado"""
+        if SolicitudVacaciones._meta.get_field('empleado').is_cached(self):
+            self.empleado.refresh_from_db(fields=['dias_vacaciones_usados'])
+
+
+class MovimientoVacaciones(models.Model):
+    """
+    Libro de movimientos del saldo de vacaciones (solo inserción).
+    
+    ``Perfil.dias_vacaciones_usados`` es el saldo acumulado de estos
+    movimientos y se mantiene con ``F()`` en la misma transacción. El saldo
+    no baja de cero (``saldo_actualizado``): una devolución mayor que lo
+    usado queda completa en el libro pero el saldo se queda en cero.
+    """
+    TIPOS = [
+        ('APROBACION', 'Aprobación'),
+        ('CANCELACION', 'Cancelación'),
+        ('AJUSTE', 'Ajuste'),
+    ]
+    
+    perfil = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='movimientos_vacaciones',
+                               verbose_name="Empleado")
+    solicitud = models.ForeignKey(SolicitudVacaciones, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='movimientos', verbose_name="Solicitud")
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name="Tipo")
+    dias = models.IntegerField(verbose_name="Días", help_text="Positivo consume días, negativo los devuelve")
+    registrado_por = models.ForeignKey(Perfil, on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='movimientos_registrados', verbose_name="Registrado por")
+    comentario = models.TextField(blank=True, verbose_name="Comentario")
+    fecha = models.DateTimeField(auto_now_add=True, verbose_name="Fecha")
+    
+    class Meta:
+        verbose_name = "Movimiento de Vacaciones"
+        verbose_name_plural = "Movimientos de Vacaciones"
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['perfil', 'fecha'], name='movimiento_perfil_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.dias:+d} días - {self.perfil_id}"
+    
+    @staticmethod
+    def saldo_actualizado(dias):
+        """Expresión del saldo con ``dias`` aplicados, acotada a cero (el campo es positivo)"""
+        return Greatest(
+            F('dias_vacaciones_usados') + dias, Value(0),
+            output_field=models.PositiveIntegerField(),
+        )
+    
+    @classmethod
+    def registrar(cls, perfil_id, tipo, dias, solicitud=None, registrado_por=None, comentario=""):
+        """
+        Insertar un movimiento y aplicar ``dias`` al saldo del perfil.
+        
+        La fila del perfil se bloquea con ``select_for_update`` (en backends
+        que lo soportan) y el saldo se actualiza con ``F()``, sin leerlo a
+        Python, así que las actualizaciones concurrentes no se pierden.
+        """
+        with transaction.atomic():
+            usuario_id = Perfil.objects.select_for_update().values_list(
+                'usuario_id', flat=True
+            ).get(pk=perfil_id)
+            movimiento = cls.objects.create(
+                perfil_id=perfil_id,
+                solicitud=solicitud,
+                tipo=tipo,
+                dias=dias,
+                registrado_por=registrado_por,
+                comentario=comentario,
+            )
+            Perfil.objects.filter(pk=perfil_id).update(
+                dias_vacaciones_usados=cls.saldo_actualizado(dias),
+                fecha_actualizacion=timezone.now(),
+            )
+            # update() no envía post_save
+            transaction.on_commit(lambda: invalidar_perfil_cache(usuario_id))
+        return movimiento
+    
+    @classmethod
+    def registrar_varios(cls, movimientos):
+        """
+        Insertar varios movimientos (sin guardar) y aplicar al saldo la suma
+        por perfil con un único UPDATE ``CASE``.
+        """
+        if not movimientos:
+            return []
+        dias_por_perfil = {}
+        for movimiento in movimientos:
+            dias_por_perfil[movimiento.perfil_id] = dias_por_perfil.get(movimiento.perfil_id, 0) + movimiento.dias
+        
+        with transaction.atomic():
+            # Bloqueo en orden de pk para evitar interbloqueos entre lotes
+            usuarios_ids = list(
+                Perfil.objects.select_for_update().filter(pk__in=dias_por_perfil).order_by('pk')
+                .values_list('usuario_id', flat=True)
+            )
+            creados = cls.objects.bulk_create(movimientos)
+            Perfil.objects.filter(pk__in=dias_por_perfil).update(
+                dias_vacaciones_usados=cls.saldo_actualizado(Case(
+                    *[When(pk=perfil_id, then=Value(dias)) for perfil_id, dias in dias_por_perfil.items()],
+                    default=Value(0),
+                    output_field=models.IntegerField(),
+                )),
+                fecha_actualizacion=timezone.now(),
+            )
+            transaction.on_commit(lambda: cache.delete_many([perfil_cache_key(pk) for pk in usuarios_ids]))
+        return creados
+
+
+class Notificacion(models.Model):
+    """
+    Bandeja de salida de correos (patrón outbox).
+    
+    Las filas se insertan en la misma transacción que el cambio de estado de
+    la solicitud y las envía ``manage.py enviar_notificaciones``; el
+    contenido se arma al enviar.
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('ENVIADA', 'Enviada'),
+        ('FALLIDA', 'Fallida'),
+        ('OMITIDA', 'Omitida'),
+    ]
+    
+    destinatario = models.ForeignKey(Perfil, on_delete=models.CASCADE, related_name='notificaciones',
+                                     verbose_name="Destinatario")
+    solicitud = models.ForeignKey(SolicitudVacaciones, on_delete=models.CASCADE, related_name='notificaciones',
+                                  verbose_name="Solicitud")
+    evento = models.CharField(max_length=20, choices=SolicitudVacaciones.ESTADOS, verbose_name="Evento")
+    resumen = models.BooleanField(default=False, verbose_name="En Resumen Diario")
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='PENDIENTE', verbose_name="Estado")
+    intentos = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    disponible_en = models.DateTimeField(verbose_name="Enviar a partir de")
+    reserva = models.CharField(max_length=32, blank=True, verbose_name="Reserva",
+                               help_text="Worker que la tiene tomada")
+    ultimo_error = models.TextField(blank=True, verbose_name="Último Error")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+    fecha_envio = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Envío")
+    
+    class Meta:
+        verbose_name = "Notificación"
+        verbose_name_plural = "Notificaciones"
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['disponible_en', 'id'], condition=models.Q(estado='PENDIENTE'),
+                         name='notificacion_pendiente_idx'),
+            models.Index(fields=['reserva'], name='notificacion_reserva_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_evento_display()} → {self.destinatario_id} ({self.get_estado_display()})"
+
+
+class DiaFestivo(models.Model):
+    """Días de descanso de la empresa además de los oficiales (LFT art. 74)"""
+    fecha = models.DateField(unique=True, verbose_name="Fecha")
+    nombre = models.CharField(max_length=100, verbose_name="Nombre")
+    
+    class Meta:
+        verbose_name = "Día Festivo"
+        verbose_name_plural = "Días Festivos"
+        ordering = ['fecha']
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.nombre}"
 
 
 class ConfiguracionSistema(models.Model):
@@ -230,12 +708,133 @@ class ConfiguracionSistema(models.Model):
     
     def __str__(self):
         return f"{self.nombre}: {self.valor}"
+    
+    @classmethod
+    def obtener(cls, nombre, default=None):
+        """Valor de una configuración, o ``default`` si no existe"""
+        valor = cls.objects.filter(nombre=nombre).values_list('valor', flat=True).first()
+        return default if valor is None else valor
+    
+    @classmethod
+    def obtener_int(cls, nombre, default=0):
+        try:
+            return int(cls.obtener(nombre, default))
+        except (TypeError, ValueError):
+            return default
 
 
 # Señales para mantener sincronización con User model
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, post_migrate, m2m_changed
 from django.dispatch import receiver
 
+from .basedatos import configurar_sqlite
+
+
+# Pragmas del perfil de producción de SQLite en cada conexión nueva
+connection_created.connect(configurar_sqlite, dispatch_uid='empleados.basedatos')
+
+
+def perfil_cache_key(usuario_id):
+    """Clave de cache del perfil de un usuario (ver empleados.middleware)"""
+    return f'perfil:{usuario_id}'
+
+
+def invalidar_perfil_cache(usuario_id):
+    cache.delete(perfil_cache_key(usuario_id))
+
+
+ORGANIGRAMA_VERSION_KEY = 'organigrama:version'
+DEPARTAMENTOS_VERSION_KEY = 'departamentos:version'
+FESTIVOS_VERSION_KEY = 'festivos:version'
+
+
+def incrementar_version(clave):
+    """Cambiar la versión hace que todas las claves que la incluyen caduquen"""
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, 1, None)
+
+
+def invalidar_organigrama():
+    """Organigrama y autocompletado de perfiles (ver empleados.autocompletar)"""
+    incrementar_version(ORGANIGRAMA_VERSION_KEY)
+
+
+ESTADISTICAS_VERSION_KEY = 'estadisticas:version'
+NAVEGACION_VERSION_KEY = 'navegacion:version'
+
+
+def invalidar_estadisticas():
+    """Paneles de estadísticas cacheados de los dashboards (ver empleados.fragmentos)"""
+    incrementar_version(ESTADISTICAS_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=Perfil)
+def invalidar_perfil(sender, instance, **kwargs):
+    """Descartar el perfil cacheado cuando cambia"""
+    invalidar_perfil_cache(instance.usuario_id)
+    invalidar_organigrama()
+    invalidar_estadisticas()
+
+
+@receiver([post_save, post_delete], sender=SolicitudVacaciones)
+def invalidar_estadisticas_solicitud(sender, instance, **kwargs):
+    transaction.on_commit(invalidar_estadisticas)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidar_navegacion_grupo(sender, instance, **kwargs):
+    """El menú de navegación depende de los nombres de los grupos"""
+    incrementar_version(NAVEGACION_VERSION_KEY)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_navegacion_usuario(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        incrementar_version(NAVEGACION_VERSION_KEY)
+
+
+@receiver(post_delete, sender=Perfil)
+def reubicar_subordinados(sender, instance, **kwargs):
+    """
+    ``SET_NULL`` deja a los subordinados directos sin supervisor con un
+    UPDATE que no pasa por save(); cada uno pasa a ser raíz de su subárbol.
+    """
+    ruta = instance.ruta_jerarquia
+    if ruta:
+        Perfil.objects.filter(rango_subarbol(ruta)).exclude(pk=instance.pk).update(
+            ruta_jerarquia=Concat(Value('/'), Substr('ruta_jerarquia', len(ruta) + 1))
+        )
+
+
+@receiver([post_save, post_delete], sender=Departamento)
+def invalidar_departamentos(sender, instance, **kwargs):
+    incrementar_version(DEPARTAMENTOS_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=DiaFestivo)
+def invalidar_festivos(sender, instance, **kwargs):
+    """Recalcular los festivos en todos los procesos"""
+    incrementar_version(FESTIVOS_VERSION_KEY)
+
+
+@receiver(post_save, sender=User)
+def invalidar_perfil_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """El perfil cacheado incluye nombre y correo del usuario"""
+    # El login solo guarda last_login, que no se cachea
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if not created:
+        invalidar_perfil_cache(instance.pk)
+        invalidar_organigrama()
+        # Nombre y username forman parte del texto de búsqueda del perfil
+        numero = Perfil.objects.filter(usuario_id=instance.pk).values_list('numero_empleado', flat=True).first()
+        if numero is not None:
+            Perfil.objects.filter(usuario_id=instance.pk).update(texto_busqueda=texto_busqueda(instance, numero))
+
 @receiver(post_save, sender=User)
 def crear_perfil_usuario(sender, instance, created, **kwargs):
     """Crear perfil automáticamente cuando se crea un usuario"""
@@ -250,3 +849,10 @@ def crear_perfil_usuario(sender, instance, created, **kwargs):
                 puesto="Por definir",
                 salario=0.00  # Valor por defecto
             )
+
+
+@receiver(post_migrate)
+def asegurar_indice_busqueda(sender, using, **kwargs):
+    """Recrear los triggers FTS5 si una migración reconstruyó la tabla de perfiles"""
+    if sender.name == 'empleados':
+        asegurar_indice_sqlite(connections[using])
@@ -0,0 +1,224 @@
+"""
+Notificaciones por correo de los cambios de estado de las solicitudes.
+
+``encolar`` inserta filas en ``Notificacion`` dentro de la transacción del
+cambio de estado (si la transacción se revierte no queda ningún correo
+pendiente) y ``enviar_pendientes`` las despacha desde un proceso aparte
+(``manage.py enviar_notificaciones``), de modo que aprobar una solicitud no
+espera al servidor SMTP.
+
+El worker reserva un lote con un UPDATE marcado con su token, envía todo por
+una sola conexión SMTP y reprograma los fallos con espera exponencial. Las
+notificaciones de perfiles con ``resumen_diario`` se programan para la hora
+del resumen y salen agrupadas en un solo correo por destinatario.
+"""
+
+import logging
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Perfil, Notificacion
+
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE_DEFAULT = 100
+
+ASUNTOS = {
+    'PENDIENTE_JEFE': 'Nueva solicitud de vacaciones por revisar',
+    'PENDIENTE_RH': 'Solicitud de vacaciones aprobada por jefe, pendiente RH',
+    'APROBADO_JEFE': 'Tu solicitud de vacaciones fue aprobada por tu jefe',
+    'RECHAZADO_JEFE': 'Tu solicitud de vacaciones fue rechazada',
+    'APROBADO_RH': 'Tu solicitud de vacaciones fue aprobada',
+    'RECHAZADO_RH': 'Tu solicitud de vacaciones fue rechazada por RH',
+    'CANCELADO': 'Solicitud de vacaciones cancelada',
+}
+
+# Quién se entera de cada estado nuevo
+NOTIFICAR_JEFE = {'PENDIENTE_JEFE', 'CANCELADO'}
+NOTIFICAR_EMPLEADO = {'PENDIENTE_RH', 'APROBADO_JEFE', 'RECHAZADO_JEFE', 'APROBADO_RH', 'RECHAZADO_RH'}
+NOTIFICAR_RH = {'PENDIENTE_RH'}
+
+
+def _config(clave, default):
+    return getattr(settings, 'RH_CONFIG', {}).get(clave, default)
+
+
+def siguiente_resumen(ahora=None):
+    """Próxima hora de envío del resumen diario"""
+    ahora = timezone.localtime(ahora or timezone.now())
+    hora = time(_config('NOTIFICACIONES_HORA_RESUMEN', 8))
+    programada = timezone.make_aware(datetime.combine(ahora.date(), hora))
+    if programada <= ahora:
+        programada += timedelta(days=1)
+    return programada
+
+
+def encolar(transiciones):
+    """
+    Insertar las notificaciones de ``transiciones`` ``(solicitud_id,
+    empleado_id, estado_nuevo)``. Debe llamarse dentro de la transacción que
+    cambia el estado; hace a lo más tres consultas sin importar el tamaño
+    del lote.
+    """
+    transiciones = [t for t in transiciones if t[2] in ASUNTOS]
+    if not transiciones:
+        return []
+
+    empleados_ids = {empleado_id for _, empleado_id, _ in transiciones}
+    perfiles = {
+        pk: (resumen, jefe_id, jefe_resumen)
+        for pk, resumen, jefe_id, jefe_resumen in Perfil.objects.filter(pk__in=empleados_ids).values_list(
+            'pk', 'resumen_diario', 'departamento__jefe_id', 'departamento__jefe__resumen_diario'
+        )
+    }
+    rh = []
+    if any(estado in NOTIFICAR_RH for _, _, estado in transiciones):
+        rh = list(Perfil.objects.filter(activo=True, tipo_perfil='RH').values_list('pk', 'resumen_diario'))
+
+    ahora = timezone.now()
+    resumen_en = siguiente_resumen(ahora)
+    notificaciones = []
+
+    def agregar(solicitud_id, estado, destinatario_id, resumen):
+        notificaciones.append(Notificacion(
+            destinatario_id=destinatario_id,
+            solicitud_id=solicitud_id,
+            evento=estado,
+            resumen=bool(resumen),
+            disponible_en=resumen_en if resumen else ahora,
+        ))
+
+    for solicitud_id, empleado_id, estado in transiciones:
+        resumen, jefe_id, jefe_resumen = perfiles.get(empleado_id, (False, None, False))
+        if estado in NOTIFICAR_JEFE and jefe_id and jefe_id != empleado_id:
+            agregar(solicitud_id, estado, jefe_id, jefe_resumen)
+        if estado in NOTIFICAR_EMPLEADO:
+            agregar(solicitud_id, estado, empleado_id, resumen)
+        if estado in NOTIFICAR_RH:
+            for rh_id, rh_resumen in rh:
+                if rh_id != empleado_id:
+                    agregar(solicitud_id, estado, rh_id, rh_resumen)
+
+    return Notificacion.objects.bulk_create(notificaciones)
+
+
+def espera_reintento(intentos):
+    """Espera exponencial: base, 2×base, 4×base… con tope"""
+    base = _config('NOTIFICACIONES_ESPERA_BASE_SEGUNDOS', 60)
+    maxima = _config('NOTIFICACIONES_ESPERA_MAXIMA_SEGUNDOS', 6 * 3600)
+    return timedelta(seconds=min(base * 2 ** max(intentos - 1, 0), maxima))
+
+
+def reservar(tamano=TAMANO_LOTE_DEFAULT, ahora=None):
+    """
+    Tomar hasta ``tamano`` notificaciones vencidas para este worker. La
+    reserva es un UPDATE condicionado, así que dos workers nunca toman la
+    misma fila aunque el backend no tenga ``SKIP LOCKED``; si el worker
+    muere la reserva caduca sola al pasar ``disponible_en``.
+    """
+    ahora = ahora or timezone.now()
+    token = uuid.uuid4().hex
+    ids = list(
+        Notificacion.objects.filter(estado='PENDIENTE', disponible_en__lte=ahora)
+        .order_by('disponible_en', 'id').values_list('id', flat=True)[:tamano]
+    )
+    if not ids:
+        return []
+    arrendamiento = timedelta(seconds=_config('NOTIFICACIONES_RESERVA_SEGUNDOS', 300))
+    Notificacion.objects.filter(pk__in=ids, estado='PENDIENTE', disponible_en__lte=ahora).update(
+        reserva=token, disponible_en=ahora + arrendamiento
+    )
+    return list(
+        Notificacion.objects.filter(reserva=token, estado='PENDIENTE')
+        .select_related('destinatario__usuario', 'solicitud__empleado__usuario')
+        .order_by('id')
+    )
+
+
+def _mensajes(notificaciones):
+    """Agrupar en ``[(mensaje, [notificaciones])]``; las de resumen, una por destinatario"""
+    mensajes = []
+    resumenes = {}
+    for notificacion in notificaciones:
+        if notificacion.resumen:
+            resumenes.setdefault(notificacion.destinatario_id, []).append(notificacion)
+            continue
+        contexto = {'notificacion': notificacion, 'solicitud': notificacion.solicitud,
+                    'destinatario': notificacion.destinatario}
+        mensajes.append((EmailMessage(
+            subject=ASUNTOS[notificacion.evento],
+            body=render_to_string('empleados/correo/notificacion.txt', contexto),
+            to=[notificacion.destinatario.usuario.email],
+        ), [notificacion]))
+
+    for grupo in resumenes.values():
+        destinatario = grupo[0].destinatario
+        contexto = {'notificaciones': grupo, 'destinatario': destinatario}
+        mensajes.append((EmailMessage(
+            subject=f'Resumen diario: {len(grupo)} novedades de vacaciones',
+            body=render_to_string('empleados/correo/resumen.txt', contexto),
+            to=[destinatario.usuario.email],
+        ), grupo))
+    return mensajes
+
+
+def enviar_pendientes(tamano=TAMANO_LOTE_DEFAULT, conexion=None):
+    """
+    Enviar un lote de notificaciones vencidas. Devuelve ``(enviadas,
+    fallidas, omitidas)`` contando notificaciones, no correos; ``(0, 0, 0)``
+    solo si no había nada vencido.
+    """
+    ahora = timezone.now()
+    notificaciones = reservar(tamano, ahora)
+    if not notificaciones:
+        return 0, 0, 0
+
+    sin_correo = [n.pk for n in notificaciones if not n.destinatario.usuario.email]
+    if sin_correo:
+        Notificacion.objects.filter(pk__in=sin_correo).update(
+            estado='OMITIDA', ultimo_error='El destinatario no tiene correo'
+        )
+    notificaciones = [n for n in notificaciones if n.destinatario.usuario.email]
+
+    enviadas, fallidas = [], []
+    conexion = conexion or get_connection()
+    try:
+        conexion.open()
+    except Exception as error:
+        logger.warning('No se pudo conectar al servidor de correo: %s', error)
+        fallidas = [(n, str(error)) for n in notificaciones]
+    else:
+        try:
+            for mensaje, grupo in _mensajes(notificaciones):
+                mensaje.connection = conexion
+                try:
+                    mensaje.send()
+                except Exception as error:
+                    logger.warning('Error enviando "%s" a %s: %s', mensaje.subject, mensaje.to, error)
+                    fallidas.extend((n, str(error)) for n in grupo)
+                else:
+                    enviadas.extend(grupo)
+        finally:
+            conexion.close()
+
+    if enviadas:
+        Notificacion.objects.filter(pk__in=[n.pk for n in enviadas]).update(
+            estado='ENVIADA', fecha_envio=timezone.now(), intentos=F('intentos') + 1, ultimo_error=''
+        )
+    max_intentos = _config('NOTIFICACIONES_MAX_INTENTOS', 5)
+    for notificacion, error in fallidas:
+        intentos = notificacion.intentos + 1
+        Notificacion.objects.filter(pk=notificacion.pk).update(
+            intentos=intentos,
+            ultimo_error=error,
+            estado='FALLIDA' if intentos >= max_intentos else 'PENDIENTE',
+            disponible_en=ahora + espera_reintento(intentos),
+        )
+    return len(enviadas), len(fallidas), len(sin_correo)
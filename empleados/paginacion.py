@@ -0,0 +1,186 @@
+"""
+Paginación por cursor (keyset) para los listados.
+
+En lugar de ``OFFSET``/``COUNT(*)`` se filtra por los valores de la última
+fila vista sobre un orden estable, así que el costo de cada página no depende
+de su posición ni del tamaño de la tabla (siempre que exista un índice que
+cubra el orden).
+"""
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+ORDEN_SOLICITUDES = ('-fecha_solicitud', 'id')
+ORDEN_PERFILES = ('usuario__last_name', 'usuario__first_name', 'id')
+
+TAMANO_PAGINA_DEFAULT = 25
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+
+class PaginaCursor:
+    """Una página de resultados con los enlaces a la anterior y la siguiente"""
+
+    def __init__(self, objetos, request, parametro, cursor_anterior=None, cursor_siguiente=None):
+        self.objetos = objetos
+        self.request = request
+        self.parametro = parametro
+        self.cursor_anterior = cursor_anterior
+        self.cursor_siguiente = cursor_siguiente
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    def __bool__(self):
+        return bool(self.objetos)
+
+    @property
+    def hay_anterior(self):
+        return self.cursor_anterior is not None
+
+    @property
+    def hay_siguiente(self):
+        return self.cursor_siguiente is not None
+
+    @property
+    def hay_otras_paginas(self):
+        return self.hay_anterior or self.hay_siguiente
+
+    def _url(self, cursor):
+        parametros = self.request.GET.copy()
+        parametros[self.parametro] = cursor
+        return f'?{parametros.urlencode()}'
+
+    @property
+    def url_anterior(self):
+        return self._url(self.cursor_anterior) if self.hay_anterior else ''
+
+    @property
+    def url_siguiente(self):
+        return self._url(self.cursor_siguiente) if self.hay_siguiente else ''
+
+
+def _campo(modelo, ruta):
+    """Resolver ``'usuario__last_name'`` al ``Field`` final"""
+    partes = ruta.split('__')
+    for parte in partes[:-1]:
+        modelo = modelo._meta.get_field(parte).related_model
+    return modelo._meta.get_field(partes[-1])
+
+
+def _valor(objeto, ruta):
+    for parte in ruta.split('__'):
+        objeto = getattr(objeto, parte)
+    return objeto
+
+
+class CodificadorCursor(DjangoJSONEncoder):
+    """
+    ``DjangoJSONEncoder`` recorta los datetimes a milisegundos; el cursor
+    necesita el valor exacto o el filtro keyset salta las filas que
+    comparten el milisegundo con la última vista.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def codificar_cursor(direccion, valores):
+    datos = json.dumps({'d': direccion, 'v': valores}, cls=CodificadorCursor, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, modelo, orden):
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        direccion, valores = datos['d'], datos['v']
+        if direccion not in ('sig', 'ant') or not isinstance(valores, list) or len(valores) != len(orden):
+            raise CursorInvalido(cursor)
+        valores = [
+            _campo(modelo, campo.lstrip('-')).to_python(valor)
+            for campo, valor in zip(orden, valores)
+        ]
+        # Los campos del orden no son nulos; None no sirve para comparar
+        if None in valores:
+            raise CursorInvalido(cursor)
+        return direccion, valores
+    except (ValueError, KeyError, TypeError, ValidationError) as error:
+        raise CursorInvalido(cursor) from error
+
+
+def _filtro_keyset(orden, valores):
+    """
+    Condición "después de ``valores``" para un orden lexicográfico con
+    direcciones mixtas: (a > x) OR (a = x AND b > y) OR ...
+    """
+    filtro = Q()
+    iguales = Q()
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        filtro |= iguales & Q(**{f'{nombre}__{operador}': valor})
+        iguales &= Q(**{nombre: valor})
+    # Cota redundante sobre el primer campo para que el planificador pueda
+    # usar un rango de índice en lugar de evaluar el OR fila por fila
+    primero = orden[0]
+    cota = 'lte' if primero.startswith('-') else 'gte'
+    return Q(**{f'{primero.lstrip("-")}__{cota}': valores[0]}) & filtro
+
+
+def _invertir(orden):
+    return tuple(campo[1:] if campo.startswith('-') else f'-{campo}' for campo in orden)
+
+
+def paginar(request, queryset, orden, tamano=TAMANO_PAGINA_DEFAULT, parametro='cursor'):
+    """
+    Devolver una ``PaginaCursor`` de ``queryset`` ordenado por ``orden``.
+
+    ``orden`` debe terminar en un campo único (normalmente ``id``) para que
+    el orden sea total. El cursor viaja en el parámetro GET ``parametro``;
+    si es inválido se muestra la primera página.
+    """
+    cursor = request.GET.get(parametro)
+    direccion, valores = 'sig', None
+    if cursor:
+        try:
+            direccion, valores = decodificar_cursor(cursor, queryset.model, orden)
+        except CursorInvalido:
+            direccion, valores = 'sig', None
+
+    orden_consulta = orden if direccion == 'sig' else _invertir(orden)
+    consulta = queryset.order_by(*orden_consulta)
+    if valores is not None:
+        consulta = consulta.filter(_filtro_keyset(orden_consulta, valores))
+
+    # Una fila extra indica si hay más resultados, sin COUNT(*)
+    objetos = list(consulta[:tamano + 1])
+    hay_mas = len(objetos) > tamano
+    objetos = objetos[:tamano]
+    if direccion == 'ant':
+        objetos.reverse()
+
+    def cursor_de(objeto, direccion_nueva):
+        return codificar_cursor(direccion_nueva, [_valor(objeto, campo.lstrip('-')) for campo in orden])
+
+    cursor_anterior = cursor_siguiente = None
+    if objetos:
+        if (direccion == 'sig' and valores is not None) or (direccion == 'ant' and hay_mas):
+            cursor_anterior = cursor_de(objetos[0], 'ant')
+        if (direccion == 'sig' and hay_mas) or direccion == 'ant':
+            cursor_siguiente = cursor_de(objetos[-1], 'sig')
+
+    return PaginaCursor(objetos, request, parametro, cursor_anterior, cursor_siguiente)
@@ -0,0 +1,134 @@
+"""
+Lecturas en la réplica de solo lectura (alias ``replica`` de ``DATABASES``).
+
+``RouterReplica`` manda a la réplica las lecturas de las vistas marcadas con
+``@lectura_replica`` (dashboards, listados, exportaciones y reportes) y todas
+las escrituras, y cualquier otra lectura, a ``default``.
+``ReplicaMiddleware`` decide al resolver la vista:
+
+- solo GET y HEAD de vistas marcadas leen de la réplica;
+- quien acaba de escribir (una petición que ejecutó INSERT, UPDATE o DELETE
+  en ``default``) recibe la cookie ``rh_primario`` y durante
+  ``RH_CONFIG['REPLICA_ESCRITURA_SEGUNDOS']`` sus lecturas van a
+  ``default``: ve sus propios cambios (la solicitud recién creada, la
+  aprobación) aunque la réplica vaya atrasada. El plazo debe ser mayor que
+  el atraso de la réplica; con la copia de SQLite, el intervalo entre copias
+  de ``manage.py copiar_replica``.
+
+Las sesiones y los usuarios (``APPS_PRIMARIO``) y el perfil de quien hace la
+petición (``empleados.middleware.cargar_perfil``) se leen siempre de
+``default``: un usuario creado después de la última copia debe poder entrar.
+
+Los caches que se llenan desde vistas en réplica (paneles, organigrama)
+pueden guardar datos atrasados hasta que expiran.
+
+Sin el alias ``replica`` en ``DATABASES`` todo va a ``default`` y el
+middleware se desactiva.
+"""
+
+from contextlib import contextmanager
+import contextvars
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+PRIMARIO = 'default'
+REPLICA = 'replica'
+# Apps que se leen siempre del primario
+APPS_PRIMARIO = ('sessions', 'auth', 'contenttypes')
+COOKIE_ESCRITURA = 'rh_primario'
+ESCRITURAS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class EstadoLecturas:
+    """Destino de las lecturas y escrituras hechas en la petición en curso"""
+
+    __slots__ = ('replica', 'escribio')
+
+    def __init__(self, replica=False):
+        self.replica = replica
+        self.escribio = False
+
+
+# Objeto mutable: los hilos de sync_to_async comparten el de su petición
+_estado = contextvars.ContextVar('lecturas', default=None)
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+def lectura_replica(vista):
+    """Marcar ``vista`` (sync o async) como de solo lectura: sus consultas van a la réplica"""
+    vista.lectura_replica = True
+    return vista
+
+
+@contextmanager
+def lecturas(replica):
+    """Dentro del bloque las lecturas van a la réplica (``replica=True``) o a ``default``"""
+    estado = _estado.get()
+    if estado is None:
+        token = _estado.set(EstadoLecturas(replica))
+        try:
+            yield
+        finally:
+            _estado.reset(token)
+        return
+    anterior = estado.replica
+    estado.replica = replica
+    try:
+        yield
+    finally:
+        estado.replica = anterior
+
+
+def _registrar_escritura(execute, sql, params, many, context):
+    estado = _estado.get()
+    if estado is not None and not estado.escribio and sql.lstrip()[:7].upper().startswith(ESCRITURAS):
+        estado.escribio = True
+    return execute(sql, params, many, context)
+
+
+def _agregar_registro(connection, **kwargs):
+    if connection.alias == PRIMARIO and _registrar_escritura not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_registrar_escritura)
+
+
+def instrumentar_escrituras():
+    """
+    Marcar la petición en curso cuando escribe en ``default``. Se mira el SQL
+    ejecutado y no ``db_for_write``, que Django también llama para validar
+    formularios (``validate_constraints``) sin escribir nada.
+    """
+    connection_created.connect(_agregar_registro, dispatch_uid='empleados.replicas')
+    for conexion in connections.all(initialized_only=True):
+        _agregar_registro(conexion)
+
+
+class RouterReplica:
+    """Router de ``DATABASE_ROUTERS`` (ver el docstring del módulo)"""
+
+    def db_for_read(self, model, **hints):
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            # Relaciones de un objeto: de la base de donde salió
+            return instancia._state.db
+        estado = _estado.get()
+        if (estado is not None and estado.replica
+                and model._meta.app_label not in APPS_PRIMARIO and replica_configurada()):
+            return REPLICA
+        return PRIMARIO
+
+    def db_for_write(self, model, **hints):
+        return PRIMARIO
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las dos bases tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica es una copia del primario, esquema incluido
+        return db != REPLICA
@@ -0,0 +1,1038 @@
+import base64
+from datetime import date, datetime, timedelta, timezone as tz
+import io
+import itertools
+import json
+import logging
+import os
+import re
+import tempfile
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from . import estadisticas, urls as empleados_urls, views_async
+from .basedatos import configurar_sqlite, reintentar_bloqueo
+from .bitacora import ArchivoRotativo, FiltroPeticion, FormatoJSON, ManejadorCola
+from .calendario import dias_habiles, festivos_del_anio
+from .fragmentos import PanelEstadisticas, panel_estadisticas
+from .generacion import GeneradorDatos
+from .importacion import ImportadorEmpleados, leer_filas
+from .middleware import ReplicaMiddleware
+from .models import (
+    Perfil, Departamento, SolicitudVacaciones, MovimientoVacaciones, DiaFestivo, Notificacion,
+    ESTADISTICAS_VERSION_KEY, NAVEGACION_VERSION_KEY,
+)
+from .replicas import COOKIE_ESCRITURA, RouterReplica, lectura_replica, lecturas, _registrar_escritura
+from .paginacion import (
+    paginar, decodificar_cursor, codificar_cursor, CursorInvalido,
+    ORDEN_SOLICITUDES, ORDEN_PERFILES, TAMANO_PAGINA_DEFAULT,
+)
+
+
+class FestivosCacheTests(TestCase):
+    """Los festivos se guardan en el cache compartido y caducan con las señales de ``DiaFestivo``"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_y_versionado(self):
+        semana = (date(2024, 6, 3), date(2024, 6, 7))
+        self.assertEqual(dias_habiles(*semana), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(dias_habiles(*semana), 5)
+
+        festivo = DiaFestivo.objects.create(fecha=date(2024, 6, 5), nombre='Aniversario')
+        self.assertEqual(dias_habiles(*semana), 4)
+        self.assertIn(date(2024, 6, 5), festivos_del_anio(2024))
+
+        festivo.delete()
+        self.assertEqual(dias_habiles(*semana), 5)
+
+
+class FragmentosCacheTests(TestCase):
+    """Versiones de los fragmentos cacheados (menú y paneles) y su invalidación"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rh = crear_perfil('frag_rh', 'RH')
+        cls.empleado = crear_perfil('frag_empleado')
+
+    def setUp(self):
+        cache.clear()
+
+    def _version(self, clave):
+        return cache.get_or_set(clave, 1, None)
+
+    def _tarjetas(self, respuesta):
+        return [int(valor) for valor in re.findall(r'stats-number">(\d+)<', respuesta.content.decode())]
+
+    def test_grupos_cambian_la_navegacion(self):
+        self.client.force_login(self.empleado.usuario)
+        url = reverse('empleados:empleado_dashboard')
+        self.assertNotContains(self.client.get(url), 'Panel Jefe')
+
+        version = self._version(NAVEGACION_VERSION_KEY)
+        jefes, _ = Group.objects.get_or_create(name='JEFES')
+        self.assertGreater(self._version(NAVEGACION_VERSION_KEY), version)
+
+        version = self._version(NAVEGACION_VERSION_KEY)
+        self.empleado.usuario.groups.add(jefes)
+        self.assertGreater(self._version(NAVEGACION_VERSION_KEY), version)
+        self.assertContains(self.client.get(url), 'Panel Jefe')
+
+        self.empleado.usuario.groups.clear()
+        self.assertNotContains(self.client.get(url), 'Panel Jefe')
+
+    def test_cambios_de_perfiles_y_solicitudes_cambian_las_estadisticas(self):
+        version = self._version(ESTADISTICAS_VERSION_KEY)
+        self.empleado.save()
+        self.assertGreater(self._version(ESTADISTICAS_VERSION_KEY), version)
+
+        version = self._version(ESTADISTICAS_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitud = SolicitudVacaciones.objects.create(
+                empleado=self.empleado, fecha_inicio=date(2024, 6, 3), fecha_fin=date(2024, 6, 7),
+                motivo='prueba', estado='PENDIENTE_RH',
+            )
+        self.assertGreater(self._version(ESTADISTICAS_VERSION_KEY), version)
+
+        # aprobar_por_rh usa update(), que no envía post_save
+        version = self._version(ESTADISTICAS_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(solicitud.aprobar_por_rh(self.rh))
+        self.assertGreater(self._version(ESTADISTICAS_VERSION_KEY), version)
+
+    def test_panel_rh_sin_datos_viejos_tras_aprobar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitudes = [
+                SolicitudVacaciones.objects.create(
+                    empleado=self.empleado, fecha_inicio=date(2024, 6, 3), fecha_fin=date(2024, 6, 4),
+                    motivo='prueba', estado='PENDIENTE_RH',
+                )
+                for _ in range(2)
+            ]
+        self.client.force_login(self.rh.usuario)
+        url = reverse('empleados:rh_dashboard')
+        # Pendientes, aprobadas y rechazadas este mes
+        self.assertEqual(self._tarjetas(self.client.get(url)), [2, 0, 0])
+        self.assertTrue(PanelEstadisticas('rh', dict, 'todo').en_cache())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(solicitudes[0].aprobar_por_rh(self.rh))
+        self.assertFalse(PanelEstadisticas('rh', dict, 'todo').en_cache())
+        self.assertEqual(self._tarjetas(self.client.get(url)), [1, 1, 0])
+
+
+class PaginacionCursorTests(TestCase):
+    """Paginación keyset sobre ``fecha_solicitud`` con microsegundos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        perfil = User.objects.create_user('paginado', 'paginado@example.com', 'x').perfil
+        base = datetime(2024, 3, 1, 9, 30, 15, 123000, tzinfo=tz.utc)
+        cls.ids = []
+        # Siete solicitudes en el mismo milisegundo y dos en el siguiente
+        for microsegundo in (100, 200, 300, 400, 500, 600, 700, 1100, 1200):
+            solicitud = SolicitudVacaciones.objects.create(
+                empleado=perfil,
+                fecha_inicio=date(2024, 4, 1),
+                fecha_fin=date(2024, 4, 2),
+                motivo='prueba',
+            )
+            SolicitudVacaciones.objects.filter(pk=solicitud.pk).update(
+                fecha_solicitud=base + timedelta(microseconds=microsegundo)
+            )
+            cls.ids.append(solicitud.pk)
+        cls.esperado = list(
+            SolicitudVacaciones.objects.order_by(*ORDEN_SOLICITUDES).values_list('pk', flat=True)
+        )
+
+    def _pagina(self, cursor=None):
+        request = RequestFactory().get('/', {'cursor': cursor} if cursor else {})
+        return paginar(request, SolicitudVacaciones.objects.all(), ORDEN_SOLICITUDES, tamano=2)
+
+    def test_cursor_conserva_microsegundos(self):
+        solicitud = SolicitudVacaciones.objects.get(pk=self.ids[3])
+        cursor = codificar_cursor('sig', [solicitud.fecha_solicitud, solicitud.pk])
+        _, valores = decodificar_cursor(cursor, SolicitudVacaciones, ORDEN_SOLICITUDES)
+        self.assertEqual(valores, [solicitud.fecha_solicitud, solicitud.pk])
+
+    def test_recorrer_todas_las_paginas(self):
+        vistos, paginas = [], []
+        pagina = self._pagina()
+        while True:
+            paginas.append(pagina)
+            vistos.extend(solicitud.pk for solicitud in pagina)
+            if not pagina.hay_siguiente:
+                break
+            pagina = self._pagina(pagina.cursor_siguiente)
+        self.assertEqual(vistos, self.esperado)
+
+        # Y de regreso, desde la última página
+        regreso = []
+        while True:
+            regreso[:0] = [solicitud.pk for solicitud in pagina]
+            if not pagina.hay_anterior:
+                break
+            pagina = self._pagina(pagina.cursor_anterior)
+        self.assertEqual(regreso, self.esperado)
+
+    def test_cursor_alterado_regresa_a_la_primera_pagina(self):
+        primera = [solicitud.pk for solicitud in self._pagina()]
+        alterados = [
+            {'d': 'sig', 'v': ['x', 1]},
+            {'d': 'sig', 'v': [None, 1]},
+            {'d': 'sig', 'v': {'a': 1, 'b': 2}},
+        ]
+        for datos in alterados:
+            cursor = base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+            with self.subTest(datos=datos):
+                with self.assertRaises(CursorInvalido):
+                    decodificar_cursor(cursor, SolicitudVacaciones, ORDEN_SOLICITUDES)
+                self.assertEqual([solicitud.pk for solicitud in self._pagina(cursor)], primera)
+
+
+class ImportacionTests(TestCase):
+    """Codificación del CSV y límites de los campos por fila"""
+
+    ENCABEZADO = 'username,email,first_name,last_name,fecha_contratacion,numero_empleado,puesto,salario\n'
+
+    def _importar(self, contenido, codificacion='utf-8'):
+        archivo = io.BytesIO((self.ENCABEZADO + contenido).encode(codificacion))
+        importador = ImportadorEmpleados()
+        return importador, importador.importar(leer_filas(archivo, 'empleados.csv'))
+
+    def test_csv_de_excel_en_cp1252(self):
+        _, resultado = self._importar('jnuñez,jn@example.com,José,Núñez,2024-01-15,E-1,Logística,1000\n', 'cp1252')
+        self.assertEqual(resultado.creadas, 1)
+        self.assertEqual(User.objects.get(username='jnuñez').perfil.puesto, 'Logística')
+
+    def test_valores_fuera_de_limites_son_errores_de_fila(self):
+        importador, resultado = self._importar(
+            'nan,nan@example.com,A,B,2024-01-15,E-1,P,NaN\n'
+            'grande,grande@example.com,A,B,2024-01-15,E-2,P,1e400000\n'
+            'largo,largo@example.com,A,B,2024-01-15,' + 'E' * 25 + ',P,1000\n'
+            'valido,valido@example.com,A,B,2024-01-15,E-4,P,1000.50\n'
+        )
+        self.assertEqual((resultado.creadas, resultado.errores), (1, 3))
+        self.assertEqual([fila for fila, _ in importador.errores_muestra], [2, 3, 4])
+        self.assertTrue(User.objects.filter(username='valido').exists())
+
+
+def crear_perfil(username, tipo_perfil='EMPLEADO', departamento=None, supervisor=None):
+    """Usuario con su perfil (la señal crear_perfil_usuario crea uno genérico)"""
+    usuario = User.objects.create_user(username, f'{username}@example.com', None,
+                                       first_name=username.title(), last_name='Prueba')
+    perfil = usuario.perfil
+    perfil.tipo_perfil = tipo_perfil
+    perfil.departamento = departamento
+    perfil.supervisor = supervisor
+    perfil.fecha_contratacion = date(2020, 1, 1)
+    perfil.save()
+    return perfil
+
+
+class SaldoVacacionesTests(TestCase):
+    """El saldo de ``Perfil`` se mueve con el libro y no baja de cero"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.perfil = crear_perfil('saldo')
+        Perfil.objects.filter(pk=cls.perfil.pk).update(dias_vacaciones_usados=2)
+
+    def _usados(self):
+        return Perfil.objects.values_list('dias_vacaciones_usados', flat=True).get(pk=self.perfil.pk)
+
+    def test_registrar_acota_en_cero(self):
+        MovimientoVacaciones.registrar(self.perfil.pk, 'CANCELACION', -5)
+        self.assertEqual(self._usados(), 0)
+        self.assertEqual(self.perfil.movimientos_vacaciones.get().dias, -5)
+
+    def test_registrar_varios_acota_en_cero(self):
+        MovimientoVacaciones.registrar_varios([
+            MovimientoVacaciones(perfil=self.perfil, tipo='AJUSTE', dias=3),
+            MovimientoVacaciones(perfil=self.perfil, tipo='CANCELACION', dias=-9),
+        ])
+        self.assertEqual(self._usados(), 0)
+
+
+class DecisionConcurrenteTests(TestCase):
+    """Aprobar y rechazar la misma solicitud desde dos copias: gana la primera decisión"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rh = crear_perfil('decide_rh', 'RH')
+        cls.jefe = crear_perfil('decide_jefe', 'JEFE_AREA')
+        cls.empleado = crear_perfil('decide_empleado', supervisor=cls.jefe)
+
+    def _copias(self, estado):
+        solicitud = SolicitudVacaciones.objects.create(
+            empleado=self.empleado, fecha_inicio=date(2024, 6, 3), fecha_fin=date(2024, 6, 7),
+            motivo='prueba', estado=estado,
+        )
+        return solicitud, SolicitudVacaciones.objects.get(pk=solicitud.pk)
+
+    def test_rechazo_rh_no_pisa_aprobacion(self):
+        primera, segunda = self._copias('PENDIENTE_RH')
+        self.assertTrue(primera.aprobar_por_rh(self.rh))
+        self.assertFalse(segunda.rechazar_por_rh(self.rh))
+        primera.refresh_from_db()
+        self.assertEqual(primera.estado, 'APROBADO_RH')
+        self.assertEqual(Perfil.objects.get(pk=self.empleado.pk).dias_vacaciones_usados, 5)
+
+    def test_decisiones_del_jefe(self):
+        primera, segunda = self._copias('PENDIENTE_JEFE')
+        self.assertTrue(primera.rechazar_por_jefe(self.jefe, 'sin cobertura'))
+        self.assertFalse(segunda.aprobar_por_jefe(self.jefe))
+        primera.refresh_from_db()
+        self.assertEqual((primera.estado, primera.comentarios_jefe), ('RECHAZADO_JEFE', 'sin cobertura'))
+
+
+class ProcesarLoteTests(TestCase):
+    """Validación del cuerpo de ``api/vacaciones/lote/``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rh = crear_perfil('rh', 'RH')
+        cls.solicitud = SolicitudVacaciones.objects.create(
+            empleado=crear_perfil('empleado'), fecha_inicio=date(2024, 4, 1), fecha_fin=date(2024, 4, 2),
+            motivo='prueba', estado='PENDIENTE_RH',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.rh.usuario)
+
+    def _enviar(self, cuerpo):
+        return self.client.post(reverse('empleados:procesar_lote'), cuerpo, content_type='application/json')
+
+    def test_cuerpos_invalidos(self):
+        for cuerpo in (
+            '[1, 2]', '"aprobar"', '3', 'null', '{',
+            {'ids': '12', 'accion': 'aprobar'},
+            {'ids': 12, 'accion': 'aprobar'},
+            {'ids': [1, 'a'], 'accion': 'aprobar'},
+            {'ids': [1.5], 'accion': 'aprobar'},
+            {'ids': [True], 'accion': 'aprobar'},
+            {'ids': [[1]], 'accion': 'aprobar'},
+            {'ids': [1], 'accion': 'aprobar', 'comentario': ['x']},
+            {'ids': [1], 'accion': ['aprobar']},
+        ):
+            with self.subTest(cuerpo=cuerpo), self.assertLogs('django.request', 'WARNING'):
+                texto = cuerpo if isinstance(cuerpo, str) else json.dumps(cuerpo)
+                self.assertEqual(self._enviar(texto).status_code, 400)
+
+    def test_lote_valido(self):
+        respuesta = self._enviar(json.dumps({'ids': [self.solicitud.pk], 'accion': 'aprobar'}))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['procesadas'], 1)
+
+
+class AprobarSolicitudTests(TestCase):
+    """Páginas de aprobación del jefe y de RH"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sistemas = Departamento.objects.create(nombre='Sistemas')
+        cls.soporte = Departamento.objects.create(nombre='Soporte')
+        cls.jefe = crear_perfil('jefe', 'JEFE_AREA', cls.sistemas)
+        cls.rh = crear_perfil('rh', 'RH')
+        # Subordinado del jefe en otro departamento (ALCANCE_JEFE 'ambos')
+        cls.empleado = crear_perfil('empleado', 'EMPLEADO', cls.soporte, cls.jefe)
+        crear_perfil('companero', 'EMPLEADO', cls.soporte)
+        cls.solicitud = SolicitudVacaciones.objects.create(
+            empleado=cls.empleado, fecha_inicio=date(2024, 4, 1), fecha_fin=date(2024, 4, 3), motivo='prueba',
+        )
+
+    def test_jefe_ve_cobertura_del_departamento_del_empleado(self):
+        self.client.force_login(self.jefe.usuario)
+        respuesta = self.client.get(reverse('empleados:aprobar_jefe', args=[self.solicitud.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTemplateUsed(respuesta, 'empleados/partials/cobertura.html')
+        self.assertEqual(respuesta.context['cobertura']['plantilla'], 2)
+        self.assertContains(respuesta, 'Cobertura del departamento: Soporte')
+
+    def test_jefe_sin_departamento(self):
+        Departamento.objects.filter(jefe=self.jefe).update(jefe=None)
+        Perfil.objects.filter(pk=self.jefe.pk).update(departamento=None)
+        self.client.force_login(self.jefe.usuario)
+        respuesta = self.client.get(reverse('empleados:aprobar_jefe', args=[self.solicitud.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['cobertura']['plantilla'], 2)
+
+    def test_jefe_aprueba(self):
+        self.client.force_login(self.jefe.usuario)
+        respuesta = self.client.post(
+            reverse('empleados:aprobar_jefe', args=[self.solicitud.pk]), {'accion': 'aprobar', 'comentario': ''}
+        )
+        self.assertRedirects(respuesta, reverse('empleados:jefe_dashboard'), fetch_redirect_response=False)
+        self.solicitud.refresh_from_db()
+        self.assertEqual(self.solicitud.estado, 'PENDIENTE_RH')
+
+    def test_rh(self):
+        SolicitudVacaciones.objects.filter(pk=self.solicitud.pk).update(estado='PENDIENTE_RH')
+        self.client.force_login(self.rh.usuario)
+        respuesta = self.client.get(reverse('empleados:aprobar_rh', args=[self.solicitud.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, self.empleado.nombre_completo)
+
+
+class EnviarNotificacionesTests(TestCase):
+    """``enviar_notificaciones --una-vez`` vacía la bandeja aunque un lote entero se omita"""
+
+    @classmethod
+    def setUpTestData(cls):
+        empleado = crear_perfil('empleado')
+        solicitud = SolicitudVacaciones.objects.create(
+            empleado=empleado, fecha_inicio=date(2024, 4, 1), fecha_fin=date(2024, 4, 2), motivo='prueba',
+        )
+        Notificacion.objects.all().delete()
+        sin_correo = crear_perfil('sincorreo')
+        User.objects.filter(pk=sin_correo.usuario_id).update(email='')
+        hace_una_hora = timezone.now() - timedelta(hours=1)
+        # Las primeras en salir son de alguien sin correo: el primer lote se omite completo
+        Notificacion.objects.bulk_create(
+            [Notificacion(destinatario=sin_correo, solicitud=solicitud, evento='PENDIENTE_JEFE',
+                          disponible_en=hace_una_hora) for _ in range(2)]
+            + [Notificacion(destinatario=empleado, solicitud=solicitud, evento='APROBADO_RH',
+                            disponible_en=hace_una_hora + timedelta(minutes=1)) for _ in range(3)]
+        )
+
+    def test_una_vez_sigue_despues_de_un_lote_omitido(self):
+        call_command('enviar_notificaciones', '--una-vez', '--lote', '2', stdout=io.StringIO())
+        self.assertFalse(Notificacion.objects.filter(estado='PENDIENTE').exists())
+        self.assertEqual(Notificacion.objects.filter(estado='OMITIDA').count(), 2)
+        self.assertEqual(Notificacion.objects.filter(estado='ENVIADA').count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class FormulariosRHTests(TestCase):
+    """Alta de usuarios y departamentos con el widget de autocompletado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rh = crear_perfil('rh', 'RH')
+        cls.departamento = Departamento.objects.create(nombre='Sistemas')
+        cls.jefe = crear_perfil('jefe', 'JEFE_AREA', cls.departamento)
+
+    def setUp(self):
+        self.client.force_login(self.rh.usuario)
+
+    def test_paginas_incluyen_autocompletado(self):
+        for nombre_url in ('empleados:crear_usuario', 'empleados:crear_departamento'):
+            with self.subTest(url=nombre_url):
+                respuesta = self.client.get(reverse(nombre_url))
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertContains(respuesta, 'js/autocompletar.js')
+                self.assertContains(respuesta, reverse('empleados:autocompletar', args=['supervisores']))
+
+    def test_crear_usuario(self):
+        respuesta = self.client.post(reverse('empleados:crear_usuario'), {
+            'username': 'nuevo', 'email': 'nuevo@example.com', 'first_name': 'Nuevo', 'last_name': 'Prueba',
+            'password1': 'Contrasena-Segura-1', 'password2': 'Contrasena-Segura-1',
+            'tipo_perfil': 'EMPLEADO', 'departamento': self.departamento.pk, 'supervisor': self.jefe.pk,
+            'fecha_contratacion': '2024-01-15', 'numero_empleado': 'N0001', 'puesto': 'Analista',
+            'salario': '15000',
+        })
+        self.assertRedirects(respuesta, reverse('empleados:gestion_usuarios'), fetch_redirect_response=False)
+        perfil = Perfil.objects.get(usuario__username='nuevo')
+        self.assertEqual((perfil.numero_empleado, perfil.supervisor_id), ('N0001', self.jefe.pk))
+
+    def test_crear_departamento(self):
+        respuesta = self.client.post(reverse('empleados:crear_departamento'), {
+            'nombre': 'Soporte', 'descripcion': '', 'jefe': self.jefe.pk, 'dias_laborables': '1111110',
+        })
+        self.assertRedirects(respuesta, reverse('empleados:gestion_departamentos'), fetch_redirect_response=False)
+        self.assertEqual(Departamento.objects.get(nombre='Soporte').jefe_id, self.jefe.pk)
+
+    def test_autocompletar_departamentos_con_acentos(self):
+        administracion = Departamento.objects.create(nombre='Administración')
+        logistica = Departamento.objects.create(nombre='Logística')
+        url = reverse('empleados:autocompletar', args=['departamentos'])
+        for termino, esperado in (
+            ('Administración', [administracion.pk]), ('administracion', [administracion.pk]),
+            ('logística', [logistica.pk]), ('LOG', [logistica.pk]), ('ística', [logistica.pk]),
+            ('sistemas', [self.departamento.pk]), ('ventas', []),
+        ):
+            with self.subTest(q=termino):
+                respuesta = self.client.get(url, {'q': termino})
+                self.assertEqual([r['id'] for r in respuesta.json()['resultados']], esperado)
+
+
+class MetricasTests(TestCase):
+    """``/metrics`` exige el token del scraper o una sesión de staff"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empleado = crear_perfil('empleado')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', None, is_staff=True)
+
+    def _get(self, **encabezados):
+        return self.client.get(reverse('empleados:metricas'), headers=encabezados)
+
+    def test_sin_token_configurado(self):
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'METRICAS_TOKEN': None}):
+            self.assertEqual(self._get().status_code, 401)
+            self.assertEqual(self._get(Authorization='Bearer ').status_code, 401)
+            self.client.force_login(self.empleado.usuario)
+            self.assertEqual(self._get().status_code, 403)
+            self.client.force_login(self.staff)
+            self.assertEqual(self._get().status_code, 200)
+
+    def test_con_token(self):
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'METRICAS_TOKEN': 'secreto'}):
+            self.assertEqual(self._get(Authorization='Bearer secreto').status_code, 200)
+            self.assertEqual(self._get(Authorization='Bearer otro').status_code, 401)
+            self.client.force_login(self.staff)
+            self.assertEqual(self._get().status_code, 200)
+
+
+class MedicionTests(TestCase):
+    """``MedicionMiddleware`` registra las peticiones que pasan los umbrales"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rh = crear_perfil('medido', 'RH')
+
+    def setUp(self):
+        self.client.force_login(self.rh.usuario)
+
+    def test_registra_peticion_sobre_el_umbral(self):
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'MEDICION_UMBRAL_CONSULTAS': 1}), \
+                self.assertLogs('empleados.medicion', 'WARNING') as registros, \
+                CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('empleados:rh_dashboard'))
+        datos = registros.records[0].medicion
+        self.assertEqual(
+            (datos['vista'], datos['metodo'], datos['estado'], datos['sql']),
+            ('empleados:rh_dashboard', 'GET', 200, len(consultas)),
+        )
+        self.assertGreater(datos['plantillas_ms'], 0)
+        self.assertIn('vista=empleados:rh_dashboard metodo=GET estado=200', registros.output[0])
+
+    def test_bajo_el_umbral_no_registra(self):
+        config = {**settings.RH_CONFIG, 'MEDICION_UMBRAL_MS': 10 ** 6, 'MEDICION_UMBRAL_CONSULTAS': 10 ** 6}
+        with self.settings(RH_CONFIG=config), self.assertNoLogs('empleados.medicion'):
+            self.assertEqual(self.client.get(reverse('empleados:rh_dashboard')).status_code, 200)
+
+
+class BitacoraTests(TestCase):
+    """Registro JSON por líneas a través de la cola, con contexto de la petición y rotación"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.archivo = os.path.join(directorio.name, 'prueba.log')
+
+    def _lineas(self, archivo):
+        with open(archivo, encoding='utf-8') as entrada:
+            return [json.loads(linea) for linea in entrada]
+
+    def test_peticion_en_cada_linea(self):
+        manejador = ManejadorCola(self.archivo)
+        manejador.setFormatter(FormatoJSON())
+        manejador.addFilter(FiltroPeticion())
+        logger = logging.getLogger('empleados.medicion')
+        logger.addHandler(manejador)
+        self.addCleanup(logger.removeHandler, manejador)
+
+        perfil = crear_perfil('bitacora', 'RH')
+        self.client.force_login(perfil.usuario)
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'MEDICION_UMBRAL_CONSULTAS': 1}):
+            respuesta = self.client.get(reverse('empleados:rh_dashboard'), HTTP_X_REQUEST_ID='prueba-123')
+        self.assertEqual(respuesta['X-Request-ID'], 'prueba-123')
+        # Los argumentos se formatean al encolar, no cuando escribe el hilo
+        argumentos = ['antes']
+        logger.warning('fuera de la petición %s', argumentos)
+        argumentos[0] = 'después'
+        # close() detiene el hilo escritor después de vaciar la cola
+        manejador.close()
+
+        peticion, fuera = self._lineas(self.archivo)
+        self.assertEqual(
+            (peticion['request_id'], peticion['usuario_id'], peticion['medicion']['vista']),
+            ('prueba-123', perfil.usuario_id, 'empleados:rh_dashboard'),
+        )
+        self.assertEqual(
+            (fuera['mensaje'], fuera['request_id'], fuera['nivel']),
+            ("fuera de la petición ['antes']", None, 'WARNING'),
+        )
+
+    def test_rotacion_por_tamano(self):
+        manejador = ArchivoRotativo(self.archivo, max_bytes=2000, respaldos=2)
+        manejador.setFormatter(FormatoJSON())
+        for numero in range(100):
+            manejador.emit(logging.makeLogRecord({'msg': f'registro {numero:03}', 'levelname': 'INFO'}))
+        manejador.close()
+
+        archivos = [self.archivo, f'{self.archivo}.1', f'{self.archivo}.2']
+        self.assertFalse(os.path.exists(f'{self.archivo}.3'))
+        for archivo in archivos:
+            self.assertLessEqual(os.path.getsize(archivo), 2000)
+        # Lo más reciente queda en el archivo actual, en orden y sin líneas rotas
+        mensajes = [linea['mensaje'] for archivo in reversed(archivos) for linea in self._lineas(archivo)]
+        self.assertEqual(mensajes[-1], 'registro 099')
+        self.assertEqual(mensajes, sorted(mensajes))
+
+
+class GeneracionDatosTests(TestCase):
+    """El generador de carga solo produce solicitudes que la aplicación aceptaría"""
+
+    def test_sin_solicitudes_de_cero_dias(self):
+        # Todos los días entre semana son festivos salvo los lunes
+        hoy = timezone.localdate()
+        dia = hoy - timedelta(days=3 * 366)
+        festivos = []
+        while dia <= hoy + timedelta(days=130):
+            if 0 < dia.weekday() < 5:
+                festivos.append(DiaFestivo(fecha=dia, nombre='Festivo'))
+            dia += timedelta(days=1)
+        DiaFestivo.objects.bulk_create(festivos)
+        cache.clear()
+
+        GeneradorDatos(20, 300, semilla=1).generar()
+        self.assertEqual(SolicitudVacaciones.objects.count(), 300)
+        self.assertFalse(SolicitudVacaciones.objects.filter(dias_solicitados=0).exists())
+        self.assertFalse(MovimientoVacaciones.objects.filter(dias=0).exists())
+
+
+DASHBOARDS = {
+    'admin': 'admin_dashboard', 'rh': 'rh_dashboard', 'jefe': 'jefe_dashboard', 'empleado': 'empleado_dashboard',
+}
+
+
+class UrlsDashboardsAsync:
+    """``ROOT_URLCONF`` como con ``rh_project.asgi``: los dashboards son los de ``views_async``"""
+    urlpatterns = [
+        path('admin/', admin.site.urls),
+        path('', include(([
+            path(str(patron.pattern), getattr(views_async, patron.name), name=patron.name)
+            if patron.name in DASHBOARDS.values() else patron
+            for patron in empleados_urls.urlpatterns
+        ], 'empleados'))),
+    ]
+
+
+@override_settings(ROOT_URLCONF=UrlsDashboardsAsync)
+class DashboardsAsyncTests(TestCase):
+    """Los dashboards async muestran lo mismo que calculan las estadísticas, con y sin el panel en cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        departamento = Departamento.objects.create(nombre='Sistemas')
+        cls.perfiles = {
+            'admin': crear_perfil('async_admin', 'ADMIN'),
+            'rh': crear_perfil('async_rh', 'RH'),
+            'jefe': crear_perfil('async_jefe', 'JEFE_AREA', departamento),
+        }
+        departamento.jefe = cls.perfiles['jefe']
+        departamento.save()
+        cls.perfiles['empleado'] = crear_perfil('async_empleado', 'EMPLEADO', departamento, cls.perfiles['jefe'])
+        for estado in ('PENDIENTE_JEFE', 'PENDIENTE_RH', 'PENDIENTE_RH', 'APROBADO_RH'):
+            SolicitudVacaciones.objects.create(
+                empleado=cls.perfiles['empleado'], fecha_inicio=date(2024, 6, 3), fecha_fin=date(2024, 6, 4),
+                motivo='prueba', estado=estado,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_dashboards_async(self):
+        for rol, nombre in DASHBOARDS.items():
+            perfil = self.perfiles[rol]
+            esperado = await sync_to_async(
+                lambda: [tarjeta['valor'] for tarjeta in panel_estadisticas(rol, perfil).tarjetas]
+            )()
+            await self.async_client.aforce_login(perfil.usuario)
+            # Primero se calculan las estadísticas; después el panel sale del cache
+            for intento in ('sin cache', 'en cache'):
+                with self.subTest(rol=rol, panel=intento):
+                    respuesta = await self.async_client.get(reverse(f'empleados:{nombre}'))
+                    self.assertEqual(respuesta.status_code, 200)
+                    self.assertIs(respuesta.resolver_match.func, getattr(views_async, nombre))
+                    tarjetas = re.findall(r'stats-number">(\d+)<', respuesta.content.decode())
+                    self.assertEqual([int(valor) for valor in tarjetas], esperado)
+
+        # El último es el del empleado, con su listado paginado
+        self.assertEqual(len(list(respuesta.context['solicitudes'])), 4)
+
+    async def test_rol_equivocado(self):
+        await self.async_client.aforce_login(self.perfiles['empleado'].usuario)
+        with self.assertLogs('django.request', 'WARNING'):
+            respuesta = await self.async_client.get(reverse('empleados:rh_dashboard'))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+@mock.patch('empleados.middleware.replica_configurada', return_value=True)
+@mock.patch('empleados.replicas.replica_configurada', return_value=True)
+class ReplicaTests(TestCase):
+    """Qué lecturas van a la réplica y cuándo se fija la cookie de escritura reciente"""
+
+    def setUp(self):
+        # ReplicaMiddleware instala el registro de escrituras en las conexiones
+        self.addCleanup(self._quitar_registro)
+
+    def _quitar_registro(self):
+        connection_created.disconnect(dispatch_uid='empleados.replicas')
+        if _registrar_escritura in connection.execute_wrappers:
+            connection.execute_wrappers.remove(_registrar_escritura)
+
+    def test_router(self, *_):
+        router = RouterReplica()
+        perfil = crear_perfil('replica')
+        self.assertEqual(router.db_for_read(Perfil), 'default')
+        with lecturas(True):
+            self.assertEqual(router.db_for_read(Perfil), 'replica')
+            # Sesiones y usuarios siempre del primario, y las relaciones de donde salió el objeto
+            self.assertEqual(router.db_for_read(User), 'default')
+            self.assertEqual(router.db_for_read(Departamento, instance=perfil), 'default')
+            self.assertEqual(router.db_for_write(Perfil), 'default')
+            with lecturas(False):
+                self.assertEqual(router.db_for_read(Perfil), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'empleados'))
+
+    def _peticion(self, vista, metodo='get', **cookies):
+        """``(base de las lecturas, respuesta)`` de ``vista`` detrás de ``ReplicaMiddleware``"""
+        def get_response(request):
+            middleware.process_view(request, vista, (), {})
+            return HttpResponse(vista())
+        middleware = ReplicaMiddleware(get_response)
+        factory = RequestFactory()
+        for nombre, valor in cookies.items():
+            factory.cookies[nombre] = valor
+        respuesta = middleware(getattr(factory, metodo)('/'))
+        return respuesta.content.decode(), respuesta
+
+    def test_middleware(self, *_):
+        @lectura_replica
+        def listado():
+            return RouterReplica().db_for_read(Perfil)
+
+        def detalle():
+            return RouterReplica().db_for_read(Perfil)
+
+        @lectura_replica
+        def escribe():
+            Departamento.objects.create(nombre='Nuevo')
+            return RouterReplica().db_for_read(Perfil)
+
+        base, respuesta = self._peticion(listado)
+        self.assertEqual(base, 'replica')
+        self.assertNotIn(COOKIE_ESCRITURA, respuesta.cookies)
+        self.assertEqual(self._peticion(detalle)[0], 'default')
+        self.assertEqual(self._peticion(listado, 'post')[0], 'default')
+        self.assertEqual(self._peticion(listado, **{COOKIE_ESCRITURA: '1'})[0], 'default')
+
+        # Quien escribe lee del primario mientras dure la cookie
+        _, respuesta = self._peticion(escribe)
+        self.assertEqual(respuesta.cookies[COOKIE_ESCRITURA]['max-age'],
+                         settings.RH_CONFIG.get('REPLICA_ESCRITURA_SEGUNDOS', 300))
+
+
+class SqliteProduccionTests(TransactionTestCase):
+    """Pragmas por conexión y reintentos de las escrituras bloqueadas (perfil RH_SQLITE_PRODUCCION)"""
+
+    def setUp(self):
+        self.numeros = itertools.count(1)
+
+    def _pragma(self, nombre):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nombre}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        anterior = self._pragma('busy_timeout')
+        self.addCleanup(connection.cursor().execute, f'PRAGMA busy_timeout = {anterior}')
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'SQLITE_PRAGMAS': {'busy_timeout': 1234}}):
+            configurar_sqlite(None, connection)
+        self.assertEqual(self._pragma('busy_timeout'), 1234)
+
+        # La réplica (solo lectura) no recibe los pragmas de escritura
+        pragmas = {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234}
+        replica = mock.MagicMock(vendor='sqlite', alias='replica')
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'SQLITE_PRAGMAS': pragmas}):
+            configurar_sqlite(None, replica)
+        ejecutadas = replica.cursor.return_value.__enter__.return_value.execute.call_args_list
+        self.assertEqual([llamada.args[0] for llamada in ejecutadas], ['PRAGMA busy_timeout = 1234'])
+
+    def _vista(self, fallos, error='database is locked'):
+        """Vista que escribe y falla ``fallos`` veces con ``error`` antes de responder"""
+        intentos = []
+
+        @reintentar_bloqueo
+        def vista(request):
+            intentos.append(1)
+            Departamento.objects.create(nombre=f'Intento {next(self.numeros)}')
+            if len(intentos) <= fallos:
+                raise OperationalError(error)
+            return HttpResponse('ok')
+        return vista, intentos
+
+    @mock.patch('empleados.basedatos.time.sleep')
+    def test_reintenta_escrituras_bloqueadas(self, dormir):
+        with self.settings(RH_CONFIG={**settings.RH_CONFIG, 'SQLITE_REINTENTOS': 2}):
+            vista, intentos = self._vista(fallos=2)
+            with self.assertLogs('empleados.basedatos', 'WARNING'):
+                self.assertEqual(vista(RequestFactory().post('/')).content, b'ok')
+            # Los intentos fallidos se revirtieron completos
+            self.assertEqual((len(intentos), dormir.call_count), (3, 2))
+            self.assertEqual(list(Departamento.objects.values_list('nombre', flat=True)), ['Intento 3'])
+
+            vista, intentos = self._vista(fallos=3)
+            with self.assertLogs('empleados.basedatos', 'WARNING'), self.assertRaises(OperationalError):
+                vista(RequestFactory().post('/'))
+            self.assertEqual(len(intentos), 3)
+
+            # Otros errores y los GET no se repiten
+            vista, intentos = self._vista(fallos=1, error='disk I/O error')
+            with self.assertRaises(OperationalError):
+                vista(RequestFactory().post('/'))
+            vista, intentos = self._vista(fallos=1)
+            with self.assertRaises(OperationalError):
+                vista(RequestFactory().get('/'))
+            self.assertEqual(len(intentos), 1)
+
+
+class ConsultasDashboardTests(TestCase):
+    """Cada dashboard hace un número fijo de consultas, sin importar cuántas filas haya"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departamento = Departamento.objects.create(nombre='Sistemas')
+        cls.admin = crear_perfil('admin', 'ADMIN')
+        cls.rh = crear_perfil('rh', 'RH')
+        cls.jefe = crear_perfil('jefe', 'JEFE_AREA', cls.departamento)
+        cls.departamento.jefe = cls.jefe
+        cls.departamento.save()
+        cls.empleado = crear_perfil('empleado', 'EMPLEADO', cls.departamento, cls.jefe)
+
+    def setUp(self):
+        cache.clear()
+
+    def _agregar_empleados(self, cantidad):
+        """Una solicitud por cada rama de los agregados, con las aprobaciones de este mes"""
+        ahora = timezone.now()
+        fechas = {
+            'APROBADO_JEFE': {'fecha_aprobacion_jefe': ahora},
+            'APROBADO_RH': {'fecha_aprobacion_jefe': ahora, 'fecha_aprobacion_rh': ahora},
+            'RECHAZADO_RH': {'fecha_aprobacion_jefe': ahora, 'fecha_aprobacion_rh': ahora},
+        }
+        for _ in range(cantidad):
+            perfil = crear_perfil(f'extra{Perfil.objects.count()}', 'EMPLEADO', self.departamento, self.jefe)
+            for estado in ('PENDIENTE_JEFE', 'PENDIENTE_RH', 'APROBADO_JEFE', 'APROBADO_RH', 'RECHAZADO_RH'):
+                SolicitudVacaciones.objects.create(
+                    empleado=perfil, fecha_inicio=date(2024, 4, 1), fecha_fin=date(2024, 4, 2),
+                    motivo='prueba', estado=estado, **fechas.get(estado, {}),
+                )
+
+    def test_filas_agregadas_cuentan_en_las_estadisticas(self):
+        self._agregar_empleados(2)
+        self.assertEqual(estadisticas.estadisticas_rh(), {
+            'solicitudes_pendientes': 2, 'aprobadas_este_mes': 2, 'rechazadas_este_mes': 2,
+        })
+        jefe = Perfil.objects.get(pk=self.jefe.pk)
+        self.assertEqual(estadisticas.estadisticas_jefe(jefe)['aprobadas_este_mes'], 2)
+
+    def _verificar(self, perfil, nombre_url, consultas):
+        """
+        ``consultas`` incluye sesión, usuario y perfil (3) y los grupos del
+        menú (1); el resto son las del dashboard.
+        """
+        self.client.force_login(perfil.usuario)
+        for cantidad in (0, 10):
+            self._agregar_empleados(cantidad)
+            # Con el cache vacío: los paneles de estadísticas se calculan
+            cache.clear()
+            with self.subTest(filas_extra=cantidad), self.assertNumQueries(consultas):
+                respuesta = self.client.get(reverse(nombre_url))
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_admin_dashboard(self):
+        # Estadísticas en un aggregate + perfiles y departamentos activos + recientes
+        self._verificar(self.admin, 'empleados:admin_dashboard', 8)
+
+    def test_rh_dashboard(self):
+        self._verificar(self.rh, 'empleados:rh_dashboard', 6)
+
+    def test_jefe_dashboard(self):
+        self._verificar(self.jefe, 'empleados:jefe_dashboard', 8)
+
+    def test_empleado_dashboard(self):
+        self._verificar(self.empleado, 'empleados:empleado_dashboard', 6)
+
+
+class ConsultasAdminTests(TestCase):
+    """Los listados del admin hacen las mismas consultas con 10 y con 1000 filas por modelo"""
+
+    LISTADOS = [
+        '/admin/auth/user/',
+        '/admin/empleados/perfil/',
+        '/admin/empleados/departamento/',
+        '/admin/empleados/solicitudvacaciones/',
+        '/admin/empleados/movimientovacaciones/',
+        '/admin/empleados/diafestivo/',
+        '/admin/empleados/notificacion/',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.superusuario = User.objects.create_superuser('verificar_admin', 'verificar@example.com', None)
+
+    def _poblar(self, desde, hasta):
+        """Agregar las filas ``desde``..``hasta`` de cada modelo con ``bulk_create``"""
+        indices = range(desde, hasta)
+        hoy = timezone.localdate()
+        departamentos = Departamento.objects.bulk_create(
+            Departamento(nombre=f'Departamento {i}') for i in indices
+        )
+        usuarios = User.objects.bulk_create(
+            User(username=f'empleado{i}', first_name=f'Nombre{i}', last_name=f'Apellido{i}') for i in indices
+        )
+        # bulk_create no dispara crear_perfil_usuario
+        perfiles = Perfil.objects.bulk_create(
+            Perfil(
+                usuario=usuario, departamento=departamento, tipo_perfil='EMPLEADO',
+                fecha_contratacion=date(2020, 1, 1), numero_empleado=f'V{i:06d}',
+                puesto='Analista', salario=10000,
+            )
+            for i, usuario, departamento in zip(indices, usuarios, departamentos)
+        )
+        for departamento, perfil in zip(departamentos, perfiles):
+            departamento.jefe = perfil
+        Departamento.objects.bulk_update(departamentos, ['jefe'])
+        solicitudes = SolicitudVacaciones.objects.bulk_create(
+            SolicitudVacaciones(
+                empleado=perfil, fecha_inicio=hoy, fecha_fin=hoy, dias_solicitados=1,
+                aprobado_por_jefe=perfil, aprobado_por_rh=perfil,
+            )
+            for perfil in perfiles
+        )
+        MovimientoVacaciones.objects.bulk_create(
+            MovimientoVacaciones(perfil=perfil, solicitud=solicitud, tipo='AJUSTE', dias=0, registrado_por=perfil)
+            for perfil, solicitud in zip(perfiles, solicitudes)
+        )
+        DiaFestivo.objects.bulk_create(
+            DiaFestivo(fecha=date(2000, 1, 1) + timedelta(days=i), nombre=f'Festivo {i}') for i in indices
+        )
+        Notificacion.objects.bulk_create(
+            Notificacion(destinatario=perfil, solicitud=solicitud, evento='PENDIENTE_JEFE',
+                         disponible_en=timezone.now())
+            for perfil, solicitud in zip(perfiles, solicitudes)
+        )
+
+    def test_listados_sin_n_mas_1(self):
+        self.client.force_login(self.superusuario)
+        self._poblar(0, 10)
+        con_10 = {}
+        for url in self.LISTADOS:
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get(url).status_code, 200, url)
+            con_10[url] = len(consultas)
+
+        self._poblar(10, 1000)
+        for url in self.LISTADOS:
+            # Si falla, assertNumQueries lista las consultas que sobran
+            with self.subTest(url=url), self.assertNumQueries(con_10[url]):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class PlanesConsultaTests(TestCase):
+    """
+    EXPLAIN de cada consulta de dashboards y listados: falla si alguna
+    recorre una tabla completa. La base de prueba está vacía, así que el plan
+    depende solo del esquema y los índices. Con PostgreSQL correr
+    ``manage.py test --settings=rh_project.settings_production``.
+    """
+
+    # Tablas pequeñas (catálogos) que pueden recorrerse completas
+    TABLAS_PERMITIDAS = {'empleados_departamento', 'empleados_configuracionsistema'}
+    ESCANEO = {
+        'sqlite': re.compile(r'^SCAN (\w+)$'),
+        'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    }
+
+    def _consultas(self):
+        """(nombre, callable) de cada consulta de dashboards y listados"""
+        departamento = Departamento(pk=1)
+        perfil = Perfil(pk=1, departamento=departamento, ruta_jerarquia='/1/')
+        pagina = TAMANO_PAGINA_DEFAULT + 1
+
+        return [
+            ('admin_dashboard: estadísticas', estadisticas.estadisticas_admin),
+            ('admin_dashboard: solicitudes recientes', lambda: list(
+                SolicitudVacaciones.objects.filter(estado__in=estadisticas.ESTADOS_PENDIENTES)
+                .select_related('empleado__usuario').order_by('-fecha_solicitud')[:10]
+            )),
+            ('rh_dashboard: estadísticas', estadisticas.estadisticas_rh),
+            ('rh_dashboard: pendientes', lambda: list(
+                SolicitudVacaciones.objects.filter(estado='PENDIENTE_RH')
+                .order_by(*ORDEN_SOLICITUDES)[:pagina]
+            )),
+            ('jefe_dashboard: estadísticas', lambda: estadisticas.estadisticas_jefe(perfil)),
+            ('jefe_dashboard: pendientes', lambda: list(
+                SolicitudVacaciones.objects.filter(
+                    perfil.filtro_a_cargo('empleado__'), estado='PENDIENTE_JEFE'
+                ).order_by(*ORDEN_SOLICITUDES)[:pagina]
+            )),
+            ('jefe_dashboard: empleados', lambda: list(
+                Perfil.objects.filter(perfil.filtro_a_cargo(), activo=True)
+                .order_by(*ORDEN_PERFILES)[:pagina]
+            )),
+            ('organigrama: subárbol', lambda: list(
+                Perfil.objects.subordinados(perfil).values_list('id', flat=True)
+            )),
+            ('empleado_dashboard: estadísticas', lambda: estadisticas.estadisticas_empleado(perfil)),
+            ('empleado_dashboard: solicitudes', lambda: list(
+                SolicitudVacaciones.objects.filter(empleado=perfil).order_by(*ORDEN_SOLICITUDES)[:pagina]
+            )),
+            ('gestion_usuarios: por tipo', lambda: list(
+                Perfil.objects.filter(activo=True, tipo_perfil='RH').order_by(*ORDEN_PERFILES)[:pagina]
+            )),
+            ('gestion_usuarios: por departamento', lambda: list(
+                Perfil.objects.filter(activo=True, departamento=departamento).order_by(*ORDEN_PERFILES)[:pagina]
+            )),
+            ('aprobar_rh: solicitud', lambda: list(
+                SolicitudVacaciones.objects.filter(pk=1).select_related('empleado')
+            )),
+        ]
+
+    def _explicar(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return [fila[-1] for fila in cursor.fetchall()]
+            # Sin datos PostgreSQL prefiere Seq Scan aunque haya índice;
+            # desactivarlo deja el Seq Scan solo donde no hay alternativa
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [fila[0] for fila in cursor.fetchall()]
+
+    def test_consultas_usan_indices(self):
+        if connection.vendor not in self.ESCANEO:
+            self.skipTest(f'Backend no soportado: {connection.vendor}')
+        patron = self.ESCANEO[connection.vendor]
+        for nombre, consulta in self._consultas():
+            with CaptureQueriesContext(connection) as capturadas:
+                consulta()
+            for capturada in capturadas.captured_queries:
+                plan = self._explicar(capturada['sql'])
+                recorridas = {
+                    coincidencia.group(1)
+                    for coincidencia in (patron.search(linea.strip()) for linea in plan)
+                    if coincidencia
+                } - self.TABLAS_PERMITIDAS
+                with self.subTest(consulta=nombre):
+                    self.assertFalse(recorridas, f'Recorrido completo: {" | ".join(plan)}')
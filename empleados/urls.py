@@ -2,8 +2,13 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 from . import views
+from . import views_async
 from . import auth_views
 
+# Con ASGI (rh_project.asgi) los dashboards son las vistas async; con WSGI
+# cada vista async necesitaría su propio event loop por petición
+dashboards = views_async if settings.RH_CONFIG.get('DASHBOARDS_ASYNC') else views
+
 
 app_name = 'empleados'
 
@@ -14,20 +19,25 @@ urlpatterns = [
     path('logout/', auth_views.logout_view, name='logout'),
     
     # === DASHBOARDS POR PERFIL ===
-    path('admin/', views.admin_dashboard, name='admin_dashboard'),
-    path('rh/', views.rh_dashboard, name='rh_dashboard'),
-    path('jefe/', views.jefe_dashboard, name='jefe_dashboard'),
-    path('empleado/', views.empleado_dashboard, name='empleado_dashboard'),
+    # '/admin/' es el admin de Django
+    path('administracion/', dashboards.admin_dashboard, name='admin_dashboard'),
+    path('rh/', dashboards.rh_dashboard, name='rh_dashboard'),
+    path('jefe/', dashboards.jefe_dashboard, name='jefe_dashboard'),
+    path('empleado/', dashboards.empleado_dashboard, name='empleado_dashboard'),
     
     # === GESTIÓN DE USUARIOS ===
     path('usuarios/', views.gestion_usuarios, name='gestion_usuarios'),
     path('usuarios/crear/', views.crear_usuario, name='crear_usuario'),
+    path('usuarios/exportar/', views.exportar_usuarios, name='exportar_usuarios'),
+    path('usuarios/importar/', views.importar_empleados, name='importar_empleados'),
+    path('usuarios/importar/errores/<str:nombre>/', views.errores_importacion, name='errores_importacion'),
     path('usuarios/<int:perfil_id>/editar/', views.editar_perfil, name='editar_perfil'),
     
     # === GESTIÓN DE VACACIONES ===
     path('vacaciones/solicitar/', views.solicitar_vacaciones, name='solicitar_vacaciones'),
     path('vacaciones/<int:solicitud_id>/aprobar-jefe/', views.aprobar_jefe, name='aprobar_jefe'),
     path('vacaciones/<int:solicitud_id>/aprobar-rh/', views.aprobar_rh, name='aprobar_rh'),
+    path('api/vacaciones/lote/', views.procesar_lote, name='procesar_lote'),
     
     # === GESTIÓN DE DEPARTAMENTOS ===
     path('departamentos/', views.gestion_departamentos, name='gestion_departamentos'),
@@ -35,6 +45,9 @@ urlpatterns = [
     
     # === API ENDPOINTS ===
     path('api/validar-antiguedad/', views.validar_antiguedad, name='validar_antiguedad'),
+    path('api/organigrama/', views.organigrama, name='organigrama'),
+    path('api/autocompletar/<str:fuente>/', views.autocompletar, name='autocompletar'),
+    path('metrics', views.metricas, name='metricas'),
     
     # === PERFIL DE USUARIO ===
     path('perfil/', auth_views.perfil_usuario, name='perfil_usuario'),
@@ -1,83 +1,101 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
-from django.db.models import Q, Count
-from django.http import JsonResponse
+from django.db.models import Count
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.urls import reverse
 from .models import Perfil, Departamento, SolicitudVacaciones, ConfiguracionSistema
 from .forms import (
     UsuarioConPerfilForm, SolicitudVacacionesForm, 
-    AprobacionJefeForm, AprobacionRHForm, EditarPerfilForm, ConfigurarDepartamentoForm
+    AprobacionJefeForm, AprobacionRHForm, EditarPerfilForm, ConfigurarDepartamentoForm,
+    ImportarEmpleadosForm
 )
+from .importacion import ImportadorEmpleados, ErrorImportacion, leer_filas
+from .exportacion import exportar_csv, exportar_xlsx
+from .middleware import cargar_perfil
+from .aprobaciones import (
+    procesar_lote_jefe, procesar_lote_rh, MAX_SOLICITUDES_LOTE, APROBADA, RECHAZADA
+)
+from .paginacion import paginar, ORDEN_SOLICITUDES, ORDEN_PERFILES
+from .cobertura import cobertura_departamento
+from .jerarquia import organigrama_json
+from .busqueda import buscar
+from .autocompletar import opciones, FUENTES
+from .estadisticas import ESTADOS_PENDIENTES
+from .fragmentos import panel_estadisticas
+from .metricas import exponer
+from .replicas import lectura_replica
+from .basedatos import reintentar_bloqueo
+from django.conf import settings
 from datetime import date, timedelta
+import hmac
+import json
+import os
+import re
 
 
-def get_user_profile(user):
-    """Obtener perfil del usuario actual"""
-    try:
-        return user.perfil
-    except Perfil.DoesNotExist:
-        return None
+def get_user_profile(request):
+    """Obtener perfil del usuario actual (cargado una vez por petición)"""
+    if hasattr(request, 'perfil'):
+        return request.perfil
+    return cargar_perfil(request.user)
 
 
 @login_required
 def dashboard(request):
     """Dashboard principal redirigido según tipo de perfil"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     
     if not perfil:
         messages.error(request, 'No tienes un perfil asignado. Contacta al administrador.')
-        return redirect('logout')
+        return redirect('empleados:logout')
     
     # Redirigir según tipo de perfil
     if perfil.es_admin():
-        return redirect('admin_dashboard')
+        return redirect('empleados:admin_dashboard')
     elif perfil.es_rh():
-        return redirect('rh_dashboard')
+        return redirect('empleados:rh_dashboard')
     elif perfil.es_jefe_area():
-        return redirect('jefe_dashboard')
+        return redirect('empleados:jefe_dashboard')
     else:
-        return redirect('empleado_dashboard')
+        return redirect('empleados:empleado_dashboard')
 
 
+@lectura_replica
 @login_required
 def admin_dashboard(request):
     """Dashboard para administradores"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_admin():
         raise PermissionDenied
     
-    # Estadísticas generales
-    stats = {
-        'total_empleados': Perfil.objects.filter(activo=True).count(),
-        'total_departamentos': Departamento.objects.filter(activo=True).count(),
-        'solicitudes_pendientes': SolicitudVacaciones.objects.filter(
-            estado__in=['PENDIENTE_JEFE', 'PENDIENTE_RH']
-        ).count(),
-        'solicitudes_este_mes': SolicitudVacaciones.objects.filter(
-            fecha_solicitud__month=timezone.now().month
-        ).count(),
-    }
+    # Estadísticas generales (se calculan solo si el panel no está en cache)
+    panel = panel_estadisticas('admin')
     
     # Solicitudes recientes
     solicitudes_recientes = SolicitudVacaciones.objects.filter(
-        estado__in=['PENDIENTE_JEFE', 'PENDIENTE_RH']
-    ).order_by('-fecha_solicitud')[:10]
+        estado__in=ESTADOS_PENDIENTES
+    ).select_related('empleado__usuario').order_by('-fecha_solicitud')[:10]
     
     context = {
-        'stats': stats,
+        'stats': SimpleLazyObject(lambda: panel.stats),
+        'panel_estadisticas': panel,
         'solicitudes_recientes': solicitudes_recientes,
         'perfil': perfil,
     }
     return render(request, 'empleados/admin/dashboard.html', context)
 
 
+@lectura_replica
 @login_required
 def rh_dashboard(request):
     """Dashboard para Recursos Humanos"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_rh():
         raise PermissionDenied
     
@@ -87,68 +105,68 @@ def rh_dashboard(request):
     ).order_by('-fecha_solicitud')
     
     # Estadísticas
-    stats = {
-        'solicitudes_pendientes': solicitudes_pendientes.count(),
-        'aprobadas_este_mes': SolicitudVacaciones.objects.filter(
-            estado='APROBADO_RH',
-            fecha_aprobacion_rh__month=timezone.now().month
-        ).count(),
-        'rechazadas_este_mes': SolicitudVacaciones.objects.filter(
-            estado='RECHAZADO_RH',
-            fecha_aprobacion_rh__month=timezone.now().month
-        ).count(),
-    }
+    panel = panel_estadisticas('rh')
     
     context = {
-        'solicitudes_pendientes': solicitudes_pendientes,
-        'stats': stats,
+        'solicitudes_pendientes': paginar(
+            request,
+            solicitudes_pendientes.select_related('empleado__usuario', 'empleado__departamento'),
+            ORDEN_SOLICITUDES
+        ),
+        'stats': SimpleLazyObject(lambda: panel.stats),
+        'panel_estadisticas': panel,
         'perfil': perfil,
     }
     return render(request, 'empleados/rh/dashboard.html', context)
 
 
+@lectura_replica
 @login_required
 def jefe_dashboard(request):
     """Dashboard para Jefes de Área"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_jefe_area():
         raise PermissionDenied
     
-    # Solicitudes de empleados del departamento
+    # Solicitudes del personal a cargo (departamento y/o subordinados)
     solicitudes_pendientes = SolicitudVacaciones.objects.filter(
-        empleado__departamento=perfil.departamento,
+        perfil.filtro_a_cargo('empleado__'),
         estado='PENDIENTE_JEFE'
     ).order_by('-fecha_solicitud')
     
-    # Estadísticas del departamento
+    # Estadísticas del personal a cargo
     empleados_departamento = Perfil.objects.filter(
-        departamento=perfil.departamento,
+        perfil.filtro_a_cargo(),
         activo=True
     )
     
-    stats = {
-        'empleados_departamento': empleados_departamento.count(),
-        'solicitudes_pendientes': solicitudes_pendientes.count(),
-        'aprobadas_este_mes': SolicitudVacaciones.objects.filter(
-            empleado__departamento=perfil.departamento,
-            estado='APROBADO_JEFE',
-            fecha_aprobacion_jefe__month=timezone.now().month
-        ).count(),
-    }
+    panel = panel_estadisticas('jefe', perfil)
     
     context = {
-        'solicitudes_pendientes': solicitudes_pendientes,
-        'stats': stats,
+        'solicitudes_pendientes': paginar(
+            request,
+            solicitudes_pendientes.select_related('empleado__usuario'),
+            ORDEN_SOLICITUDES,
+            parametro='cursor_solicitudes'
+        ),
+        'stats': SimpleLazyObject(lambda: panel.stats),
+        'panel_estadisticas': panel,
         'perfil': perfil,
-        'empleados_departamento': empleados_departamento,
+        'empleados_departamento': paginar(
+            request,
+            empleados_departamento.select_related('usuario'),
+            ORDEN_PERFILES,
+            parametro='cursor_empleados'
+        ),
     }
     return render(request, 'empleados/jefe/dashboard.html', context)
 
 
+@lectura_replica
 @login_required
 def empleado_dashboard(request):
     """Dashboard para Empleados"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_empleado():
         raise PermissionDenied
     
@@ -158,18 +176,12 @@ def empleado_dashboard(request):
     ).order_by('-fecha_solicitud')
     
     # Estadísticas personales
-    stats = {
-        'dias_disponibles': perfil.dias_vacaciones_disponibles,
-        'dias_usados': perfil.dias_vacaciones_usados,
-        'solicitudes_pendientes': solicitudes.filter(
-            estado__in=['PENDIENTE_JEFE', 'PENDIENTE_RH']
-        ).count(),
-        'solicitudes_aprobadas': solicitudes.filter(estado='APROBADO_RH').count(),
-    }
+    panel = panel_estadisticas('empleado', perfil)
     
     context = {
-        'solicitudes': solicitudes,
-        'stats': stats,
+        'solicitudes': paginar(request, solicitudes, ORDEN_SOLICITUDES),
+        'stats': SimpleLazyObject(lambda: panel.stats),
+        'panel_estadisticas': panel,
         'perfil': perfil,
     }
     return render(request, 'empleados/empleado/dashboard.html', context)
@@ -177,16 +189,10 @@ def empleado_dashboard(request):
 
 # === GESTIÓN DE USUARIOS ===
 
-@login_required
-def gestion_usuarios(request):
-    """Gestión de usuarios - Solo RH y Admin"""
-    perfil = get_user_profile(request.user)
-    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
-        raise PermissionDenied
-    
+def filtrar_usuarios(request):
+    """Perfiles activos filtrados por los parámetros GET de gestión de usuarios"""
     usuarios = Perfil.objects.filter(activo=True)
     
-    # Filtros
     tipo_perfil = request.GET.get('tipo_perfil')
     departamento_id = request.GET.get('departamento')
     busqueda = request.GET.get('busqueda')
@@ -198,17 +204,32 @@ def gestion_usuarios(request):
         usuarios = usuarios.filter(departamento_id=departamento_id)
     
     if busqueda:
-        usuarios = usuarios.filter(
-            Q(usuario__username__icontains=busqueda) |
-            Q(usuario__first_name__icontains=busqueda) |
-            Q(usuario__last_name__icontains=busqueda) |
-            Q(numero_empleado__icontains=busqueda)
-        )
+        usuarios = buscar(usuarios, busqueda)
+    
+    return usuarios
+
+
+@lectura_replica
+@login_required
+def gestion_usuarios(request):
+    """Gestión de usuarios - Solo RH y Admin"""
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
+        raise PermissionDenied
+    
+    usuarios = filtrar_usuarios(request)
+    tipo_perfil = request.GET.get('tipo_perfil')
+    departamento_id = request.GET.get('departamento')
+    busqueda = request.GET.get('busqueda')
     
     departamentos = Departamento.objects.filter(activo=True)
     
     context = {
-        'usuarios': usuarios,
+        'usuarios': paginar(
+            request,
+            usuarios.select_related('usuario', 'departamento'),
+            ORDEN_PERFILES
+        ),
         'departamentos': departamentos,
         'tipo_actual': tipo_perfil,
         'departamento_actual': departamento_id,
@@ -218,10 +239,31 @@ def gestion_usuarios(request):
     return render(request, 'empleados/rh/gestion_usuarios.html', context)
 
 
+@lectura_replica
+@login_required
+def exportar_usuarios(request):
+    """Exportar el directorio filtrado de gestión de usuarios a CSV/XLSX"""
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
+        raise PermissionDenied
+    
+    usuarios = filtrar_usuarios(request)
+    
+    if request.GET.get('formato') == 'xlsx':
+        try:
+            return exportar_xlsx(usuarios)
+        except ImportError:
+            messages.error(request, 'La exportación a XLSX requiere openpyxl (pip install openpyxl).')
+            return redirect('empleados:gestion_usuarios')
+    
+    return exportar_csv(usuarios)
+
+
 @login_required
+@reintentar_bloqueo
 def crear_usuario(request):
     """Crear nuevo usuario con perfil"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not (perfil.es_rh() or perfil.es_admin()):
         raise PermissionDenied
     
@@ -230,7 +272,7 @@ def crear_usuario(request):
         if form.is_valid():
             user = form.save()
             messages.success(request, f'Usuario {user.username} creado exitosamente.')
-            return redirect('gestion_usuarios')
+            return redirect('empleados:gestion_usuarios')
     else:
         form = UsuarioConPerfilForm()
     
@@ -242,9 +284,77 @@ def crear_usuario(request):
 
 
 @login_required
+def importar_empleados(request):
+    """Importación masiva de empleados desde CSV/XLSX - Solo RH y Admin"""
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
+        raise PermissionDenied
+    
+    resultado = None
+    errores = []
+    archivo_errores_url = None
+    
+    if request.method == 'POST':
+        form = ImportarEmpleadosForm(request.POST, request.FILES)
+        if form.is_valid():
+            archivo = form.cleaned_data['archivo']
+            nombre_errores = f"errores_{timezone.now():%Y%m%d_%H%M%S}_{request.user.id}.csv"
+            directorio = settings.RH_CONFIG['IMPORTACION_DIRECTORIO_ERRORES']
+            os.makedirs(directorio, exist_ok=True)
+            ruta_errores = os.path.join(directorio, nombre_errores)
+            
+            try:
+                with open(ruta_errores, 'w', newline='', encoding='utf-8') as archivo_errores:
+                    importador = ImportadorEmpleados(
+                        tamano_lote=form.cleaned_data['tamano_lote'],
+                        archivo_errores=archivo_errores,
+                    )
+                    resultado = importador.importar(leer_filas(archivo.file, archivo.name))
+            except ErrorImportacion as error:
+                messages.error(request, str(error))
+            else:
+                errores = importador.errores_muestra
+                if resultado.errores:
+                    archivo_errores_url = reverse('empleados:errores_importacion', args=[nombre_errores])
+                    messages.warning(request, f'{resultado.errores} filas no se importaron.')
+                messages.success(request, f'{resultado.creadas} empleados importados ({resultado.filas_por_segundo:.0f} filas/s).')
+            
+            if not archivo_errores_url and os.path.exists(ruta_errores):
+                os.remove(ruta_errores)
+    else:
+        form = ImportarEmpleadosForm()
+    
+    context = {
+        'form': form,
+        'resultado': resultado,
+        'errores': errores,
+        'archivo_errores_url': archivo_errores_url,
+        'perfil': perfil,
+    }
+    return render(request, 'empleados/rh/importar_empleados.html', context)
+
+
+@login_required
+def errores_importacion(request, nombre):
+    """Descargar el CSV de filas con error de una importación - Solo RH y Admin"""
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
+        raise PermissionDenied
+    
+    # Solo el nombre generado por importar_empleados, sin rutas
+    if not re.fullmatch(r'errores_\d{8}_\d{6}_\d+\.csv', nombre):
+        raise Http404
+    ruta = os.path.join(settings.RH_CONFIG['IMPORTACION_DIRECTORIO_ERRORES'], nombre)
+    if not os.path.isfile(ruta):
+        raise Http404
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre, content_type='text/csv')
+
+
+@login_required
+@reintentar_bloqueo
 def editar_perfil(request, perfil_id):
     """Editar perfil de usuario"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     perfil_editado = get_object_or_404(Perfil, id=perfil_id)
     
     # Verificar permisos
@@ -256,7 +366,7 @@ def editar_perfil(request, perfil_id):
         if form.is_valid():
             form.save()
             messages.success(request, 'Perfil actualizado exitosamente.')
-            return redirect('gestion_usuarios')
+            return redirect('empleados:gestion_usuarios')
     else:
         form = EditarPerfilForm(instance=perfil_editado)
     
@@ -271,9 +381,10 @@ def editar_perfil(request, perfil_id):
 # === GESTIÓN DE VACACIONES ===
 
 @login_required
+@reintentar_bloqueo
 def solicitar_vacaciones(request):
     """Solicitar vacaciones - Solo empleados"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_empleado():
         raise PermissionDenied
     
@@ -284,7 +395,7 @@ def solicitar_vacaciones(request):
             solicitud.empleado = perfil
             solicitud.save()
             messages.success(request, 'Solicitud de vacaciones enviada exitosamente.')
-            return redirect('empleado_dashboard')
+            return redirect('empleados:empleado_dashboard')
     else:
         form = SolicitudVacacionesForm(empleado=perfil)
     
@@ -296,16 +407,17 @@ def solicitar_vacaciones(request):
 
 
 @login_required
+@reintentar_bloqueo
 def aprobar_jefe(request, solicitud_id):
     """Aprobar/rechazar solicitud por jefe de área"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_jefe_area():
         raise PermissionDenied
     
     solicitud = get_object_or_404(SolicitudVacaciones, id=solicitud_id)
     
-    # Verificar que el empleado pertenece al departamento del jefe
-    if solicitud.empleado.departamento != perfil.departamento:
+    # Verificar que el empleado está a cargo del jefe
+    if not perfil.tiene_a_cargo(solicitud.empleado.departamento_id, solicitud.empleado.ruta_jerarquia):
         raise PermissionDenied
     
     if request.method == 'POST':
@@ -325,22 +437,33 @@ def aprobar_jefe(request, solicitud_id):
                 else:
                     messages.error(request, 'No se pudo rechazar la solicitud.')
             
-            return redirect('jefe_dashboard')
+            return redirect('empleados:jefe_dashboard')
     else:
         form = AprobacionJefeForm(solicitud=solicitud)
     
+    # Ausencias del departamento del empleado (con ALCANCE_JEFE 'jerarquia' o
+    # 'ambos' puede no ser el del jefe) durante el periodo solicitado
+    cobertura = None
+    if solicitud.empleado.departamento_id:
+        cobertura = cobertura_departamento(
+            solicitud.empleado.departamento_id, solicitud.fecha_inicio, solicitud.fecha_fin
+        )
+    
     context = {
         'form': form,
         'solicitud': solicitud,
         'perfil': perfil,
+        'cobertura': cobertura,
+        'cobertura_en_riesgo': bool(cobertura) and solicitud.id in cobertura['solicitudes_en_riesgo'],
     }
     return render(request, 'empleados/jefe/aprobar_solicitud.html', context)
 
 
 @login_required
+@reintentar_bloqueo
 def aprobar_rh(request, solicitud_id):
     """Aprobar/rechazar solicitud por RH"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not perfil.es_rh():
         raise PermissionDenied
     
@@ -363,7 +486,7 @@ def aprobar_rh(request, solicitud_id):
                 else:
                     messages.error(request, 'No se pudo rechazar la solicitud.')
             
-            return redirect('rh_dashboard')
+            return redirect('empleados:rh_dashboard')
     else:
         form = AprobacionRHForm(solicitud=solicitud)
     
@@ -375,12 +498,62 @@ def aprobar_rh(request, solicitud_id):
     return render(request, 'empleados/rh/aprobar_solicitud.html', context)
 
 
+@login_required
+@require_POST
+@reintentar_bloqueo
+def procesar_lote(request):
+    """
+    API para aprobar/rechazar varias solicitudes a la vez (jefes y RH).
+    Acepta JSON ``{"ids": [...], "accion": "aprobar"|"rechazar", "comentario": ""}``
+    o un formulario con ``ids`` repetido; responde el resultado por id.
+    """
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_jefe_area() or perfil.es_rh()):
+        raise PermissionDenied
+    
+    if request.content_type == 'application/json':
+        try:
+            datos = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+        if not isinstance(datos, dict):
+            return JsonResponse({'error': 'El cuerpo debe ser un objeto JSON'}, status=400)
+        ids, accion, comentario = datos.get('ids', []), datos.get('accion'), datos.get('comentario', '')
+        if not isinstance(ids, list) or not all(type(pk) is int for pk in ids):
+            return JsonResponse({'error': 'Los ids deben ser una lista de enteros'}, status=400)
+        if not isinstance(comentario, str):
+            return JsonResponse({'error': 'El comentario debe ser texto'}, status=400)
+    else:
+        ids, accion, comentario = request.POST.getlist('ids'), request.POST.get('accion'), request.POST.get('comentario', '')
+    
+    try:
+        ids = sorted({int(pk) for pk in ids})
+    except ValueError:
+        return JsonResponse({'error': 'Los ids deben ser enteros'}, status=400)
+    if accion not in ('aprobar', 'rechazar'):
+        return JsonResponse({'error': 'La acción debe ser "aprobar" o "rechazar"'}, status=400)
+    if not ids or len(ids) > MAX_SOLICITUDES_LOTE:
+        return JsonResponse({'error': f'Envía entre 1 y {MAX_SOLICITUDES_LOTE} solicitudes'}, status=400)
+    
+    if perfil.es_rh():
+        resultados = procesar_lote_rh(perfil, ids, accion, comentario)
+    else:
+        resultados = procesar_lote_jefe(perfil, ids, accion, comentario)
+    
+    procesadas = sum(1 for resultado in resultados.values() if resultado in (APROBADA, RECHAZADA))
+    return JsonResponse({
+        'procesadas': procesadas,
+        'resultados': {str(pk): resultado for pk, resultado in resultados.items()},
+    })
+
+
 # === GESTIÓN DE DEPARTAMENTOS ===
 
+@lectura_replica
 @login_required
 def gestion_departamentos(request):
     """Gestión de departamentos - Solo RH y Admin"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not (perfil.es_rh() or perfil.es_admin()):
         raise PermissionDenied
     
@@ -396,9 +569,10 @@ def gestion_departamentos(request):
 
 
 @login_required
+@reintentar_bloqueo
 def crear_departamento(request):
     """Crear nuevo departamento"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil or not (perfil.es_rh() or perfil.es_admin()):
         raise PermissionDenied
     
@@ -407,7 +581,7 @@ def crear_departamento(request):
         if form.is_valid():
             form.save()
             messages.success(request, 'Departamento creado exitosamente.')
-            return redirect('gestion_departamentos')
+            return redirect('empleados:gestion_departamentos')
     else:
         form = ConfigurarDepartamentoForm()
     
@@ -423,7 +597,7 @@ def crear_departamento(request):
 @login_required
 def validar_antiguedad(request):
     """API para validar antigüedad de empleado"""
-    perfil = get_user_profile(request.user)
+    perfil = get_user_profile(request)
     if not perfil:
         return JsonResponse({'error': 'Perfil no encontrado'}, status=400)
     
@@ -437,6 +611,64 @@ def validar_antiguedad(request):
     })
 
 
+@lectura_replica
+@login_required
+def organigrama(request):
+    """
+    Organigrama en JSON. RH y Admin ven la empresa completa o el subárbol
+    de ``?raiz=<perfil_id>``; los demás solo su propio subárbol.
+    """
+    perfil = get_user_profile(request)
+    if not perfil:
+        return JsonResponse({'error': 'Perfil no encontrado'}, status=400)
+    
+    raiz_id = request.GET.get('raiz')
+    if raiz_id:
+        raiz = get_object_or_404(Perfil.objects.only('id', 'ruta_jerarquia'), pk=raiz_id)
+        if not (perfil.es_rh() or perfil.es_admin()) and not (
+            raiz.pk == perfil.pk or raiz.ruta_jerarquia.startswith(perfil.ruta_jerarquia or '-')
+        ):
+            raise PermissionDenied
+    elif perfil.es_rh() or perfil.es_admin():
+        raiz = None
+    else:
+        raiz = perfil
+    
+    return HttpResponse(organigrama_json(raiz), content_type='application/json')
+
+
+@lectura_replica
+@login_required
+def autocompletar(request, fuente):
+    """Opciones paginadas para los campos con ``AutocompletarSelect`` - Solo RH y Admin"""
+    perfil = get_user_profile(request)
+    if not perfil or not (perfil.es_rh() or perfil.es_admin()):
+        raise PermissionDenied
+    if fuente not in FUENTES:
+        return JsonResponse({'error': 'Fuente desconocida'}, status=404)
+    
+    return HttpResponse(opciones(request, fuente), content_type='application/json')
+
+
+def metricas(request):
+    """
+    Métricas para Prometheus. Pasan ``Authorization: Bearer <token>`` con
+    ``RH_CONFIG['METRICAS_TOKEN']`` (para el scraper) o una sesión de staff;
+    sin token configurado solo la sesión de staff.
+    """
+    token = settings.RH_CONFIG.get('METRICAS_TOKEN')
+    con_token = bool(token) and hmac.compare_digest(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    )
+    if not (con_token or request.user.is_staff):
+        if request.user.is_authenticated:
+            return HttpResponse('Prohibido', status=403, content_type='text/plain')
+        respuesta = HttpResponse('No autorizado', status=401, content_type='text/plain')
+        respuesta['WWW-Authenticate'] = 'Bearer'
+        return respuesta
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # === VISTAS DE ERROR ===
 
 def error_403(request, exception=None):
@@ -0,0 +1,154 @@
+"""
+Dashboards async para el punto de entrada ASGI (``rh_project.asgi``).
+
+Mismo contexto y plantillas que los de ``views``, pero las consultas que no
+dependen entre sí (las estadísticas del panel, si el fragmento no está en
+cache, y los listados) se lanzan a la vez con ``asyncio.gather``.
+
+Los métodos async del ORM (``aaggregate``, ``acount``, ``async for``)
+ejecutan cada consulta con ``sync_to_async(thread_sensitive=True)``, en el
+único hilo sync de la petición: reunidos con ``gather`` se ejecutarían uno
+detrás de otro. Por eso ``en_paralelo`` corre cada consulta en un hilo
+propio, con su propia conexión, cuando la base es PostgreSQL; conviene
+``CONN_MAX_AGE`` mayor que cero para no abrir una conexión por consulta.
+En SQLite, en el mismo proceso, no hay nada que ganar y se ejecutan en orden
+en un solo salto de hilo.
+
+La plantilla se renderiza con ``sync_to_async``: el menú y, si el fragmento
+expiró entre la comprobación y el render, el panel consultan desde ahí.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db import connection, connections
+from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
+
+from .estadisticas import ESTADOS_PENDIENTES
+from .fragmentos import panel_estadisticas
+from .models import Perfil, SolicitudVacaciones
+from .paginacion import paginar, ORDEN_SOLICITUDES, ORDEN_PERFILES
+from .replicas import lectura_replica
+
+
+def _con_conexion_propia(funcion):
+    """``funcion`` para un hilo del pool: al terminar cierra la conexión del hilo si venció"""
+    def ejecutar():
+        try:
+            return funcion()
+        finally:
+            for conexion in connections.all(initialized_only=True):
+                conexion.close_if_unusable_or_obsolete()
+    return ejecutar
+
+
+async def en_paralelo(*funciones):
+    """Resultados de las funciones sync ``funciones`` (consultas independientes)"""
+    if connection.vendor != 'postgresql' or len(funciones) < 2:
+        return await sync_to_async(lambda: [funcion() for funcion in funciones])()
+    return await asyncio.gather(*(
+        sync_to_async(_con_conexion_propia(funcion), thread_sensitive=False)()
+        for funcion in funciones
+    ))
+
+
+async def _contexto(panel, perfil, **consultas):
+    """
+    Ejecutar ``consultas`` (nombre: función) y, si hacen falta, las
+    estadísticas de ``panel``, todo a la vez. Devuelve el contexto base del
+    dashboard con los resultados.
+    """
+    funciones = dict(consultas)
+    if not panel.en_cache():
+        # Queda guardado en el panel (cached_property) para la plantilla
+        funciones['_stats'] = lambda: panel.stats
+    resultados = dict(zip(funciones, await en_paralelo(*funciones.values())))
+    resultados.pop('_stats', None)
+    return {
+        **resultados,
+        'stats': SimpleLazyObject(lambda: panel.stats),
+        'panel_estadisticas': panel,
+        'perfil': perfil,
+    }
+
+
+@lectura_replica
+@login_required
+async def admin_dashboard(request):
+    """Dashboard para administradores"""
+    perfil = await request.aperfil()
+    if not perfil or not perfil.es_admin():
+        raise PermissionDenied
+
+    context = await _contexto(
+        panel_estadisticas('admin'), perfil,
+        solicitudes_recientes=lambda: list(SolicitudVacaciones.objects.filter(
+            estado__in=ESTADOS_PENDIENTES
+        ).select_related('empleado__usuario').order_by('-fecha_solicitud')[:10]),
+    )
+    return await sync_to_async(render)(request, 'empleados/admin/dashboard.html', context)
+
+
+@lectura_replica
+@login_required
+async def rh_dashboard(request):
+    """Dashboard para Recursos Humanos"""
+    perfil = await request.aperfil()
+    if not perfil or not perfil.es_rh():
+        raise PermissionDenied
+
+    solicitudes_pendientes = SolicitudVacaciones.objects.filter(
+        estado='PENDIENTE_RH'
+    ).select_related('empleado__usuario', 'empleado__departamento')
+    context = await _contexto(
+        panel_estadisticas('rh'), perfil,
+        solicitudes_pendientes=lambda: paginar(request, solicitudes_pendientes, ORDEN_SOLICITUDES),
+    )
+    return await sync_to_async(render)(request, 'empleados/rh/dashboard.html', context)
+
+
+@lectura_replica
+@login_required
+async def jefe_dashboard(request):
+    """Dashboard para Jefes de Área"""
+    perfil = await request.aperfil()
+    if not perfil or not perfil.es_jefe_area():
+        raise PermissionDenied
+
+    solicitudes_pendientes = SolicitudVacaciones.objects.filter(
+        perfil.filtro_a_cargo('empleado__'),
+        estado='PENDIENTE_JEFE'
+    ).select_related('empleado__usuario')
+    empleados_departamento = Perfil.objects.filter(
+        perfil.filtro_a_cargo(),
+        activo=True
+    ).select_related('usuario')
+    context = await _contexto(
+        panel_estadisticas('jefe', perfil), perfil,
+        solicitudes_pendientes=lambda: paginar(
+            request, solicitudes_pendientes, ORDEN_SOLICITUDES, parametro='cursor_solicitudes'
+        ),
+        empleados_departamento=lambda: paginar(
+            request, empleados_departamento, ORDEN_PERFILES, parametro='cursor_empleados'
+        ),
+    )
+    return await sync_to_async(render)(request, 'empleados/jefe/dashboard.html', context)
+
+
+@lectura_replica
+@login_required
+async def empleado_dashboard(request):
+    """Dashboard para Empleados"""
+    perfil = await request.aperfil()
+    if not perfil or not perfil.es_empleado():
+        raise PermissionDenied
+
+    solicitudes = SolicitudVacaciones.objects.filter(empleado=perfil)
+    context = await _contexto(
+        panel_estadisticas('empleado', perfil), perfil,
+        solicitudes=lambda: paginar(request, solicitudes, ORDEN_SOLICITUDES),
+    )
+    return await sync_to_async(render)(request, 'empleados/empleado/dashboard.html', context)
@@ -1,5 +1,11 @@
 """
 ASGI config for rh_project project.
+
+Con este punto de entrada los dashboards son las vistas async de
+``empleados.views_async`` (``RH_DASHBOARDS_ASYNC``). Servir con un servidor
+ASGI, por ejemplo:
+
+    uvicorn rh_project.asgi:application --workers 4
 """
 
 import os
@@ -7,7 +13,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rh_project.settings')
+os.environ.setdefault('RH_DASHBOARDS_ASYNC', '1')
 
 application = get_asgi_application()
-
-
@@ -5,6 +5,8 @@ Configuración refactorizada para el Sistema de RH - Grupo Keila
 from pathlib import Path
 import os
 
+from empleados.bitacora import configuracion_logging
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,11 +30,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'empleados.middleware.ContextoPeticionMiddleware',
+    'empleados.middleware.MedicionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'empleados.middleware.ReplicaMiddleware',
+    'empleados.middleware.PerfilMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -50,6 +56,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'empleados.context_processors.navegacion',
             ],
         },
     },
@@ -65,6 +72,29 @@ DATABASES = {
     }
 }
 
+# Perfil de producción para SQLite (ver empleados.basedatos): WAL y pragmas
+# en cada conexión (RH_CONFIG['SQLITE_PRAGMAS']), escrituras con BEGIN
+# IMMEDIATE y conexiones persistentes entre peticiones
+SQLITE_PRODUCCION = os.environ.get('RH_SQLITE_PRODUCCION') == '1'
+if SQLITE_PRODUCCION:
+    DATABASES['default'].update({
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
+# Réplica de solo lectura para dashboards, listados y exportaciones (ver
+# empleados.replicas). Con SQLite, la copia que genera
+# ``manage.py copiar_replica`` (programarla cada pocos minutos)
+if os.environ.get('RH_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['RH_DB_REPLICA'],
+        'OPTIONS': {'init_command': 'PRAGMA query_only = ON'},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['empleados.replicas.RouterReplica']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -115,50 +145,9 @@ X_FRAME_OPTIONS = 'DENY'
 SESSION_COOKIE_AGE = 3600  # 1 hora
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
-# Configuraciones de logging
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
-            'style': '{',
-        },
-        'simple': {
-            'format': '{levelname} {message}',
-            'style': '{',
-        },
-    },
-    'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'rh_system.log',
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
-        },
-    },
-    'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO',
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-        'empleados': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
-            'propagate': False,
-        },
-    },
-}
+# Configuraciones de logging: JSON por líneas en logs/rh_system.log, escrito
+# desde un hilo aparte y rotado a los 10 MB (ver empleados.bitacora)
+LOGGING = configuracion_logging(BASE_DIR / 'logs')
 
 # Configuraciones específicas del sistema RH
 RH_CONFIG = {
@@ -166,9 +155,51 @@ RH_CONFIG = {
     'ANTIGUEDAD_MINIMA_VACACIONES': 1,  # años
     'MAX_DIAS_VACACIONES_CONTINUAS': 15,
     'DIAS_ADVANCE_NOTICE': 7,  # días de anticipación mínima
+    'PERFIL_CACHE_SEGUNDOS': 0,  # 0 = sin cache; requiere cache compartido con varios procesos
+    'ALCANCE_JEFE': 'ambos',  # 'departamento', 'jerarquia' (subordinados) o 'ambos'
+    'ORGANIGRAMA_CACHE_SEGUNDOS': 300,
+    'AUTOCOMPLETAR_CACHE_SEGUNDOS': 60,
+    'FRAGMENTOS_CACHE_SEGUNDOS': 300,  # menú y paneles de dashboards; 0 = sin cache
+    'FESTIVOS_CACHE_SEGUNDOS': 24 * 3600,  # festivos por año (empleados.calendario)
+    # Importación masiva: hilos que hashean contraseñas (0 = min(4, núcleos)) y
+    # directorio privado (fuera de MEDIA_ROOT) de los CSV de filas con error
+    'IMPORTACION_HILOS_HASH': 0,
+    'IMPORTACION_DIRECTORIO_ERRORES': BASE_DIR / 'privado' / 'importaciones',
+    # Tras escribir, las lecturas del usuario van al primario este tiempo;
+    # mayor que el atraso de la réplica (el intervalo de copiar_replica)
+    'REPLICA_ESCRITURA_SEGUNDOS': 300,
+    # Perfil de producción de SQLite (RH_SQLITE_PRODUCCION=1)
+    'SQLITE_PRAGMAS': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # ms
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,  # KiB por conexión
+        'temp_store': 'MEMORY',
+    } if SQLITE_PRODUCCION else {},
+    # Escrituras repetidas si la base sigue bloqueada (empleados.basedatos)
+    'SQLITE_REINTENTOS': 3 if SQLITE_PRODUCCION else 0,
+    # Dashboards async (empleados.views_async); rh_project.asgi los activa
+    'DASHBOARDS_ASYNC': os.environ.get('RH_DASHBOARDS_ASYNC') == '1',
+    # Medición por petición (empleados.middleware.MedicionMiddleware)
+    'MEDICION_ACTIVA': True,
+    'MEDICION_UMBRAL_MS': 500,  # registrar peticiones más lentas que esto
+    'MEDICION_UMBRAL_CONSULTAS': 50,  # o con más consultas SQL que esto
+    # /metrics (empleados.metricas); con varios workers definir un directorio
+    # compartido y vaciarlo al arrancar
+    'METRICAS_DIRECTORIO': os.environ.get('METRICAS_DIRECTORIO'),
+    'METRICAS_VOLCADO_SEGUNDOS': 5,
+    'METRICAS_CACHE_SEGUNDOS': 30,  # indicadores de solicitudes y notificaciones
+    'METRICAS_TOKEN': os.environ.get('METRICAS_TOKEN'),  # Bearer del scraper; sin él, solo staff
+    # Notificaciones (manage.py enviar_notificaciones)
+    'NOTIFICACIONES_HORA_RESUMEN': 8,  # hora local del resumen diario
+    'NOTIFICACIONES_MAX_INTENTOS': 5,
+    'NOTIFICACIONES_ESPERA_BASE_SEGUNDOS': 60,  # se duplica en cada reintento
+    'NOTIFICACIONES_ESPERA_MAXIMA_SEGUNDOS': 6 * 3600,
+    'NOTIFICACIONES_RESERVA_SEGUNDOS': 300,  # tiempo que un worker retiene un lote
 }
 
-# Configuraciones de email (para futuras notificaciones)
+# Configuraciones de email (notificaciones enviadas por manage.py enviar_notificaciones)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 EMAIL_HOST = 'localhost'
 EMAIL_PORT = 587
@@ -5,11 +5,34 @@ Configuración de producción para el Sistema de Recursos Humanos
 from .settings import *
 import os
 
+from empleados.bitacora import configuracion_logging
+
 # Configuración de seguridad para producción
 DEBUG = False
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'tu-dominio.com']
 
 # Base de datos de producción (PostgreSQL recomendado)
+# - DB_POOL_MAX > 0: pool de psycopg 3 por proceso (pip install "psycopg[pool]");
+#   debe cubrir los hilos del worker, más los de empleados.views_async.
+# - Si no, conexiones persistentes reutilizadas DB_CONN_MAX_AGE segundos.
+# - DB_STATEMENT_TIMEOUT_MS: límite de cada consulta de cada petición; 0 = sin
+#   límite, p. ej. para migraciones o generar_datos.
+# - DB_SERVER_SIDE_CURSORS=0 con PgBouncer en modo transacción; si no, las
+#   exportaciones y el organigrama leen con cursores del lado del servidor.
+# Medir con: python manage.py medir_postgresql --settings=rh_project.settings_production
+pool_max = int(os.environ.get('DB_POOL_MAX', 0))
+opciones_bd = {}
+statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+if statement_timeout:
+    # Se fija al abrir la conexión: vale para todas las peticiones que la usen
+    opciones_bd['options'] = f'-c statement_timeout={statement_timeout}'
+if pool_max:
+    opciones_bd['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_size': pool_max,
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),  # espera por una conexión libre
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -18,6 +41,11 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'OPTIONS': opciones_bd,
+        # Con pool, Django exige CONN_MAX_AGE = 0: el pool ya reutiliza las conexiones
+        'CONN_MAX_AGE': 0 if pool_max else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': not pool_max,
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_SERVER_SIDE_CURSORS', '1') != '1',
     }
 }
 
@@ -40,25 +68,12 @@ X_FRAME_OPTIONS = 'DENY'
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 
-# Configuración de logging
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs', 'django.log'),
-        },
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['file'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-    },
-}
+# Configuración de logging: la misma que en desarrollo, sin consola y sin DEBUG
+LOGGING = configuracion_logging(
+    os.path.join(BASE_DIR, 'logs'), archivo='django.log', consola=False, nivel_empleados='INFO',
+    max_bytes=int(os.environ.get('LOG_MAX_BYTES', 50 * 1024 * 1024)),
+    respaldos=int(os.environ.get('LOG_RESPALDOS', 10)),
+)
 
 # Crear directorio de logs si no existe
 os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
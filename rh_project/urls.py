@@ -7,20 +7,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.shortcuts import redirect
-
-def redirect_to_dashboard(request):
-    """Redirigir a dashboard si el usuario está autenticado"""
-    if request.user.is_authenticated:
-        return redirect('empleados:dashboard')
-    return redirect('empleados:login')
 
 urlpatterns = [
     # Admin panel
     path('admin/', admin.site.urls),
     
-    # Aplicación principal
-    path('', redirect_to_dashboard, name='home'),
+    # Aplicación principal (el login en '/' redirige al dashboard si ya hay sesión)
     path('', include('empleados.urls')),
 ]
 
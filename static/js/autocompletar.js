@@ -0,0 +1,122 @@
+// Autocompletado para los <select data-autocompletar> (empleados.autocompletar.AutocompletarSelect)
+// El select queda oculto con la opción elegida; las demás se piden al servidor al escribir.
+
+(function() {
+    const ESPERA_MS = 250;
+
+    function iniciar(select) {
+        if (select.dataset.autocompletarListo) {
+            return;
+        }
+        select.dataset.autocompletarListo = '1';
+
+        const contenedor = document.createElement('div');
+        contenedor.className = 'position-relative';
+        const entrada = document.createElement('input');
+        entrada.type = 'search';
+        entrada.className = 'form-control';
+        entrada.placeholder = select.dataset.placeholder || '';
+        entrada.autocomplete = 'off';
+        const lista = document.createElement('div');
+        lista.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        lista.style.zIndex = 1050;
+        lista.style.maxHeight = '18rem';
+        lista.style.overflowY = 'auto';
+
+        const elegida = select.options[select.selectedIndex];
+        entrada.value = elegida && elegida.value ? elegida.text : '';
+        select.style.display = 'none';
+        select.parentNode.insertBefore(contenedor, select.nextSibling);
+        contenedor.appendChild(entrada);
+        contenedor.appendChild(lista);
+
+        let temporizador = null;
+        let peticion = null;
+
+        function elegir(id, texto) {
+            let opcion = Array.from(select.options).find(o => o.value === String(id));
+            if (!opcion) {
+                opcion = new Option(texto, id);
+                select.add(opcion);
+            }
+            select.value = String(id);
+            entrada.value = id ? texto : '';
+            lista.classList.add('d-none');
+            select.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+
+        function agregar(resultados, siguiente) {
+            resultados.forEach(resultado => {
+                const boton = document.createElement('button');
+                boton.type = 'button';
+                boton.className = 'list-group-item list-group-item-action';
+                boton.textContent = resultado.texto;
+                boton.addEventListener('mousedown', evento => {
+                    evento.preventDefault();
+                    elegir(resultado.id, resultado.texto);
+                });
+                lista.appendChild(boton);
+            });
+            if (siguiente) {
+                const mas = document.createElement('button');
+                mas.type = 'button';
+                mas.className = 'list-group-item list-group-item-action text-primary';
+                mas.textContent = 'Cargar más...';
+                mas.addEventListener('mousedown', evento => {
+                    evento.preventDefault();
+                    mas.remove();
+                    consultar(siguiente);
+                });
+                lista.appendChild(mas);
+            }
+            if (!lista.children.length) {
+                const vacio = document.createElement('div');
+                vacio.className = 'list-group-item text-muted';
+                vacio.textContent = 'Sin resultados';
+                lista.appendChild(vacio);
+            }
+            lista.classList.remove('d-none');
+        }
+
+        function consultar(cursor) {
+            const url = new URL(select.dataset.autocompletar, window.location.origin);
+            url.searchParams.set('q', entrada.value);
+            if (cursor) {
+                url.searchParams.set('cursor', cursor);
+            } else {
+                lista.innerHTML = '';
+            }
+            if (peticion) {
+                peticion.abort();
+            }
+            peticion = new AbortController();
+            fetch(url, {signal: peticion.signal, headers: {'Accept': 'application/json'}})
+                .then(respuesta => respuesta.json())
+                .then(datos => agregar(datos.resultados || [], datos.siguiente))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Autocompletado:', error);
+                    }
+                });
+        }
+
+        entrada.addEventListener('input', () => {
+            clearTimeout(temporizador);
+            if (!entrada.value && !select.required) {
+                elegir('', '');
+            }
+            temporizador = setTimeout(() => consultar(null), ESPERA_MS);
+        });
+        entrada.addEventListener('focus', () => consultar(null));
+        entrada.addEventListener('blur', () => {
+            lista.classList.add('d-none');
+            // Si el texto no corresponde a una opción elegida se restaura
+            const actual = select.options[select.selectedIndex];
+            entrada.value = actual && actual.value ? actual.text : '';
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        document.querySelectorAll('select[data-autocompletar]').forEach(iniciar);
+    });
+})();